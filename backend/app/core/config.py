@@ -1,16 +1,42 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Literal, Optional
 
 
 class Settings(BaseSettings):
     # Database
     DATABASE_URL: str
+    ASYNC_DATABASE_URL: Optional[str] = None  # defaults to DATABASE_URL with the asyncpg driver
+    DATABASE_REPLICA_URLS: str = ""  # comma-separated read replica URLs
+    DATABASE_REPLICA_STICKY_SECONDS: int = 5  # reads stay on the primary this long after a client writes
+    # Per engine and per worker: the primary, each replica and the async
+    # engine each open up to DB_POOL_SIZE + DB_MAX_OVERFLOW connections
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT_SECONDS: float = 30  # wait for a free connection before erroring
+    DB_POOL_RECYCLE_SECONDS: int = 1800  # -1 never replaces connections by age
+    # always: ping on every checkout; idle: only connections idle longer than
+    # DB_POOL_PRE_PING_IDLE_SECONDS; never: rely on DB_POOL_RECYCLE_SECONDS
+    DB_POOL_PRE_PING: Literal["always", "idle", "never"] = "idle"
+    DB_POOL_PRE_PING_IDLE_SECONDS: int = 30
+    DB_STATEMENT_TIMEOUT_MS: int = 0  # 0 disables; applies to API, jobs and scripts alike
     
     # Security
     SECRET_KEY: str
     JWT_SECRET: str
-    JWT_ALGORITHM: str = "HS256"
+    JWT_ALGORITHM: str = "HS256"  # RS256/ES256 etc. use the key files below instead of JWT_SECRET
+    JWT_PRIVATE_KEY_PATH: Optional[str] = None  # PEM; only needed where tokens are issued
+    JWT_PUBLIC_KEY_PATH: Optional[str] = None  # PEM
+    JWT_DECODE_CACHE_TTL_SECONDS: int = 300  # 0 disables the verified-token cache
+    JWT_DECODE_CACHE_SIZE: int = 10000
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    AUTH_USER_CACHE_TTL_SECONDS: int = 30  # 0 disables the authenticated-user cache
+    AUTH_USER_CACHE_SIZE: int = 10000
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    REFRESH_TOKEN_REVOCATION_CACHE_SECONDS: int = 10  # how long other workers may accept a logged-out session
+    REFRESH_TOKEN_SWEEP_INTERVAL_SECONDS: int = 3600
+    REFRESH_TOKEN_SWEEP_BATCH_SIZE: int = 1000
+    OTP_SWEEP_INTERVAL_SECONDS: int = 900
+    OTP_SWEEP_BATCH_SIZE: int = 1000
     
     # Email
     SMTP_HOST: str
@@ -18,10 +44,56 @@ class Settings(BaseSettings):
     SMTP_USER: str
     SMTP_PASSWORD: str
     SMTP_FROM: str
+    SMTP_USE_TLS: bool = True  # STARTTLS; off for a local stand-in server
+    SMTP_TIMEOUT_SECONDS: float = 10
+    SMTP_IDLE_SECONDS: int = 60  # reconnect instead of reusing a connection idle this long
+    EMAIL_QUEUE_MAX_SIZE: int = 1000
+    EMAIL_QUEUE_MAX_ATTEMPTS: int = 4
+    EMAIL_QUEUE_RETRY_SECONDS: float = 2  # doubled after each failed attempt
     
     # CORS
     CORS_ORIGINS: str
     
+    # Background jobs
+    BACKGROUND_JOBS_ENABLED: bool = True
+    
+    # Location history
+    LOCATION_HISTORY_RAW_RETENTION_HOURS: int = 24
+    LOCATION_HISTORY_BUCKET_MINUTES: int = 5
+    LOCATION_HISTORY_ROLLUP_RETENTION_DAYS: int = 30
+    LOCATION_HISTORY_MAINTENANCE_INTERVAL_SECONDS: int = 3600
+    
+    # Notifications
+    NOTIFICATION_FANOUT_CHUNK_SIZE: int = 1000
+    NOTIFICATION_FANOUT_STALE_SECONDS: int = 300
+    NOTIFICATION_DIGEST_AFTER_MINUTES: int = 60
+    NOTIFICATION_DIGEST_INTERVAL_SECONDS: int = 900
+    NOTIFICATION_READ_RETENTION_DAYS: int = 90  # 0 keeps read notifications forever
+    NOTIFICATION_MAX_PER_USER: int = 1000  # 0 disables the per-user cap
+    NOTIFICATION_BROADCAST_RETENTION_DAYS: int = 90  # 0 keeps broadcasts forever
+    NOTIFICATION_RETENTION_BATCH_SIZE: int = 1000
+    NOTIFICATION_RETENTION_BATCH_PAUSE_SECONDS: float = 0.05
+    NOTIFICATION_RETENTION_INTERVAL_SECONDS: int = 3600
+    NOTIFICATION_OUTBOX_POLL_SECONDS: float = 2
+    NOTIFICATION_OUTBOX_BATCH_SIZE: int = 500
+    NOTIFICATION_OUTBOX_MAX_ATTEMPTS: int = 5
+    NOTIFICATION_OUTBOX_RETRY_SECONDS: int = 30  # doubled after each failed attempt
+    NOTIFICATION_OUTBOX_RETENTION_DAYS: int = 7
+    NOTIFICATION_EMAILS_ENABLED: bool = False
+    NOTIFICATION_PREFERENCES_CACHE_TTL_SECONDS: int = 60
+    
+    # Rate limits, as "<count>/<seconds>"
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_TRUST_FORWARDED_FOR: bool = False  # enable only behind a proxy that sets X-Forwarded-For
+    RATE_LIMIT_OTP_REQUEST_PER_EMAIL: str = "3/600"
+    RATE_LIMIT_OTP_REQUEST_PER_IP: str = "20/3600"
+    RATE_LIMIT_OTP_VERIFY_PER_EMAIL: str = "5/600"
+    RATE_LIMIT_OTP_VERIFY_PER_IP: str = "30/3600"
+    
+    # Geofences
+    GEOFENCE_INDEX_TTL_SECONDS: int = 60
+    BUILDING_INDEX_TTL_SECONDS: int = 60  # nearest-building index used to tag location updates
+    
     # Environment
     ENVIRONMENT: str = "development"
     DEBUG: bool = True
@@ -30,6 +102,10 @@ class Settings(BaseSettings):
     def cors_origins_list(self) -> List[str]:
         return [origin.strip() for origin in self.CORS_ORIGINS.split(",")]
     
+    @property
+    def database_replica_urls_list(self) -> List[str]:
+        return [url.strip() for url in self.DATABASE_REPLICA_URLS.split(",") if url.strip()]
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -1,24 +1,301 @@
-from sqlalchemy import create_engine
+from fastapi.requests import HTTPConnection
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.sql import Select
+from typing import Optional
+from app.core.cache import TTLCache
 from app.core.config import settings
+from app.core.metrics import metrics
+import hashlib
+import random
+import time
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20,
+pool_checked_out = metrics.gauge(
+    "db_pool_checked_out_connections",
+    "Connections currently checked out of the pool",
+    ("pool",)
 )
+pool_overflow = metrics.gauge(
+    "db_pool_overflow_connections",
+    "Connections open beyond pool_size (negative while the pool is filling)",
+    ("pool",)
+)
+pool_capacity = metrics.gauge(
+    "db_pool_capacity_connections",
+    "Most connections the pool will open (DB_POOL_SIZE + DB_MAX_OVERFLOW)",
+    ("pool",)
+)
+pool_saturation = metrics.gauge(
+    "db_pool_saturation_ratio",
+    "Checked-out connections as a fraction of pool capacity; at 1 checkouts queue",
+    ("pool",)
+)
+pool_checkouts = metrics.counter(
+    "db_pool_checkouts_total",
+    "Connections checked out of the pool",
+    ("pool",)
+)
+pool_wait_seconds = metrics.histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled connection",
+    ("pool",),
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30)
+)
+pool_timeouts = metrics.counter(
+    "db_pool_checkout_timeouts_total",
+    "Checkouts that gave up waiting for a connection",
+    ("pool",)
+)
+pool_pings = metrics.counter(
+    "db_pool_pre_pings_total",
+    "Connections pinged on checkout, by outcome",
+    ("pool", "result")
+)
+
+
+class _CheckoutTimer:
+    """Pool mixin that records how long each checkout waited for a connection."""
+
+    metrics_label = "primary"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except Exception:
+            pool_timeouts.inc(pool=self.metrics_label)
+            raise
+        finally:
+            pool_wait_seconds.observe(time.perf_counter() - started, pool=self.metrics_label)
+
+
+class InstrumentedQueuePool(_CheckoutTimer, QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+
+def _pool_class(base: type, label: str) -> type:
+    # A subclass per label, since pool.recreate() keeps the class but not attributes
+    return type(f"{base.__name__}_{label}", (base,), {"metrics_label": label})
+
+
+def _engine_options(async_driver: bool = False) -> dict:
+    """Pool and connection settings shared by every engine."""
+    options = dict(
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        pool_pre_ping=settings.DB_POOL_PRE_PING == "always",
+    )
+    if settings.DB_STATEMENT_TIMEOUT_MS:
+        # Set per connection, so Postgres cancels runaway queries server-side
+        if async_driver:
+            options["connect_args"] = {"server_settings": {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"}
+    return options
+
+
+def _ping(dbapi_connection, label: str):
+    """Round trip on a connection; a dead one raises DisconnectionError so the pool replaces it."""
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("SELECT 1")
+    except Exception as e:
+        pool_pings.inc(pool=label, result="dead")
+        raise exc.DisconnectionError() from e
+    finally:
+        try:
+            cursor.close()
+        except Exception:
+            pass
+    pool_pings.inc(pool=label, result="alive")
+
+
+def _instrument_pool(target: Engine, label: str):
+    """Report pool metrics for `target` under `label` and apply the "idle" pre-ping strategy."""
+    capacity = settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+    pool_capacity.set(capacity, pool=label)
+
+    @event.listens_for(target, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        # "idle": only connections that sat in the pool long enough to have
+        # been dropped by a server or proxy timeout pay for a ping
+        if settings.DB_POOL_PRE_PING == "idle":
+            checked_in_at = connection_record.info.get("checked_in_at")
+            if checked_in_at is not None and time.monotonic() - checked_in_at > settings.DB_POOL_PRE_PING_IDLE_SECONDS:
+                _ping(dbapi_connection, label)
+
+        pool_checkouts.inc(pool=label)
+        pool_checked_out.inc(pool=label)
+        pool_overflow.set(target.pool.overflow(), pool=label)
+        pool_saturation.set(pool_checked_out.get(pool=label) / capacity, pool=label)
+
+    @event.listens_for(target, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        connection_record.info["checked_in_at"] = time.monotonic()
+        # Fires before the connection is back in the pool, so pool.checkedout()
+        # would still count it
+        pool_checked_out.dec(pool=label)
+        pool_saturation.set(pool_checked_out.get(pool=label) / capacity, pool=label)
+
+
+def _create_engine(url: str, label: str) -> Engine:
+    """A sync engine whose pool reports metrics under `label`."""
+    new_engine = create_engine(url, poolclass=_pool_class(InstrumentedQueuePool, label), **_engine_options())
+    _instrument_pool(new_engine, label)
+    return new_engine
+
+
+engine = _create_engine(settings.DATABASE_URL, "primary")
+
+# Read replicas for get_read_db; none configured means reads use the primary
+replica_engines = [
+    _create_engine(url, f"replica{index}")
+    for index, url in enumerate(settings.database_replica_urls_list)
+]
+
+
+class RoutingSession(Session):
+    """
+    Session that sends reads to the replica in `info["replica"]`, if set.
+
+    Only SELECT statements go to the replica. Flushes (which pass no
+    statement), INSERT/UPDATE/DELETE and anything else use the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        replica = self.info.get("replica")
+        if replica is None or not isinstance(clause, Select):
+            return engine
+        return replica
+
+
+def use_primary(db: Session):
+    """
+    Send a session's remaining reads to the primary, e.g. right after its own
+    writes, so they are guaranteed to be visible. No-op on primary sessions.
+    """
+    db.info.pop("replica", None)
+
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=engine)
+
+# Clients that wrote recently, by hashed Authorization header. Their reads
+# stay on the primary until replicas have likely caught up. Per process: a
+# client's next request may land on a worker that did not see the write.
+_recent_writers = TTLCache(settings.DATABASE_REPLICA_STICKY_SECONDS, max_size=100000)
+
+
+def _client_key(connection: Optional[HTTPConnection]) -> Optional[str]:
+    authorization = connection.headers.get("authorization") if connection is not None else None
+    if not authorization:
+        return None
+    return hashlib.sha256(authorization.encode()).hexdigest()
+
+
+def _mark_written(session, flush_context=None):
+    session.info["wrote"] = True
+
+
+@event.listens_for(SessionLocal, "do_orm_execute")
+def _on_orm_execute(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        _mark_written(orm_execute_state.session)
+
+
+event.listen(SessionLocal, "after_flush", _mark_written)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _on_commit(session):
+    # Runs inside the handler, before the response is sent, so the client's
+    # next request already finds the mark (see get_read_db)
+    if session.info.pop("wrote", False):
+        key = session.info.get("client_key")
+        if key is not None:
+            _recent_writers.set(key, True)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _on_rollback(session):
+    session.info.pop("wrote", None)
+
+
+def _async_database_url() -> str:
+    """ASYNC_DATABASE_URL, or DATABASE_URL with the asyncpg driver."""
+    if settings.ASYNC_DATABASE_URL:
+        return settings.ASYNC_DATABASE_URL
+    return make_url(settings.DATABASE_URL).set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+
+
+class InstrumentedAsyncAdaptedQueuePool(_CheckoutTimer, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records how long each checkout waited for a connection."""
+
+
+# Async engine for handlers ported to AsyncSession. It has its own pool, so
+# the two pools together may open up to twice the connections.
+async_engine = create_async_engine(
+    _async_database_url(),
+    poolclass=_pool_class(InstrumentedAsyncAdaptedQueuePool, "async"),
+    **_engine_options(async_driver=True)
+)
+_instrument_pool(async_engine.sync_engine, "async")
+
+# expire_on_commit=False: attribute access after commit must not trigger
+# implicit (sync) loads, which AsyncSession cannot do
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
 
 
-def get_db():
+def get_db(connection: HTTPConnection = None):
     """Dependency for getting database session"""
     db = SessionLocal()
+    # Committed writes keep this client's reads on the primary for a while
+    # (see _on_commit and get_read_db)
+    if settings.DATABASE_REPLICA_STICKY_SECONDS:
+        key = _client_key(connection)
+        if key is not None:
+            db.info["client_key"] = key
     try:
         yield db
     finally:
         db.close()
+
+
+def get_read_db(connection: HTTPConnection = None):
+    """
+    Dependency for a read-mostly database session.
+
+    Queries go to a random replica when replicas are configured and the
+    client has not written within DATABASE_REPLICA_STICKY_SECONDS; writes
+    still go to the primary. Replicas may lag slightly, so use it for
+    feeds, history, stats and leaderboards, not read-modify-write.
+    """
+    db = ReadSessionLocal()
+    if replica_engines:
+        key = _client_key(connection)
+        if key is None or _recent_writers.get(key) is None:
+            db.info["replica"] = random.choice(replica_engines)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db():
+    """
+    Dependency for getting an async database session.
+
+    For `async def` handlers, which must not use the blocking `get_db`
+    session. Services move over one at a time: a ported handler depends on
+    this (and `get_current_user_async`) and awaits its queries.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,94 @@
+"""Periodic background jobs run inside the API process"""
+
+from dataclasses import dataclass
+from typing import Callable, Dict, List
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+import asyncio
+import logging
+import zlib
+
+from app.core.database import SessionLocal, engine
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PeriodicJob:
+    name: str
+    interval_seconds: float
+    func: Callable[[Session], None]
+
+
+class Scheduler:
+    """
+    Runs registered jobs on fixed intervals.
+
+    Each job runs in the threadpool with its own session. A Postgres advisory
+    lock keyed by the job name ensures only one API worker runs a given job at
+    a time when several workers share the database.
+    """
+
+    def __init__(self):
+        self.jobs: Dict[str, PeriodicJob] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    def add_job(self, name: str, interval_seconds: float, func: Callable[[Session], None]):
+        """Register a job. `func` receives a fresh session and owns its commits."""
+        self.jobs[name] = PeriodicJob(name=name, interval_seconds=interval_seconds, func=func)
+
+    async def start(self):
+        """Start one loop per registered job."""
+        for job in self.jobs.values():
+            self._tasks.append(asyncio.create_task(self._loop(job)))
+        logger.info(f"Started {len(self._tasks)} background jobs")
+
+    async def stop(self):
+        """Cancel all job loops."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _loop(self, job: PeriodicJob):
+        while True:
+            try:
+                await run_in_threadpool(self.run_job, job.name)
+            except Exception as e:
+                logger.error(f"Background job {job.name} failed: {str(e)}", exc_info=True)
+            await asyncio.sleep(job.interval_seconds)
+
+    def run_job(self, name: str) -> bool:
+        """
+        Run a job once if no other worker holds its lock.
+        Returns True if the job ran.
+        """
+        job = self.jobs[name]
+        lock_key = zlib.crc32(job.name.encode())
+
+        # The lock lives on its own connection so the job session can commit
+        # (and return its connection to the pool) as often as it likes.
+        with engine.connect() as lock_conn:
+            acquired = lock_conn.execute(
+                text("SELECT pg_try_advisory_lock(:key)"), {"key": lock_key}
+            ).scalar()
+            # Session-level lock: end the transaction so the connection does
+            # not sit idle in transaction while the job runs.
+            lock_conn.commit()
+            if not acquired:
+                return False
+
+            db = SessionLocal()
+            try:
+                job.func(db)
+            finally:
+                db.close()
+                lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": lock_key})
+                lock_conn.commit()
+
+        return True
+
+
+# Global scheduler instance
+scheduler = Scheduler()
@@ -1,18 +1,225 @@
 from datetime import datetime, timedelta
-from typing import Optional
-from jose import JWTError, jwt
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+from jose import JWTError, jwk, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
 from app.core.config import settings
+from app.core.database import SessionLocal, get_db, get_async_db
+from app.core.metrics import metrics
+from app.models.user import User
+from app.models.refresh_token import RefreshToken
+from app.core.cache import TTLCache
+from uuid import UUID
+import hashlib
 import secrets
 import string
+import threading
+import time
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
 
 
+def _load_jwt_keys() -> Tuple[Any, Any]:
+    """
+    The (signing, verification) keys for JWT_ALGORITHM, parsed once.
+    
+    HS* algorithms use JWT_SECRET. Asymmetric ones (RS*, ES*, PS*) read PEM
+    files from JWT_PRIVATE_KEY_PATH and JWT_PUBLIC_KEY_PATH; a deployment
+    that only verifies tokens can leave out the private key.
+    """
+    algorithm = settings.JWT_ALGORITHM
+    if algorithm.startswith("HS"):
+        key = jwk.construct(settings.JWT_SECRET, algorithm)
+        return key, key
+    
+    if not settings.JWT_PUBLIC_KEY_PATH:
+        raise RuntimeError(f"JWT_PUBLIC_KEY_PATH must be set for {algorithm}")
+    public_key = jwk.construct(Path(settings.JWT_PUBLIC_KEY_PATH).read_text(), algorithm)
+    private_key = None
+    if settings.JWT_PRIVATE_KEY_PATH:
+        private_key = jwk.construct(Path(settings.JWT_PRIVATE_KEY_PATH).read_text(), algorithm)
+    return private_key, public_key
+
+
+# Parsed at import rather than on every encode/decode, so a bad key fails
+# startup instead of the first login
+_signing_key, _verification_key = _load_jwt_keys()
+
+# Claims of recently verified tokens by token hash, so a client reusing its
+# token skips signature verification. Entries are never used past `exp`.
+_token_cache = TTLCache(settings.JWT_DECODE_CACHE_TTL_SECONDS, max_size=settings.JWT_DECODE_CACHE_SIZE)
+
+token_cache_lookups = metrics.counter(
+    "auth_token_cache_lookups_total",
+    "Verified-token cache lookups",
+    ("result",)
+)
+
+# Column values of recently authenticated users, so a request with a valid
+# token needs no users query. Writes through the ORM in this process
+# invalidate an entry at once; the short TTL bounds how long other workers
+# may keep accepting a user who was deactivated or lost a role.
+_user_cache = TTLCache(settings.AUTH_USER_CACHE_TTL_SECONDS, max_size=settings.AUTH_USER_CACHE_SIZE)
+_user_columns = [column.key for column in User.__table__.columns]
+
+user_cache_lookups = metrics.counter(
+    "auth_user_cache_lookups_total",
+    "Authenticated-user cache lookups",
+    ("result",)
+)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_user(mapper, connection, target):
+    _user_cache.invalidate(target.id)
+
+
+def invalidate_cached_user(user_id: UUID):
+    """Drop a user from the authentication cache, e.g. after a bulk UPDATE."""
+    _user_cache.invalidate(user_id)
+
+
+def _cached_user(user_id: UUID) -> Optional[User]:
+    """
+    A cached user rebuilt as a detached instance, or None on a miss.
+    
+    Merging it into a session with load=False attaches it without a query,
+    so routes can modify and commit it as usual.
+    """
+    if not settings.AUTH_USER_CACHE_TTL_SECONDS:
+        return None
+    values = _user_cache.get(user_id)
+    if values is None:
+        user_cache_lookups.inc(result="miss")
+        return None
+    user_cache_lookups.inc(result="hit")
+    user = User(**values)
+    make_transient_to_detached(user)
+    return user
+
+
+def _remember_user(user: Optional[User]):
+    if user is not None and settings.AUTH_USER_CACHE_TTL_SECONDS:
+        _user_cache.set(user.id, {key: getattr(user, key) for key in _user_columns})
+
+
+def _load_user(db: Session, user_id: UUID) -> Optional[User]:
+    """Load a user by ID, from the cache when possible."""
+    cached = _cached_user(user_id)
+    if cached is not None:
+        return db.merge(cached, load=False)
+    
+    user = db.query(User).filter(User.id == user_id).first()
+    _remember_user(user)
+    return user
+
+
+async def _load_user_async(db: AsyncSession, user_id: UUID) -> Optional[User]:
+    """`_load_user` for an AsyncSession."""
+    cached = _cached_user(user_id)
+    if cached is not None:
+        return await db.merge(cached, load=False)
+    
+    user = await db.get(User, user_id)
+    _remember_user(user)
+    return user
+
+
+# Sessions (refresh token families, the `sid` claim) revoked recently
+# enough that access tokens issued to them may not have expired yet.
+# Reloaded every REFRESH_TOKEN_REVOCATION_CACHE_SECONDS, so a logout handled
+# by another worker takes effect within that time.
+_revoked_sessions: frozenset = frozenset()
+_revoked_sessions_loaded_at: Optional[float] = None
+# Sessions revoked by this process, by monotonic time. Merged into every
+# reload, since a reload that queried before the revocation committed would
+# otherwise drop them.
+_locally_revoked: Dict[str, float] = {}
+_revoked_sessions_lock = threading.Lock()
+
+
+def _revoked_sessions_query():
+    since = datetime.utcnow() - timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    return select(RefreshToken.family_id).where(RefreshToken.revoked_at >= since).distinct()
+
+
+def _revoked_sessions_stale() -> bool:
+    return (
+        _revoked_sessions_loaded_at is None
+        or time.monotonic() - _revoked_sessions_loaded_at > settings.REFRESH_TOKEN_REVOCATION_CACHE_SECONDS
+    )
+
+
+def _set_revoked_sessions(family_ids: Iterable[UUID]):
+    global _revoked_sessions, _revoked_sessions_loaded_at
+    loaded = frozenset(str(family_id) for family_id in family_ids)
+    cutoff = time.monotonic() - settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    with _revoked_sessions_lock:
+        for session_id, revoked_at in list(_locally_revoked.items()):
+            if revoked_at < cutoff:
+                del _locally_revoked[session_id]
+        _revoked_sessions = loaded | _locally_revoked.keys()
+        _revoked_sessions_loaded_at = time.monotonic()
+
+
+def revoke_session(family_id: UUID):
+    """Reject this session's access tokens in this process right away."""
+    global _revoked_sessions
+    session_id = str(family_id)
+    with _revoked_sessions_lock:
+        _locally_revoked[session_id] = time.monotonic()
+        _revoked_sessions = _revoked_sessions | {session_id}
+
+
+def _session_revoked(db: Session, session_id: Optional[str]) -> bool:
+    if session_id is None:
+        return False
+    if _revoked_sessions_stale():
+        _set_revoked_sessions(db.execute(_revoked_sessions_query()).scalars().all())
+    return session_id in _revoked_sessions
+
+
+def _check_session(db: Session, session_id: Optional[str]):
+    if _session_revoked(db, session_id):
+        raise _credentials_exception()
+
+
+async def _check_session_async(db: AsyncSession, session_id: Optional[str]):
+    """`_check_session` for an AsyncSession."""
+    if session_id is None:
+        return
+    if _revoked_sessions_stale():
+        _set_revoked_sessions((await db.execute(_revoked_sessions_query())).scalars().all())
+    if session_id in _revoked_sessions:
+        raise _credentials_exception()
+
+
+def is_session_revoked(payload: dict) -> bool:
+    """
+    Whether the session (`sid`) of a decoded token has been revoked.
+    
+    For token checks outside the request dependencies, such as WebSocket
+    connects. May reload the revocation list on its own session, so call it
+    from the threadpool in async code.
+    """
+    session_id = payload.get("sid")
+    if session_id is None or not _revoked_sessions_stale():
+        return session_id is not None and session_id in _revoked_sessions
+    
+    db = SessionLocal()
+    try:
+        return _session_revoked(db, session_id)
+    finally:
+        db.close()
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against a hash"""
     return pwd_context.verify(plain_password, hashed_password)
@@ -31,18 +238,38 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
+    if _signing_key is None:
+        raise RuntimeError("JWT_PRIVATE_KEY_PATH is not set; this process cannot issue tokens")
+    
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, _signing_key, algorithm=settings.JWT_ALGORITHM)
     return encoded_jwt
 
 
 def decode_access_token(token: str) -> Optional[dict]:
-    """Decode and verify JWT token"""
+    """
+    Decode and verify JWT token
+    
+    Valid tokens are cached (see `_token_cache`); invalid ones are verified
+    every time. The returned claims may be shared, so do not modify them.
+    """
+    cache_key = None
+    if settings.JWT_DECODE_CACHE_TTL_SECONDS:
+        cache_key = hashlib.sha256(token.encode()).digest()
+        payload = _token_cache.get(cache_key)
+        if payload is not None and payload["exp"] > time.time():
+            token_cache_lookups.inc(result="hit")
+            return payload
+        token_cache_lookups.inc(result="miss")
+    
     try:
-        payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
-        return payload
+        payload = jwt.decode(token, _verification_key, algorithms=[settings.JWT_ALGORITHM])
     except JWTError:
         return None
+    
+    if cache_key is not None and "exp" in payload:
+        _token_cache.set(cache_key, payload)
+    return payload
 
 
 def generate_otp(length: int = 6) -> str:
@@ -57,43 +284,66 @@ def generate_secure_token(length: int = 32) -> str:
     return secrets.token_urlsafe(length)
 
 
-async def get_current_user(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def _token_claims(credentials: HTTPAuthorizationCredentials) -> Tuple[UUID, Optional[str]]:
+    """
+    The user ID (`sub`) and session (`sid`, absent on older tokens) of a
+    valid bearer token; raises 401 otherwise.
+    """
+    payload = decode_access_token(credentials.credentials)
+    if payload is None or payload.get("sub") is None:
+        raise _credentials_exception()
+    
+    try:
+        return UUID(payload["sub"]), payload.get("sid")
+    except ValueError:
+        raise _credentials_exception()
+
+
+def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(lambda: next(__import__('app.core.database', fromlist=['get_db']).get_db()))
+    db: Session = Depends(get_db)
 ):
     """
     Dependency to get current authenticated user from JWT token
     Returns the actual User model object
+    
+    Uses the same request-scoped session as the route (FastAPI resolves
+    `get_db` once per request), so the user is attached to the session the
+    route commits and the session is closed when the request ends. A plain
+    `def`, so FastAPI runs its blocking queries in the threadpool rather
+    than on the event loop.
     """
-    from app.models.user import User
-    from uuid import UUID
+    user_id, session_id = _token_claims(credentials)
+    _check_session(db, session_id)
+    user = _load_user(db, user_id)
     
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+    if user is None:
+        raise _credentials_exception()
     
-    try:
-        token = credentials.credentials
-        payload = decode_access_token(token)
-        
-        if payload is None:
-            raise credentials_exception
-        
-        user_id_str: str = payload.get("sub")
-        
-        if user_id_str is None:
-            raise credentials_exception
-        
-        # Convert string UUID to UUID object and fetch user from database
-        user_id = UUID(user_id_str)
-        user = db.query(User).filter(User.id == user_id).first()
-        
-        if user is None:
-            raise credentials_exception
-        
-        return user
-    
-    except (JWTError, ValueError):
-        raise credentials_exception
+    return user
+
+
+async def get_current_user_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    `get_current_user` for handlers ported to `get_async_db`; the user is
+    attached to the route's AsyncSession.
+    """
+    user_id, session_id = _token_claims(credentials)
+    await _check_session_async(db, session_id)
+    user = await _load_user_async(db, user_id)
+    
+    if user is None:
+        raise _credentials_exception()
+    
+    return user
@@ -1,11 +1,14 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from fastapi.responses import PlainTextResponse
 from fastapi.exceptions import RequestValidationError
+from starlette.concurrency import run_in_threadpool
 from starlette.middleware.base import BaseHTTPMiddleware
 from pathlib import Path
 
 from app.core.config import settings
+from app.core.metrics import metrics
 from app.middleware import error_handler_middleware, validation_exception_handler
 
 # Initialize FastAPI application
@@ -107,6 +110,10 @@ For issues or questions, contact: support@plaksha.edu.in
             "name": "Location",
             "description": "Location sharing and nearby user discovery"
         },
+        {
+            "name": "Friends",
+            "description": "Friend list used for friends-only location visibility"
+        },
         {
             "name": "Notifications",
             "description": "Real-time notification system"
@@ -128,6 +135,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Add error handling middleware
@@ -182,11 +190,22 @@ async def health_check():
     }
 
 
+@app.get("/metrics", tags=["Health"], include_in_schema=False)
+async def metrics_endpoint():
+    """
+    Metrics in the Prometheus text format
+    
+    Values are per worker process.
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 # Import routers
 from app.routers import (
     auth,
     users,
     location,
+    friendships,
     building,
     notifications,
     chat,
@@ -202,6 +221,7 @@ routers = [
     (auth.router, {"prefix": "/api"}),
     (users.router, {}),
     (location.router, {"prefix": "/api"}),
+    (friendships.router, {}),
     (building.router, {}),
     (notifications.router, {}),
     (chat.router, {}),
@@ -214,3 +234,85 @@ routers = [
 
 for router, config in routers:
     app.include_router(router, **config)
+
+
+# Background jobs
+from app.core.scheduler import scheduler
+from app.services.location_history_service import LocationHistoryService
+from app.services.notification_fanout_service import NotificationFanoutService
+from app.services.notification_service import NotificationService
+from app.services.notification_retention_service import NotificationRetentionService
+from app.services.notification_outbox_service import NotificationOutboxService
+from app.services.email_queue import email_queue
+from app.services.auth_service import AuthService
+from app.services.refresh_token_service import RefreshTokenService
+
+
+@app.on_event("startup")
+async def start_background_jobs():
+    """Register and start periodic maintenance jobs."""
+    if not settings.BACKGROUND_JOBS_ENABLED:
+        return
+    
+    scheduler.add_job(
+        "location_history_maintenance",
+        settings.LOCATION_HISTORY_MAINTENANCE_INTERVAL_SECONDS,
+        LocationHistoryService.run_maintenance
+    )
+    scheduler.add_job(
+        "notification_fanout_recovery",
+        60,
+        NotificationFanoutService.resume_stale_jobs
+    )
+    scheduler.add_job(
+        "notification_message_digest",
+        settings.NOTIFICATION_DIGEST_INTERVAL_SECONDS,
+        NotificationService.run_message_digest
+    )
+    scheduler.add_job(
+        "notification_retention",
+        settings.NOTIFICATION_RETENTION_INTERVAL_SECONDS,
+        NotificationRetentionService.run_retention
+    )
+    scheduler.add_job(
+        "notification_outbox_dispatch",
+        settings.NOTIFICATION_OUTBOX_POLL_SECONDS,
+        NotificationOutboxService.dispatch
+    )
+    scheduler.add_job(
+        "otp_sweep",
+        settings.OTP_SWEEP_INTERVAL_SECONDS,
+        AuthService.sweep_expired_otps
+    )
+    scheduler.add_job(
+        "refresh_token_sweep",
+        settings.REFRESH_TOKEN_SWEEP_INTERVAL_SECONDS,
+        RefreshTokenService.sweep_expired
+    )
+    await scheduler.start()
+
+
+@app.on_event("shutdown")
+async def stop_background_jobs():
+    """Stop periodic maintenance jobs."""
+    await scheduler.stop()
+
+
+@app.on_event("startup")
+async def start_email_queue():
+    """Start the email send queue (needed by OTP login, so independent of BACKGROUND_JOBS_ENABLED)."""
+    email_queue.start()
+
+
+@app.on_event("shutdown")
+async def stop_email_queue():
+    """Send queued emails that are due, then stop the send queue."""
+    await run_in_threadpool(email_queue.stop)
+
+
+@app.on_event("shutdown")
+async def close_async_engine():
+    """Close the async engine's pooled connections."""
+    from app.core.database import async_engine
+    
+    await async_engine.dispose()
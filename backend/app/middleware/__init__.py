@@ -1,8 +1,13 @@
 """Middleware modules for request/response processing"""
 
 from .error_handler import error_handler_middleware, validation_exception_handler
+from .rate_limit import RateLimit, RateLimitBackend, MemoryRateLimitBackend, set_backend
 
 __all__ = [
     "error_handler_middleware",
     "validation_exception_handler",
+    "RateLimit",
+    "RateLimitBackend",
+    "MemoryRateLimitBackend",
+    "set_backend",
 ]
@@ -0,0 +1,160 @@
+"""Token-bucket rate limiting for individual routes"""
+
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from fastapi import HTTPException, Request, Response, status
+from typing import Callable, List, Optional, Tuple
+import inspect
+import math
+import threading
+import time
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+rate_limit_rejections = metrics.counter(
+    "rate_limit_rejections_total",
+    "Requests rejected by a rate limit",
+    ("limit",)
+)
+
+
+def parse_rate(rate: str) -> Tuple[int, float]:
+    """
+    Parse a "<count>/<seconds>" rate, e.g. "5/600" for five per ten minutes.
+
+    Returns:
+        (count, seconds) tuple
+    """
+    count, _, seconds = rate.partition("/")
+    return int(count), float(seconds)
+
+
+class RateLimitBackend(ABC):
+    """
+    Storage for token buckets.
+
+    The in-memory backend limits each API worker separately. To share
+    limits across workers, implement `consume` over a shared store and
+    install it with `set_backend` at startup.
+    """
+
+    @abstractmethod
+    def consume(self, key: str, capacity: int, refill_per_second: float) -> Tuple[bool, float, float]:
+        """
+        Take one token from the bucket at `key`, creating it full.
+
+        Returns:
+            (allowed, tokens remaining, seconds until a token is available)
+        """
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """
+    Per-process token buckets, at most `max_keys` of them.
+
+    Beyond that the least recently used bucket is evicted, which at worst
+    hands a long-idle client a fresh, full bucket.
+    """
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        # key -> (tokens, updated_at), least recently used first
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key: str, capacity: int, refill_per_second: float) -> Tuple[bool, float, float]:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (float(capacity), now))
+            tokens = min(float(capacity), tokens + (now - updated_at) * refill_per_second)
+
+            if tokens >= 1:
+                tokens -= 1
+                allowed, retry_after = True, 0.0
+            else:
+                allowed, retry_after = False, (1 - tokens) / refill_per_second
+
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return allowed, tokens, retry_after
+
+
+_backend: RateLimitBackend = MemoryRateLimitBackend()
+
+
+def set_backend(backend: RateLimitBackend):
+    """Install the bucket storage used by every rate limit."""
+    global _backend
+    _backend = backend
+
+
+def client_ip(request: Request) -> str:
+    """The client's IP, taken from X-Forwarded-For when behind a trusted proxy."""
+    if settings.RATE_LIMIT_TRUST_FORWARDED_FOR:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+async def body_email(request: Request) -> Optional[str]:
+    """The `email` field of a JSON body, normalized, or None."""
+    try:
+        body = await request.json()
+    except ValueError:
+        return None
+    email = body.get("email") if isinstance(body, dict) else None
+    return email.strip().lower() if isinstance(email, str) else None
+
+
+class RateLimit:
+    """
+    Route dependency enforcing token-bucket limits.
+
+    Each limit is (label, "<count>/<seconds>", key function); the key
+    function maps the request to a bucket key, or None to skip that limit.
+    All limits are checked before the route's own dependencies run. Use it
+    in the decorator so it runs first:
+
+        @router.post("/request-otp", dependencies=[Depends(otp_request_limit)])
+
+    Rejected requests get 429 with Retry-After; allowed ones get
+    X-RateLimit-Limit and X-RateLimit-Remaining for the tightest limit.
+    """
+
+    def __init__(self, name: str, limits: List[Tuple[str, str, Callable]]):
+        self.name = name
+        self.limits = limits
+
+    async def __call__(self, request: Request, response: Response):
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+
+        tightest: Optional[Tuple[int, float]] = None
+        for label, rate, key_func in self.limits:
+            key = key_func(request)
+            if inspect.isawaitable(key):
+                key = await key
+            if key is None:
+                continue
+
+            capacity, period = parse_rate(rate)
+            allowed, remaining, retry_after = _backend.consume(
+                f"{self.name}:{label}:{key}", capacity, capacity / period
+            )
+            if not allowed:
+                rate_limit_rejections.inc(limit=f"{self.name}:{label}")
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Too many requests, please try again later",
+                    headers={"Retry-After": str(math.ceil(retry_after))}
+                )
+            if tightest is None or remaining < tightest[1]:
+                tightest = (capacity, remaining)
+
+        if tightest is not None:
+            response.headers["X-RateLimit-Limit"] = str(tightest[0])
+            response.headers["X-RateLimit-Remaining"] = str(int(tightest[1]))
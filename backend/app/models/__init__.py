@@ -1,9 +1,24 @@
 # Import all models here for Alembic to detect them
 from app.models.user import User, UserRole
 from app.models.otp import OTPRequest
+from app.models.refresh_token import RefreshToken
 from app.models.location import Location, VisibilityLevel
+from app.models.friendship import Friendship
+from app.models.location_history import LocationHistory, LocationHistoryRollup
 from app.models.building import Building, BuildingType
-from app.models.notification import Notification, NotificationType
+from app.models.notification import (
+    Notification,
+    NotificationType,
+    NOTIFICATION_TYPE_BITS,
+    NotificationCounter,
+    NotificationFanoutJob,
+    FanoutJobStatus,
+    BroadcastNotification,
+    BroadcastNotificationReceipt,
+    NotificationOutbox,
+    OutboxKind,
+    NotificationPreference,
+)
 from app.models.chat import ChatGroup, ChatMessage, ChatMember, MemberRole
 from app.models.announcement import Announcement, AnnouncementCategory
 from app.models.issue import Issue, IssueComment, IssueCategory, IssueStatus
@@ -15,12 +30,24 @@ __all__ = [
     "User",
     "UserRole",
     "OTPRequest",
+    "RefreshToken",
     "Location",
     "VisibilityLevel",
+    "Friendship",
+    "LocationHistory",
+    "LocationHistoryRollup",
     "Building",
     "BuildingType",
     "Notification",
     "NotificationType",
+    "NotificationCounter",
+    "NotificationFanoutJob",
+    "FanoutJobStatus",
+    "BroadcastNotification",
+    "BroadcastNotificationReceipt",
+    "NotificationOutbox",
+    "OutboxKind",
+    "NotificationPreference",
     "ChatGroup",
     "ChatMessage",
     "ChatMember",
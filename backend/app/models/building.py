@@ -1,5 +1,5 @@
 from sqlalchemy import Column, String, Float, DateTime, Enum as SQLEnum
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import UUID, JSONB
 from app.core.database import Base
 import uuid
 from datetime import datetime
@@ -29,5 +29,6 @@ class Building(Base):
     description = Column(String(500), nullable=True)
     floor_count = Column(String(10), nullable=True)
     capacity = Column(String(50), nullable=True)
+    geofence = Column(JSONB, nullable=True)  # Polygon as [[lat, lon], ...]
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
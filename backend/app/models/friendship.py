@@ -0,0 +1,29 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Index, CheckConstraint
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class Friendship(Base):
+    """
+    Directed friend edge: `user_id` has added `friend_id` as a friend.
+
+    A location shared with FRIENDS visibility is visible to every user its
+    owner has added, so the visibility check is a primary-key probe on
+    (owner, viewer).
+    """
+    __tablename__ = "friendships"
+    __table_args__ = (
+        CheckConstraint('user_id <> friend_id', name='ck_friendships_not_self'),
+        # Reverse lookups ("who has added me")
+        Index('ix_friendships_friend_id_user_id', 'friend_id', 'user_id'),
+    )
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    friend_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    # Relationships
+    user = relationship("User", foreign_keys=[user_id], backref="friendships")
+    friend = relationship("User", foreign_keys=[friend_id])
@@ -0,0 +1,39 @@
+from sqlalchemy import Column, Integer, Float, DateTime
+from sqlalchemy.dialects.postgresql import UUID
+from app.core.database import Base
+
+
+class LocationHistory(Base):
+    """
+    Append-only raw location samples.
+
+    Range-partitioned by day on `recorded_at` (see LocationHistoryService for
+    partition management). Raw partitions are rolled up into
+    LocationHistoryRollup and dropped once they age out.
+    """
+    __tablename__ = "location_history"
+    __table_args__ = {"postgresql_partition_by": "RANGE (recorded_at)"}
+
+    user_id = Column(UUID(as_uuid=True), primary_key=True)
+    recorded_at = Column(DateTime(timezone=True), primary_key=True)
+    latitude = Column(Float, nullable=False)
+    longitude = Column(Float, nullable=False)
+    building_id = Column(UUID(as_uuid=True), nullable=True)
+
+
+class LocationHistoryRollup(Base):
+    """
+    Downsampled location history, one row per user per time bucket.
+
+    Range-partitioned by day on `bucket_start`; partitions past the rollup
+    retention window are dropped.
+    """
+    __tablename__ = "location_history_rollups"
+    __table_args__ = {"postgresql_partition_by": "RANGE (bucket_start)"}
+
+    user_id = Column(UUID(as_uuid=True), primary_key=True)
+    bucket_start = Column(DateTime(timezone=True), primary_key=True)
+    latitude = Column(Float, nullable=False)
+    longitude = Column(Float, nullable=False)
+    building_id = Column(UUID(as_uuid=True), nullable=True)
+    sample_count = Column(Integer, nullable=False)
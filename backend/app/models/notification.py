@@ -1,5 +1,5 @@
-from sqlalchemy import Column, String, Text, Boolean, DateTime, Enum as SQLEnum, ForeignKey
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, Text, Boolean, DateTime, Integer, BigInteger, Enum as SQLEnum, ForeignKey, Index, text
+from sqlalchemy.dialects.postgresql import UUID, JSONB, ARRAY
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 import uuid
@@ -17,21 +17,192 @@ class NotificationType(str, enum.Enum):
     SYSTEM = "system"
 
 
+# Bit of each type in NotificationPreference.muted_types. Stored data depends
+# on these positions: add new types at the end of the enum.
+NOTIFICATION_TYPE_BITS = {notification_type: 1 << index for index, notification_type in enumerate(NotificationType)}
+
+
 class Notification(Base):
     __tablename__ = "notifications"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     type = Column(SQLEnum(NotificationType), nullable=False, index=True)
     title = Column(String(200), nullable=False)
     message = Column(Text, nullable=False)
     link = Column(String(500), nullable=True)  # URL to navigate to
-    is_read = Column(Boolean, default=False, nullable=False, index=True)
+    is_read = Column(Boolean, default=False, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
     read_at = Column(DateTime, nullable=True)
     
     # Additional metadata stored as JSON-like string
     reference_id = Column(UUID(as_uuid=True), nullable=True)  # ID of related entity
     
+    # Notifications sharing a collapse key (e.g. "chat:<group_id>") collapse
+    # into one unread row; collapsed_count is how many events it stands for
+    collapse_key = Column(String(200), nullable=True)
+    collapsed_count = Column(Integer, default=1, server_default="1", nullable=False)
+    
     # Relationships
     user = relationship("User", backref="notifications")
+    
+    __table_args__ = (
+        # Unread counts and unread-only feeds
+        Index("ix_notifications_user_id_unread", "user_id", postgresql_where=text("is_read = false")),
+        # At most one unread notification per user per collapse key; the
+        # arbiter index for collapsing upserts
+        Index(
+            "uq_notifications_user_id_collapse_key_unread",
+            "user_id",
+            "collapse_key",
+            unique=True,
+            postgresql_where=text("is_read = false AND collapse_key IS NOT NULL")
+        ),
+    )
+
+
+# Feed order: a user's notifications newest first, id as tie-breaker, so
+# keyset pages are a single index range scan
+Index(
+    "ix_notifications_user_id_created_at_id",
+    Notification.user_id,
+    Notification.created_at.desc(),
+    Notification.id.desc()
+)
+
+
+class NotificationCounter(Base):
+    """
+    Per-user, per-type notification totals.
+
+    Maintained by statement-level triggers on `notifications` (see migration
+    008_notification_counters), so every write path - single inserts, bulk
+    inserts, mark-read, deletes - keeps it exact without application code.
+    """
+    __tablename__ = "notification_counters"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    type = Column(SQLEnum(NotificationType), primary_key=True)
+    total = Column(Integer, default=0, nullable=False)
+    unread = Column(Integer, default=0, nullable=False)
+
+
+class FanoutJobStatus(str, enum.Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class NotificationFanoutJob(Base):
+    """
+    Background job materializing one notification per recipient of an
+    audience. `last_user_id` is the keyset cursor over recipients, committed
+    with each chunk, so an interrupted job resumes where it stopped.
+    """
+    __tablename__ = "notification_fanout_jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    created_by = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    status = Column(String(20), default=FanoutJobStatus.PENDING.value, nullable=False, index=True)
+    audience = Column(JSONB, nullable=False, default=dict)  # {"year": ..., "branch": ..., "hostel": ...}
+    type = Column(SQLEnum(NotificationType), nullable=False)
+    title = Column(String(200), nullable=False)
+    message = Column(Text, nullable=False)
+    link = Column(String(500), nullable=True)
+    reference_id = Column(UUID(as_uuid=True), nullable=True)
+    total_recipients = Column(Integer, nullable=True)
+    processed = Column(Integer, default=0, nullable=False)
+    last_user_id = Column(UUID(as_uuid=True), nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    finished_at = Column(DateTime, nullable=True)
+
+
+class BroadcastNotification(Base):
+    """
+    A notification stored once for a whole audience (fan-out on read).
+
+    Audience columns are ANDed; NULL matches everyone. Per-user read and
+    dismissed state lives in `broadcast_notification_receipts`, which only
+    has rows for users who have acted on the broadcast.
+    """
+    __tablename__ = "broadcast_notifications"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    type = Column(SQLEnum(NotificationType), nullable=False)
+    title = Column(String(200), nullable=False)
+    message = Column(Text, nullable=False)
+    link = Column(String(500), nullable=True)
+    reference_id = Column(UUID(as_uuid=True), nullable=True)
+    audience_year = Column(Integer, nullable=True)
+    audience_branch = Column(String(100), nullable=True)
+    audience_hostel = Column(String(100), nullable=True)
+    created_by = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+Index(
+    "ix_broadcast_notifications_created_at_id",
+    BroadcastNotification.created_at.desc(),
+    BroadcastNotification.id.desc()
+)
+
+
+class BroadcastNotificationReceipt(Base):
+    """Sparse per-user state for a broadcast: read and/or dismissed."""
+    __tablename__ = "broadcast_notification_receipts"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    broadcast_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("broadcast_notifications.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    read_at = Column(DateTime, nullable=True)
+    deleted_at = Column(DateTime, nullable=True)
+
+
+class OutboxKind(str, enum.Enum):
+    NOTIFICATION = "notification"
+    EMAIL = "email"
+
+
+class NotificationOutbox(Base):
+    """
+    Pending notification side effects, written in the same transaction as
+    the domain change that caused them and drained by a background
+    dispatcher. `id` orders entries; `available_at` delays retries.
+    """
+    __tablename__ = "notification_outbox"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    kind = Column(String(20), nullable=False)
+    payload = Column(JSONB, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    available_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    processed_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # The dispatcher only ever scans pending entries
+        Index("ix_notification_outbox_pending", "available_at", postgresql_where=text("processed_at IS NULL")),
+    )
+
+
+class NotificationPreference(Base):
+    """
+    A user's muted notification types and chat groups.
+
+    Types are a bitmask (see NOTIFICATION_TYPE_BITS) and groups an array, so
+    a user's preferences are one small row; users who never changed them
+    have no row and receive everything.
+    """
+    __tablename__ = "notification_preferences"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    muted_types = Column(Integer, default=0, server_default="0", nullable=False)
+    muted_group_ids = Column(ARRAY(UUID(as_uuid=True)), default=list, server_default="{}", nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Boolean
+from sqlalchemy import Column, String, DateTime, Boolean, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -7,9 +7,19 @@ import uuid
 
 class OTPRequest(Base):
     __tablename__ = "otp_requests"
+    __table_args__ = (
+        # Matches verify_otp's lookup and the invalidation on reissue
+        Index(
+            'ix_otp_requests_email_otp_code_unverified',
+            'email', 'otp_code', 'expires_at',
+            postgresql_where=text('is_verified = false')
+        ),
+        # Expiry sweeper
+        Index('ix_otp_requests_expires_at', 'expires_at'),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
-    email = Column(String, index=True, nullable=False)
+    email = Column(String, nullable=False)
     otp_code = Column(String, nullable=False)
     expires_at = Column(DateTime(timezone=True), nullable=False)
     is_verified = Column(Boolean, default=False, nullable=False)
@@ -0,0 +1,31 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index, UniqueConstraint, text
+from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime
+from app.core.database import Base
+import uuid
+
+
+class RefreshToken(Base):
+    """
+    A long-lived token that exchanges for a new access token without OTP.
+
+    Only the SHA-256 of the token is stored. Each use rotates it: the row is
+    marked used and a new token issued in the same family (one family per
+    login). Presenting a used token again means it leaked, so the whole
+    family is revoked. Access tokens carry the family as `sid`.
+    """
+    __tablename__ = "refresh_tokens"
+    __table_args__ = (
+        UniqueConstraint('token_hash', name='uq_refresh_tokens_token_hash'),
+        # Revocation list: recently revoked families
+        Index('ix_refresh_tokens_revoked_at', 'revoked_at', postgresql_where=text('revoked_at IS NOT NULL')),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    token_hash = Column(String(64), nullable=False)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    family_id = Column(UUID(as_uuid=True), nullable=False, index=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    used_at = Column(DateTime, nullable=True)
+    revoked_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
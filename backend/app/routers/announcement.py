@@ -2,11 +2,15 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from uuid import UUID
+from datetime import datetime, timezone
 
 from app.core.database import get_db
 from app.utils.dependencies import get_current_user, get_current_admin_user
 from app.models.user import User
 from app.services.announcement_service import AnnouncementService
+from app.services.notification_service import NotificationService
+from app.models.notification import NotificationType
+from app.schemas.notification import BroadcastCreate, NotificationAudience
 from app.schemas.announcement import (
     AnnouncementCreate,
     AnnouncementUpdate,
@@ -40,6 +44,24 @@ def create_announcement(
         current_user.id
     )
     
+    # Notify the targeted students (immediate announcements only)
+    if announcement.scheduled_at is None or announcement.scheduled_at <= datetime.now(timezone.utc):
+        NotificationService.create_broadcast(
+            db,
+            BroadcastCreate(
+                type=NotificationType.ANNOUNCEMENT,
+                title=f"New Announcement: {announcement.title}",
+                message=announcement.content[:200],
+                link=f"/announcements/{announcement.id}",
+                reference_id=announcement.id,
+                audience=NotificationAudience(
+                    year=announcement_data.target_year,
+                    branch=announcement_data.target_branch
+                )
+            ),
+            created_by=current_user.id
+        )
+    
     return AnnouncementResponse(
         id=announcement.id,
         title=announcement.title,
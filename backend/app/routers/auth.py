@@ -2,50 +2,67 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import Dict
 
+from app.core.config import settings
 from app.core.database import get_db
-from app.core.security import get_current_user
+from app.core.security import get_current_user_async
 from app.services.auth_service import AuthService
-from app.schemas.auth import OTPRequest, OTPVerify, UserRegister, Token, UserResponse
+from app.services.refresh_token_service import RefreshTokenService
+from app.schemas.auth import OTPRequest, OTPVerify, UserRegister, Token, UserResponse, RefreshTokenRequest
+from app.middleware.rate_limit import RateLimit, client_ip, body_email
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
+# Checked before any database or SMTP work. Per-email limits stop OTP
+# flooding and brute-forcing one address; per-IP limits stop one client
+# cycling through addresses.
+otp_request_limit = RateLimit("otp_request", [
+    ("ip", settings.RATE_LIMIT_OTP_REQUEST_PER_IP, client_ip),
+    ("email", settings.RATE_LIMIT_OTP_REQUEST_PER_EMAIL, body_email),
+])
+otp_verify_limit = RateLimit("otp_verify", [
+    ("ip", settings.RATE_LIMIT_OTP_VERIFY_PER_IP, client_ip),
+    ("email", settings.RATE_LIMIT_OTP_VERIFY_PER_EMAIL, body_email),
+])
 
-@router.post("/request-otp", response_model=Dict)
-async def request_otp(request: OTPRequest, db: Session = Depends(get_db)):
+
+@router.post("/request-otp", response_model=Dict, dependencies=[Depends(otp_request_limit)])
+def request_otp(request: OTPRequest, db: Session = Depends(get_db)):
     """
     Request OTP for email verification
     
     - Sends a 6-digit OTP to the provided email
     - OTP expires in 10 minutes
+    - Rate limited per email and per IP (429 with Retry-After)
     - Returns whether user exists or needs to register
     """
-    return await AuthService.request_otp(request.email, db)
+    return AuthService.request_otp(request.email, db)
 
 
-@router.post("/verify-otp", response_model=Dict)
-async def verify_otp(request: OTPVerify, db: Session = Depends(get_db)):
+@router.post("/verify-otp", response_model=Dict, dependencies=[Depends(otp_verify_limit)])
+def verify_otp(request: OTPVerify, db: Session = Depends(get_db)):
     """
     Verify OTP code
     
     - If user exists: Returns JWT token
     - If new user: Returns verification token and requires registration
+    - Rate limited per email and per IP (429 with Retry-After)
     """
-    return await AuthService.verify_otp(request.email, request.otp_code, db)
+    return AuthService.verify_otp(request.email, request.otp_code, db)
 
 
 @router.post("/register", response_model=Token, status_code=status.HTTP_201_CREATED)
-async def register(user_data: UserRegister, db: Session = Depends(get_db)):
+def register(user_data: UserRegister, db: Session = Depends(get_db)):
     """
     Register a new user
     
     - Creates user account with provided information
     - Returns JWT token for immediate login
     """
-    return await AuthService.register_user(user_data, db)
+    return AuthService.register_user(user_data, db)
 
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user_info(current_user = Depends(get_current_user), db: Session = Depends(get_db)):
+async def get_current_user_info(current_user = Depends(get_current_user_async)):
     """
     Get current authenticated user information
     
@@ -56,18 +73,22 @@ async def get_current_user_info(current_user = Depends(get_current_user), db: Se
 
 
 @router.post("/refresh", response_model=Token)
-async def refresh_token(current_user = Depends(get_current_user), db: Session = Depends(get_db)):
+def refresh_token(request: RefreshTokenRequest, db: Session = Depends(get_db)):
     """
-    Refresh access token
+    Exchange a refresh token for a new access token
     
-    - Requires valid JWT token
-    - Returns new JWT token
+    - Works after the access token has expired; no OTP or email involved
+    - Rotates the refresh token: use the returned one next time
+    - Reusing an already exchanged refresh token logs out that session
     """
-    from app.core.security import create_access_token
-    
-    access_token = create_access_token(data={"sub": str(current_user.id), "email": current_user.email})
+    return RefreshTokenService.rotate(db, request.refresh_token)
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout(request: RefreshTokenRequest, db: Session = Depends(get_db)):
+    """
+    Log out a session
     
-    return Token(
-        access_token=access_token,
-        user=UserResponse.from_orm(current_user)
-    )
+    - Revokes the refresh token and the access tokens issued with it
+    """
+    RefreshTokenService.revoke(db, request.refresh_token)
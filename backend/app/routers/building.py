@@ -1,10 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Query, WebSocket, WebSocketDisconnect
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from typing import List
 from uuid import UUID
 
 from app.core.database import get_db
-from app.core.security import get_current_user
+from app.core.security import decode_access_token, get_current_user, is_session_revoked
 from app.models.user import User
 from app.schemas.building import (
     BuildingCreate,
@@ -13,6 +14,8 @@ from app.schemas.building import (
     BuildingWithDistance
 )
 from app.services import building_service
+from app.services.geofence_service import geofence_group
+from app.services.websocket_manager import manager
 
 router = APIRouter(prefix="/api/buildings", tags=["buildings"])
 
@@ -20,11 +23,15 @@ router = APIRouter(prefix="/api/buildings", tags=["buildings"])
 @router.post("/", response_model=BuildingResponse, status_code=status.HTTP_201_CREATED)
 def create_building(
     building: BuildingCreate,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Create a new building (admin only in production)."""
-    return building_service.create_building(db, building)
+    db_building = building_service.create_building(db, building)
+    # Existing locations may now be closest to this building
+    background_tasks.add_task(building_service.run_building_backfill)
+    return db_building
 
 
 @router.get("/", response_model=List[BuildingResponse])
@@ -56,6 +63,7 @@ def get_building(
 def update_building(
     building_id: UUID,
     building_update: BuildingUpdate,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -66,12 +74,16 @@ def update_building(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Building not found"
         )
+    
+    if building_update.latitude is not None or building_update.longitude is not None:
+        background_tasks.add_task(building_service.run_building_backfill)
     return building
 
 
 @router.delete("/{building_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_building(
     building_id: UUID,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -82,6 +94,9 @@ def delete_building(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Building not found"
         )
+    
+    # Locations that pointed here were set to NULL; reassign them
+    background_tasks.add_task(building_service.run_building_backfill)
 
 
 @router.get("/nearest/{latitude}/{longitude}", response_model=BuildingWithDistance)
@@ -122,3 +137,45 @@ def get_buildings_in_radius(
         )
         for building, distance in results
     ]
+
+
+@router.websocket("/{building_id}/geofence/ws")
+async def geofence_events(
+    websocket: WebSocket,
+    building_id: UUID,
+    token: str = Query(..., description="JWT authentication token")
+):
+    """
+    WebSocket stream of enter/exit events for a building's geofence
+    
+    **Authentication**: Pass JWT token as query parameter
+    
+    Events are only sent for users whose location visibility allows you to
+    see them (public, or friends-only if they have added you).
+    
+    **Message Format (Server -> Client)**:
+    ```json
+    {
+        "type": "geofence_enter",
+        "user_id": "uuid",
+        "building_id": "uuid",
+        "building_name": "Library",
+        "timestamp": "2025-11-18T12:00:00"
+    }
+    ```
+    """
+    payload = decode_access_token(token)
+    user_id = payload.get("sub") if payload else None
+    if not user_id or await run_in_threadpool(is_session_revoked, payload):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    
+    await manager.connect(websocket, geofence_group(building_id), user_id, announce=False)
+    try:
+        # Server-push only; keep reading so disconnects are noticed
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        manager.disconnect(websocket)
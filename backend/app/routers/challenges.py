@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
 from app.core.security import get_current_user
 from app.models.user import User
 from app.services.challenge_service import ChallengeService
@@ -84,7 +84,7 @@ def get_my_challenges(
 @router.get("/leaderboard", response_model=List[LeaderboardEntry])
 def get_leaderboard(
     limit: int = Query(10, ge=1, le=50, description="Number of top users to return"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
 ):
     """Get leaderboard of top users by points"""
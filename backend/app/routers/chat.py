@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Query, WebSocket, WebSocketDisconnect
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from sqlalchemy.orm import Session
 from typing import List, Optional
@@ -8,10 +9,11 @@ import json
 import logging
 
 from app.core.database import get_db
-from app.core.security import decode_access_token, get_current_user
+from app.core.security import decode_access_token, get_current_user, is_session_revoked
 from app.models.user import User
 from app.services.chat_service import ChatService
 from app.services.websocket_manager import manager
+from app.services.notification_service import NotificationService
 from app.schemas.chat import (
     ChatGroupCreate,
     ChatGroupUpdate,
@@ -183,6 +185,7 @@ def leave_group(
 def send_message(
     group_id: UUID,
     message_data: ChatMessageCreate,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -200,6 +203,15 @@ def send_message(
             detail="You are not a member of this group"
         )
     
+    # Members watching the chat live see the message there
+    background_tasks.add_task(
+        NotificationService.notify_group_message_in_background,
+        group_id,
+        current_user.id,
+        current_user.full_name,
+        [UUID(member_id) for member_id in manager.get_connected_users(str(group_id))]
+    )
+    
     return ChatMessageResponse(
         id=message.id,
         group_id=message.group_id,
@@ -280,9 +292,9 @@ async def websocket_endpoint(
     }
     ```
     """
-    # Verify JWT token
+    # Verify JWT token and that its session has not been logged out
     payload = decode_access_token(token)
-    if not payload:
+    if not payload or await run_in_threadpool(is_session_revoked, payload):
         await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
         return
     
@@ -355,6 +367,13 @@ async def websocket_endpoint(
                             "created_at": new_message.created_at.isoformat()
                         }
                     )
+                    await run_in_threadpool(
+                        NotificationService.notify_group_message_in_background,
+                        group_id,
+                        UUID(user_id),
+                        user.full_name,
+                        [UUID(member_id) for member_id in manager.get_connected_users(str(group_id))]
+                    )
                 
                 elif message_type == "typing":
                     # Broadcast typing indicator
@@ -0,0 +1,59 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from typing import List
+from uuid import UUID
+
+from app.core.database import get_db
+from app.core.security import get_current_user
+from app.models.user import User
+from app.schemas.friendship import FriendResponse
+from app.services.friendship_service import FriendshipService
+
+router = APIRouter(prefix="/api/friends", tags=["friends"])
+
+
+@router.get("/", response_model=List[FriendResponse])
+def get_friends(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get the users you have added as friends.
+    
+    Friends can see locations you share with FRIENDS visibility.
+    """
+    return FriendshipService.get_friends(db, current_user.id)
+
+
+@router.post("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
+def add_friend(
+    user_id: UUID,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Add a user as a friend."""
+    if user_id == current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="You cannot add yourself as a friend"
+        )
+    
+    if not FriendshipService.add_friend(db, current_user.id, user_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+
+
+@router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
+def remove_friend(
+    user_id: UUID,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Remove a user from your friends."""
+    if not FriendshipService.remove_friend(db, current_user.id, user_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Friend not found"
+        )
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from uuid import UUID
@@ -7,6 +7,7 @@ from app.core.database import get_db
 from app.core.security import get_current_user
 from app.models.user import User
 from app.services.issue_service import IssueService
+from app.services.notification_outbox_service import NotificationOutboxService
 from app.schemas.issue import (
     IssueCreate,
     IssueUpdate,
@@ -111,6 +112,7 @@ def get_issue(
 def update_issue(
     issue_id: UUID,
     update_data: IssueUpdate,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -135,6 +137,9 @@ def update_issue(
             detail="Issue not found or you don't have permission to update it"
         )
     
+    # Deliver the queued notification now rather than on the next poll
+    background_tasks.add_task(NotificationOutboxService.dispatch_in_background)
+    
     # Fetch full response with reporter info
     issue_response = IssueService.get_issue_by_id(db, issue_id)
     return issue_response
@@ -144,6 +149,7 @@ def update_issue(
 def update_issue_status(
     issue_id: UUID,
     status_update: IssueStatusUpdate,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -164,6 +170,9 @@ def update_issue_status(
             detail="Issue not found"
         )
     
+    # Deliver the queued notification now rather than on the next poll
+    background_tasks.add_task(NotificationOutboxService.dispatch_in_background)
+    
     # Fetch full response
     issue_response = IssueService.get_issue_by_id(db, issue_id)
     return issue_response
@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import select
-from typing import List
+from typing import List, Optional
+from datetime import datetime, timedelta, timezone
 
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
 from app.core.security import get_current_user
 from app.models.user import User
 from app.models.location import Location
@@ -13,15 +14,21 @@ from app.schemas.location import (
     LocationResponse,
     NearbyUserResponse,
     LocationShareRequest,
-    LocationWithUser
+    LocationWithUser,
+    LocationHistoryPoint,
+    BuildingDwellTime
 )
 from app.services.location_service import LocationService
+from app.services.location_history_service import LocationHistoryService
 
 router = APIRouter(prefix="/locations", tags=["locations"])
 
+# Handlers are plain `def` on purpose: LocationService does blocking SQLAlchemy
+# I/O, so FastAPI must run them in its threadpool rather than on the event loop.
+
 
 @router.post("/", response_model=LocationResponse, status_code=status.HTTP_201_CREATED)
-async def share_location(
+def share_location(
     location_data: LocationCreate,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -33,7 +40,7 @@ async def share_location(
     - Updates existing location if already shared
     - Automatically sets location as active
     """
-    location = await LocationService.create_or_update_location(
+    location = LocationService.create_or_update_location(
         db=db,
         user_id=current_user.id,
         location_data=location_data
@@ -42,7 +49,7 @@ async def share_location(
 
 
 @router.get("/me", response_model=LocationResponse)
-async def get_my_location(
+def get_my_location(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -51,7 +58,7 @@ async def get_my_location(
     
     Returns 404 if no location has been shared yet.
     """
-    location = await LocationService.get_my_location(db=db, user_id=current_user.id)
+    location = LocationService.get_my_location(db=db, user_id=current_user.id)
     
     if not location:
         raise HTTPException(
@@ -63,7 +70,7 @@ async def get_my_location(
 
 
 @router.put("/{location_id}", response_model=LocationResponse)
-async def update_location(
+def update_location(
     location_id: str,
     location_data: LocationUpdate,
     current_user: User = Depends(get_current_user),
@@ -75,7 +82,7 @@ async def update_location(
     - Can update coordinates, address, visibility, or active status
     - Only the owner can update their location
     """
-    location = await LocationService.update_location(
+    location = LocationService.update_location(
         db=db,
         location_id=location_id,
         user_id=current_user.id,
@@ -92,7 +99,7 @@ async def update_location(
 
 
 @router.get("/nearby", response_model=List[NearbyUserResponse])
-async def get_nearby_users(
+def get_nearby_users(
     max_distance: float = Query(default=5.0, ge=0.1, le=50.0, description="Maximum distance in kilometers"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -101,11 +108,11 @@ async def get_nearby_users(
     Get list of nearby users within specified distance.
     
     - Requires you to have shared your location first
-    - Only shows users who have set visibility to PUBLIC or FRIENDS
+    - Shows users with PUBLIC visibility, and FRIENDS visibility if they have added you as a friend
     - Results are sorted by distance (nearest first)
     - Default maximum distance is 5 km
     """
-    nearby_users = await LocationService.get_nearby_users(
+    nearby_users = LocationService.get_nearby_users(
         db=db,
         user_id=current_user.id,
         max_distance_km=max_distance
@@ -114,8 +121,71 @@ async def get_nearby_users(
     return nearby_users
 
 
+def _history_range(start: Optional[datetime], end: Optional[datetime]):
+    """Default to the last 24 hours, treat naive times as UTC and reject inverted ranges."""
+    end = end or datetime.now(timezone.utc)
+    if end.tzinfo is None:
+        end = end.replace(tzinfo=timezone.utc)
+    start = start or end - timedelta(hours=24)
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    if start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must be before end"
+        )
+    return start, end
+
+
+@router.get("/history", response_model=List[LocationHistoryPoint])
+def get_location_history(
+    start: Optional[datetime] = Query(None, description="Range start (default: 24 hours before end)"),
+    end: Optional[datetime] = Query(None, description="Range end (default: now)"),
+    limit: int = Query(1000, ge=1, le=5000, description="Maximum number of points"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Get your location history, oldest first.
+    
+    - Recent points are raw samples
+    - Older points are downsampled into fixed buckets (see `resolution`)
+    - History is kept for a limited window (30 days by default)
+    """
+    start, end = _history_range(start, end)
+    return LocationHistoryService.get_history(
+        db=db,
+        user_id=current_user.id,
+        start=start,
+        end=end,
+        limit=limit
+    )
+
+
+@router.get("/history/dwell", response_model=List[BuildingDwellTime])
+def get_building_dwell_times(
+    start: Optional[datetime] = Query(None, description="Range start (default: 24 hours before end)"),
+    end: Optional[datetime] = Query(None, description="Range end (default: now)"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Get estimated time you spent in each building.
+    
+    - Sorted by time spent (longest first)
+    - Resolution is the history bucket size (5 minutes by default)
+    """
+    start, end = _history_range(start, end)
+    return LocationHistoryService.get_building_dwell_times(
+        db=db,
+        user_id=current_user.id,
+        start=start,
+        end=end
+    )
+
+
 @router.delete("/me", status_code=status.HTTP_204_NO_CONTENT)
-async def stop_sharing_location(
+def stop_sharing_location(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -125,7 +195,7 @@ async def stop_sharing_location(
     - Sets location as inactive instead of deleting
     - Your location history is preserved
     """
-    success = await LocationService.delete_location(db=db, user_id=current_user.id)
+    success = LocationService.delete_location(db=db, user_id=current_user.id)
     
     if not success:
         raise HTTPException(
@@ -137,7 +207,7 @@ async def stop_sharing_location(
 
 
 @router.post("/toggle", response_model=LocationResponse)
-async def toggle_location_sharing(
+def toggle_location_sharing(
     request: LocationShareRequest,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -148,7 +218,7 @@ async def toggle_location_sharing(
     - Quickly turn location sharing on/off
     - Preserves location data
     """
-    location = await LocationService.toggle_location_sharing(
+    location = LocationService.toggle_location_sharing(
         db=db,
         user_id=current_user.id,
         is_active=request.is_active
@@ -164,7 +234,7 @@ async def toggle_location_sharing(
 
 
 @router.get("/all", response_model=List[LocationWithUser])
-async def get_all_active_locations(
+def get_all_active_locations(
     radius: float = Query(10000, description="Maximum distance in meters"),
     limit: int = Query(100, description="Maximum number of results"),
     db: Session = Depends(get_db)
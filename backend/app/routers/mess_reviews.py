@@ -3,7 +3,7 @@ from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import date
 
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
 from app.core.security import get_current_user
 from app.models.user import User
 from app.services.mess_review_service import MessReviewService
@@ -91,7 +91,7 @@ def get_daily_averages(
     start_date: Optional[date] = Query(None, description="Start date (default: 7 days ago)"),
     end_date: Optional[date] = Query(None, description="End date (default: today)"),
     meal_type: Optional[str] = Query(None, description="Filter by meal type"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
 ):
     """Get daily average ratings"""
@@ -161,7 +161,7 @@ def delete_review(
 @router.get("/analytics/overview", response_model=dict)
 def get_analytics_overview(
     days: int = Query(7, ge=1, le=90, description="Number of days to analyze"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
 ):
     """Get analytics overview for mess reviews"""
@@ -234,7 +234,7 @@ def get_analytics_overview(
 def get_popular_dishes(
     days: int = Query(30, ge=1, le=90),
     limit: int = Query(10, ge=1, le=50),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
 ):
     """Get most mentioned dishes in reviews"""
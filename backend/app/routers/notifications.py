@@ -1,17 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Query, Response, WebSocket, WebSocketDisconnect
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
-from app.core.database import get_db
-from app.core.security import get_current_user
+from app.core.database import get_db, get_read_db, SessionLocal
+from app.core.security import decode_access_token, get_current_user, is_session_revoked
+from app.utils.dependencies import get_current_admin_user
+from app.utils.pagination import encode_cursor, decode_cursor
 from app.models.user import User
 from app.models.notification import NotificationType
 from app.schemas.notification import (
     NotificationResponse,
     NotificationUpdate,
-    NotificationStats
+    NotificationStats,
+    FanoutJobCreate,
+    FanoutJobResponse,
+    BroadcastCreate,
+    BroadcastResponse,
+    NotificationPreferences,
+    NotificationSelection
 )
 from app.services.notification_service import NotificationService
+from app.services.notification_fanout_service import NotificationFanoutService
+from app.services.notification_preference_service import NotificationPreferenceService
+from app.services.notification_push import notification_manager, Subscriber
 from uuid import UUID
 
 router = APIRouter(prefix="/api/notifications", tags=["notifications"])
@@ -19,35 +31,133 @@ router = APIRouter(prefix="/api/notifications", tags=["notifications"])
 
 @router.get("/", response_model=List[NotificationResponse])
 def get_notifications(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
     unread_only: bool = Query(False),
     notification_type: Optional[NotificationType] = Query(None),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
-    """Get user notifications with optional filters."""
+    """
+    Get user notifications (personal and broadcast) with optional filters.
+    
+    When a page is full, the `X-Next-Cursor` response header holds a cursor
+    for the next page. Passing it as `cursor` costs the same on every page,
+    unlike `skip`, which gets slower the deeper it goes.
+    """
+    before = None
+    if cursor is not None:
+        before = decode_cursor(cursor)
+        if before is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+    
     notifications = NotificationService.get_user_notifications(
         db=db,
         user_id=current_user.id,
         skip=skip,
         limit=limit,
         unread_only=unread_only,
-        notification_type=notification_type
+        notification_type=notification_type,
+        before=before
     )
+    
+    if len(notifications) == limit:
+        last = notifications[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(last.created_at, last.id)
+    
     return notifications
 
 
 @router.get("/stats", response_model=NotificationStats)
 def get_notification_stats(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get notification statistics."""
     stats = NotificationService.get_notification_stats(db=db, user_id=current_user.id)
     return stats
 
 
+@router.get("/preferences", response_model=NotificationPreferences)
+def get_notification_preferences(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get the notification types and chat groups the user has muted."""
+    return NotificationPreferenceService.get_preferences(db, current_user.id)
+
+
+@router.put("/preferences", response_model=NotificationPreferences)
+def update_notification_preferences(
+    preferences: NotificationPreferences,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Replace the user's muted notification types and chat groups.
+    
+    Muted notifications are not created at all, including ones already
+    queued; broadcasts of a muted type are hidden.
+    """
+    return NotificationPreferenceService.update_preferences(db, current_user.id, preferences)
+
+
+@router.post("/broadcast", response_model=BroadcastResponse, status_code=status.HTTP_201_CREATED)
+def create_broadcast(
+    broadcast_data: BroadcastCreate,
+    current_user: User = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Send a notification to an audience as a single shared row (admin only).
+    
+    - **audience**: any of `year`, `branch`, `hostel`; omit all for everyone
+    """
+    return NotificationService.create_broadcast(db, broadcast_data, created_by=current_user.id)
+
+
+@router.post("/fanout", response_model=FanoutJobResponse, status_code=status.HTTP_202_ACCEPTED)
+def create_fanout_job(
+    job_data: FanoutJobCreate,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Send a notification to an audience (admin only).
+    
+    - **audience**: any of `year`, `branch`, `hostel`; omit all for everyone
+    
+    Returns immediately with a job; poll `GET /fanout/{job_id}` for progress.
+    """
+    job = NotificationFanoutService.create_job(db, job_data, created_by=current_user.id)
+    background_tasks.add_task(NotificationFanoutService.run_job_in_background, job.id)
+    return job
+
+
+@router.get("/fanout/{job_id}", response_model=FanoutJobResponse)
+def get_fanout_job(
+    job_id: UUID,
+    current_user: User = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Get the progress of a fan-out job (admin only)."""
+    job = NotificationFanoutService.get_job(db, job_id)
+    
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Fan-out job not found"
+        )
+    
+    return job
+
+
 @router.put("/{notification_id}/read", response_model=NotificationResponse)
 def mark_notification_as_read(
     notification_id: UUID,
@@ -80,6 +190,51 @@ def mark_all_as_read(
     return {"marked_as_read": count}
 
 
+def _selection_args(selection: NotificationSelection) -> dict:
+    """Service keyword arguments for a bulk selection, decoding its cursor."""
+    before = None
+    if selection.before is not None:
+        before = decode_cursor(selection.before)
+        if before is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+    return {
+        "ids": selection.ids,
+        "before": before,
+        "notification_type": selection.type,
+        "reference_id": selection.reference_id
+    }
+
+
+@router.post("/bulk/read", response_model=dict)
+def bulk_mark_as_read(
+    selection: NotificationSelection,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Mark the selected notifications as read in one statement.
+    
+    Select by any combination of `ids`, `before` (a cursor), `type` and
+    `reference_id`, e.g. every notification about one chat.
+    """
+    count = NotificationService.bulk_mark_as_read(db, current_user.id, **_selection_args(selection))
+    return {"marked_as_read": count}
+
+
+@router.post("/bulk/delete", response_model=dict)
+def bulk_delete(
+    selection: NotificationSelection,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Delete the selected notifications (dismiss selected broadcasts) in one statement."""
+    count = NotificationService.bulk_delete(db, current_user.id, **_selection_args(selection))
+    return {"deleted": count}
+
+
 @router.delete("/{notification_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_notification(
     notification_id: UUID,
@@ -98,3 +253,73 @@ def delete_notification(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Notification not found"
         )
+
+
+def _load_subscriber(user_id: str) -> Optional[Subscriber]:
+    """Look up the user's audience attributes."""
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.id == UUID(user_id), User.is_active == True).first()
+        if not user:
+            return None
+        return Subscriber(user_id=str(user.id), year=user.year, branch=user.branch, hostel=user.hostel)
+    finally:
+        db.close()
+
+
+def _load_unread(user_id: str) -> int:
+    """The user's current unread count."""
+    db = SessionLocal()
+    try:
+        return NotificationService.get_notification_stats(db=db, user_id=UUID(user_id))["unread"]
+    finally:
+        db.close()
+
+
+@router.websocket("/ws")
+async def notification_stream(
+    websocket: WebSocket,
+    token: str = Query(..., description="JWT authentication token")
+):
+    """
+    WebSocket stream of the current user's notification events
+    
+    **Authentication**: Pass JWT token as query parameter
+    
+    The first message carries the current unread count; every later event
+    carries `unread_delta`, so clients can keep the badge and list up to date
+    without polling `/api/notifications/` or `/stats`.
+    
+    **Message Format (Server -> Client)**:
+    ```json
+    {"type": "snapshot", "unread": 3, "unread_delta": 0}
+    {"type": "notification_created", "unread_delta": 1, "notification": {...}}
+    {"type": "notification_read", "unread_delta": -1, "notification": {...}}
+    {"type": "notification_deleted", "unread_delta": -1, "id": "uuid"}
+    {"type": "notifications_read_all", "unread_delta": -3}
+    ```
+    """
+    payload = decode_access_token(token)
+    user_id = payload.get("sub") if payload else None
+    if not user_id or await run_in_threadpool(is_session_revoked, payload):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    
+    subscriber = await run_in_threadpool(_load_subscriber, user_id)
+    if not subscriber:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    
+    # Register before counting, so events committed after the count are
+    # held and sent after the snapshot instead of being missed
+    await notification_manager.connect(websocket, subscriber)
+    try:
+        unread = await run_in_threadpool(_load_unread, subscriber.user_id)
+        await notification_manager.start(websocket, {"type": "snapshot", "unread": unread, "unread_delta": 0})
+        # Server-push only; keep reading so disconnects are noticed
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        notification_manager.disconnect(websocket)
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from uuid import UUID
@@ -7,6 +7,7 @@ from app.core.database import get_db
 from app.core.security import get_current_user
 from app.models.user import User
 from app.services.team_service import TeamService
+from app.services.notification_outbox_service import NotificationOutboxService
 from app.schemas.team import (
     TeamCreate,
     TeamUpdate,
@@ -214,6 +215,7 @@ def get_join_requests(
 @router.post("/requests/{request_id}/approve", status_code=status.HTTP_200_OK)
 def approve_join_request(
     request_id: UUID,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -233,12 +235,16 @@ def approve_join_request(
             detail="Request not found or you don't have permission"
         )
     
+    # Deliver the queued notification now rather than on the next poll
+    background_tasks.add_task(NotificationOutboxService.dispatch_in_background)
+    
     return {"message": "Join request approved"}
 
 
 @router.post("/requests/{request_id}/reject", status_code=status.HTTP_200_OK)
 def reject_join_request(
     request_id: UUID,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -258,4 +264,7 @@ def reject_join_request(
             detail="Request not found or you don't have permission"
         )
     
+    # Deliver the queued notification now rather than on the next poll
+    background_tasks.add_task(NotificationOutboxService.dispatch_in_background)
+    
     return {"message": "Join request rejected"}
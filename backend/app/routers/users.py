@@ -1,21 +1,23 @@
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 from uuid import UUID
 
-from app.core.database import get_db
-from app.core.security import get_current_user
+from app.core.database import get_async_db
+from app.core.security import get_current_user_async
 from app.models.user import User
 from app.schemas.user import UserResponse, UserUpdate
 from app.services.file_upload_service import FileUploadService
 
+# Runs on the async database layer (AsyncSession over asyncpg), so these
+# handlers never block the event loop on a query
 router = APIRouter(prefix="/api/users", tags=["Users"])
 
 
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_profile(
-    current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get current user's profile"""
     return current_user
@@ -24,8 +26,8 @@ async def get_current_user_profile(
 @router.put("/me", response_model=UserResponse)
 async def update_profile(
     update_data: UserUpdate,
-    current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update current user's profile"""
     user = current_user
@@ -44,16 +46,16 @@ async def update_profile(
     if update_data.bio is not None:
         user.bio = update_data.bio
     
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
     return user
 
 
 @router.post("/me/profile-picture", response_model=UserResponse)
 async def upload_profile_picture(
     file: UploadFile = File(..., description="Profile picture (JPG, PNG, GIF, WebP, max 5MB)"),
-    current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Upload or update profile picture"""
     user = current_user
@@ -66,15 +68,15 @@ async def upload_profile_picture(
     file_path = await FileUploadService.save_profile_picture(file, str(user.id))
     user.profile_picture = file_path
     
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
     return user
 
 
 @router.delete("/me/profile-picture", response_model=UserResponse)
 async def delete_profile_picture(
-    current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete profile picture"""
     user = current_user
@@ -82,8 +84,8 @@ async def delete_profile_picture(
     if user.profile_picture:
         FileUploadService.delete_file(user.profile_picture)
         user.profile_picture = None
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        await db.refresh(user)
     
     return user
 
@@ -91,10 +93,10 @@ async def delete_profile_picture(
 @router.get("/{user_id}", response_model=UserResponse)
 async def get_user_profile(
     user_id: UUID,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get any user's public profile"""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     return user
@@ -1,10 +1,25 @@
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import BaseModel, Field, field_validator
+from typing import List, Optional
 from datetime import datetime
 from uuid import UUID
 from app.models.building import BuildingType
 
 
+def validate_polygon(polygon: Optional[List[List[float]]]) -> Optional[List[List[float]]]:
+    """Check a geofence polygon has at least 3 valid [lat, lon] vertices."""
+    if polygon is None:
+        return None
+    if len(polygon) < 3:
+        raise ValueError('Geofence must have at least 3 vertices')
+    for vertex in polygon:
+        if len(vertex) != 2:
+            raise ValueError('Geofence vertices must be [latitude, longitude] pairs')
+        latitude, longitude = vertex
+        if not -90 <= latitude <= 90 or not -180 <= longitude <= 180:
+            raise ValueError('Geofence vertex out of range')
+    return polygon
+
+
 class BuildingBase(BaseModel):
     name: str = Field(..., max_length=100)
     code: Optional[str] = Field(None, max_length=20)
@@ -14,6 +29,15 @@ class BuildingBase(BaseModel):
     description: Optional[str] = Field(None, max_length=500)
     floor_count: Optional[str] = Field(None, max_length=10)
     capacity: Optional[str] = Field(None, max_length=50)
+    geofence: Optional[List[List[float]]] = Field(
+        None,
+        description="Geofence polygon as a list of [latitude, longitude] vertices"
+    )
+
+    @field_validator('geofence')
+    @classmethod
+    def validate_geofence(cls, v):
+        return validate_polygon(v)
 
 
 class BuildingCreate(BuildingBase):
@@ -29,6 +53,12 @@ class BuildingUpdate(BaseModel):
     description: Optional[str] = Field(None, max_length=500)
     floor_count: Optional[str] = Field(None, max_length=10)
     capacity: Optional[str] = Field(None, max_length=50)
+    geofence: Optional[List[List[float]]] = None
+
+    @field_validator('geofence')
+    @classmethod
+    def validate_geofence(cls, v):
+        return validate_polygon(v)
 
 
 class BuildingResponse(BuildingBase):
@@ -0,0 +1,27 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+from uuid import UUID
+
+
+class FriendResponse(BaseModel):
+    """Schema for a user in a friend list"""
+    user_id: UUID
+    full_name: str
+    year: Optional[int] = None
+    branch: Optional[str] = None
+    profile_picture: Optional[str] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+        json_schema_extra = {
+            "example": {
+                "user_id": "123e4567-e89b-12d3-a456-426614174001",
+                "full_name": "John Doe",
+                "year": 2,
+                "branch": "CSE",
+                "profile_picture": None,
+                "created_at": "2024-01-01T00:00:00Z"
+            }
+        }
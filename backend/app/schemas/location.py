@@ -145,6 +145,44 @@ class NearbyUserResponse(BaseModel):
         }
 
 
+class LocationHistoryPoint(BaseModel):
+    """Schema for a location history sample or rollup bucket"""
+    recorded_at: datetime
+    latitude: float
+    longitude: float
+    building_id: Optional[UUID] = None
+    sample_count: int = Field(..., description="Number of raw samples behind this point")
+    resolution: str = Field(..., description="'raw' for individual samples, otherwise the bucket size, e.g. '5m'")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "recorded_at": "2024-01-01T12:05:00Z",
+                "latitude": 30.7333,
+                "longitude": 76.7794,
+                "building_id": "123e4567-e89b-12d3-a456-426614174002",
+                "sample_count": 4,
+                "resolution": "5m"
+            }
+        }
+
+
+class BuildingDwellTime(BaseModel):
+    """Schema for estimated time spent at a building"""
+    building_id: UUID
+    building_name: str
+    minutes: int
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "building_id": "123e4567-e89b-12d3-a456-426614174002",
+                "building_name": "Academic Block 1",
+                "minutes": 95
+            }
+        }
+
+
 class LocationShareRequest(BaseModel):
     """Schema for enabling/disabling location sharing"""
     is_active: bool = Field(..., description="Enable or disable location sharing")
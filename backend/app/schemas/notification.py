@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Optional
 from datetime import datetime
 from uuid import UUID
 from app.models.notification import NotificationType
@@ -27,6 +27,8 @@ class NotificationResponse(NotificationBase):
     is_read: bool
     created_at: datetime
     read_at: Optional[datetime] = None
+    collapsed_count: int = 1
+    is_broadcast: bool = False
 
     class Config:
         from_attributes = True
@@ -36,3 +38,93 @@ class NotificationStats(BaseModel):
     total: int
     unread: int
     by_type: dict[str, int]
+
+
+class NotificationSelection(BaseModel):
+    """
+    Notifications for a bulk action. Set fields are ANDed; at least one is
+    required. `before` is an X-Next-Cursor value and selects everything older.
+    """
+    ids: Optional[List[UUID]] = Field(None, min_length=1, max_length=500)
+    before: Optional[str] = None
+    type: Optional[NotificationType] = None
+    reference_id: Optional[UUID] = None
+
+    @model_validator(mode="after")
+    def require_criteria(self):
+        if self.ids is None and self.before is None and self.type is None and self.reference_id is None:
+            raise ValueError("Select notifications by ids, before, type or reference_id")
+        return self
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "type": "message",
+                "before": "MjAyNi0xMC0xOVQxMjowMDowMHwzZmE4NWY2NC01NzE3LTQ1NjItYjNmYy0yYzk2M2Y2NmFmYTY"
+            }
+        }
+
+
+class NotificationAudience(BaseModel):
+    """Recipients of a fan-out. Unset fields match everyone; set fields are ANDed."""
+    year: Optional[int] = Field(None, ge=1, le=4)
+    branch: Optional[str] = Field(None, max_length=100)
+    hostel: Optional[str] = Field(None, max_length=100)
+
+
+class FanoutJobCreate(NotificationBase):
+    audience: NotificationAudience = Field(default_factory=NotificationAudience)
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "type": "announcement",
+                "title": "Mess timings changed",
+                "message": "Dinner is served from 7:30 PM this week",
+                "link": "/announcements",
+                "audience": {"year": 2, "hostel": "Hostel A"}
+            }
+        }
+
+
+class FanoutJobResponse(BaseModel):
+    id: UUID
+    status: str
+    audience: NotificationAudience
+    total_recipients: Optional[int] = None
+    processed: int
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class BroadcastCreate(NotificationBase):
+    audience: NotificationAudience = Field(default_factory=NotificationAudience)
+
+
+class BroadcastResponse(NotificationBase):
+    id: UUID
+    audience_year: Optional[int] = None
+    audience_branch: Optional[str] = None
+    audience_hostel: Optional[str] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class NotificationPreferences(BaseModel):
+    """Muted notification types and chat groups. Muted notifications are never created."""
+    muted_types: List[NotificationType] = Field(default_factory=list)
+    muted_group_ids: List[UUID] = Field(default_factory=list)
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "muted_types": ["challenge", "mess_review"],
+                "muted_group_ids": ["3fa85f64-5717-4562-b3fc-2c963f66afa6"]
+            }
+        }
@@ -1,5 +1,6 @@
 from datetime import datetime, timedelta
 from typing import Optional
+from sqlalchemy import select, delete
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException, status
@@ -9,17 +10,24 @@ import logging
 
 from app.models.user import User
 from app.models.otp import OTPRequest
-from app.core.security import create_access_token, generate_otp
-from app.schemas.auth import UserRegister, UserResponse, Token
+from app.core.security import generate_otp
+from app.schemas.auth import UserRegister, Token
 from app.services.email_service import EmailService
+from app.services.refresh_token_service import RefreshTokenService
 from app.core.config import settings
+from app.core.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
+otps_swept = metrics.counter(
+    "otp_requests_swept_total",
+    "Expired OTP requests deleted by the sweeper"
+)
+
 
 class AuthService:
     @staticmethod
-    async def request_otp(email: str, db: Session) -> dict:
+    def request_otp(email: str, db: Session) -> dict:
         """Request OTP for email verification"""
         # Check if user exists
         user = db.query(User).filter(User.email == email).first()
@@ -28,6 +36,16 @@ class AuthService:
         otp_code = generate_otp()
         expires_at = datetime.utcnow() + timedelta(minutes=10)
         
+        # Only the newest code is valid: drop earlier unused ones. Nothing is
+        # committed until the email is queued, so a rejected send keeps the
+        # user's earlier code usable.
+        db.execute(
+            delete(OTPRequest).where(
+                OTPRequest.email == email,
+                OTPRequest.is_verified == False
+            )
+        )
+        
         # Store OTP request
         otp_request = OTPRequest(
             email=email,
@@ -35,17 +53,26 @@ class AuthService:
             expires_at=expires_at
         )
         db.add(otp_request)
-        db.commit()
+        db.flush()
         
-        # Try to send OTP via email
-        email_sent = False
-        try:
-            email_sent = EmailService.send_otp_email(email, otp_code)
-        except Exception as e:
-            logger.warning(f"Failed to send OTP email to {email}: {str(e)}")
+        # Queue the OTP email; the send queue delivers it in the background
+        # (with retries), so the response does not wait on SMTP
+        email_sent = EmailService.queue_otp_email(email, otp_code)
         
+        # The OTP is only ever echoed back in development (SMTP bypass).
+        # Elsewhere a full or stopped send queue must not leak the code.
+        bypass = settings.ENVIRONMENT == "development" or settings.DEBUG
         if not email_sent:
-            logger.warning(f"Email not sent to {email}, but OTP stored in DB for SMTP bypass")
+            if not bypass:
+                db.rollback()
+                logger.error(f"Email queue rejected OTP email to {email}")
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Email delivery is temporarily unavailable, please try again shortly",
+                    headers={"Retry-After": "30"}
+                )
+            logger.warning(f"Email not queued for {email}, but OTP stored in DB for SMTP bypass")
+        db.commit()
         
         # Return response based on environment
         response = {
@@ -54,15 +81,15 @@ class AuthService:
             "email_sent": email_sent
         }
         
-        # In development mode or if email failed, include OTP in response (SMTP Bypass)
-        if settings.ENVIRONMENT == "development" or settings.DEBUG or not email_sent:
+        # In development mode, include OTP in response (SMTP Bypass)
+        if bypass:
             response["otp"] = otp_code
             response["bypass_mode"] = True
         
         return response
     
     @staticmethod
-    async def verify_otp(email: str, otp_code: str, db: Session) -> dict:
+    def verify_otp(email: str, otp_code: str, db: Session) -> dict:
         """Verify OTP and return user info or prompt for registration"""
         # Find valid OTP
         otp_request = db.query(OTPRequest).filter(
@@ -86,14 +113,10 @@ class AuthService:
         user = db.query(User).filter(User.email == email).first()
         
         if user:
-            # Existing user - return token
-            access_token = create_access_token(data={"sub": str(user.id), "email": user.email})
+            # Existing user - return access and refresh tokens
             return {
                 "requires_registration": False,
-                "token": Token(
-                    access_token=access_token,
-                    user=UserResponse.from_orm(user)
-                )
+                "token": RefreshTokenService.issue_tokens(db, user)
             }
         else:
             # New user - return verification token for registration
@@ -105,7 +128,7 @@ class AuthService:
             }
     
     @staticmethod
-    async def register_user(user_data: UserRegister, db: Session) -> Token:
+    def register_user(user_data: UserRegister, db: Session) -> Token:
         """Register a new user"""
         # Check if user already exists
         existing_user = db.query(User).filter(User.email == user_data.email).first()
@@ -140,19 +163,39 @@ class AuthService:
                 detail="User registration failed"
             )
         
-        # Send welcome email (async, don't block on failure)
-        try:
-            EmailService.send_welcome_email(new_user.email, new_user.full_name)
-        except Exception as e:
-            logger.warning(f"Failed to send welcome email to {new_user.email}: {str(e)}")
-        
-        # Create access token
-        access_token = create_access_token(data={"sub": str(new_user.id), "email": new_user.email})
+        # Queue welcome email (sent in the background, don't block on failure)
+        if not EmailService.queue_welcome_email(new_user.email, new_user.full_name):
+            logger.warning(f"Failed to queue welcome email to {new_user.email}")
         
-        return Token(
-            access_token=access_token,
-            user=UserResponse.from_orm(new_user)
-        )
+        # Create access and refresh tokens
+        return RefreshTokenService.issue_tokens(db, new_user)
+    
+    @staticmethod
+    def sweep_expired_otps(db: Session) -> int:
+        """
+        Delete expired OTP requests, verified or not, in batches.
+        
+        Each batch is its own transaction; rows locked by a concurrent
+        request are skipped and picked up next run.
+        """
+        batch_size = settings.OTP_SWEEP_BATCH_SIZE
+        total = 0
+        while True:
+            ids = select(OTPRequest.id).where(
+                OTPRequest.expires_at < datetime.utcnow()
+            ).limit(batch_size).with_for_update(skip_locked=True).subquery()
+            deleted = db.execute(
+                delete(OTPRequest).where(OTPRequest.id.in_(select(ids.c.id)))
+            ).rowcount
+            db.commit()
+            total += deleted
+            otps_swept.inc(deleted)
+            if deleted < batch_size:
+                break
+        
+        if total:
+            logger.info(f"Deleted {total} expired OTP requests")
+        return total
     
     @staticmethod
     def get_current_user(user_id: str, db: Session) -> User:
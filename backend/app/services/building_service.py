@@ -1,12 +1,23 @@
-from typing import List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
+from collections import defaultdict
 from sqlalchemy.orm import Session
-from sqlalchemy import select
+from sqlalchemy import select, update, bindparam, func
 from app.models.building import Building
 from app.models.location import Location
 from app.schemas.building import BuildingCreate, BuildingUpdate
+from app.services.geofence_service import invalidate_geofence_index
+from app.core.config import settings
+import logging
 import math
+import threading
+import time
 import uuid
 
+logger = logging.getLogger(__name__)
+
+# Meters per degree of latitude
+METERS_PER_DEGREE = 111320
+
 
 def calculate_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """
@@ -70,6 +81,172 @@ def get_buildings_in_radius(db: Session, latitude: float, longitude: float, radi
     return buildings_in_radius
 
 
+class BuildingIndex:
+    """
+    In-memory grid index over building coordinates.
+
+    Buildings are bucketed into square cells of roughly `cell_meters`, so a
+    nearest-building lookup only measures distances to buildings in the cells
+    around the point instead of to every building.
+    """
+
+    def __init__(self, buildings: List[Tuple[uuid.UUID, float, float]], cell_meters: float = 200):
+        self.cell_meters = cell_meters
+        self.cell_degrees = cell_meters / METERS_PER_DEGREE
+        self.cells: Dict[Tuple[int, int], List[Tuple[uuid.UUID, float, float]]] = defaultdict(list)
+        for building_id, latitude, longitude in buildings:
+            self.cells[self._cell(latitude, longitude)].append((building_id, latitude, longitude))
+
+    @classmethod
+    def from_db(cls, db: Session, cell_meters: float = 200) -> "BuildingIndex":
+        """Build an index from the buildings table."""
+        rows = db.execute(select(Building.id, Building.latitude, Building.longitude)).all()
+        return cls([(row.id, row.latitude, row.longitude) for row in rows], cell_meters)
+
+    def __len__(self) -> int:
+        return sum(len(cell) for cell in self.cells.values())
+
+    def _cell(self, latitude: float, longitude: float) -> Tuple[int, int]:
+        return (math.floor(latitude / self.cell_degrees), math.floor(longitude / self.cell_degrees))
+
+    def nearest(self, latitude: float, longitude: float, max_distance_meters: float) -> Optional[Tuple[uuid.UUID, float]]:
+        """
+        Find the nearest building within max_distance_meters.
+        Returns tuple of (building_id, distance_in_meters) or None.
+        """
+        row, col = self._cell(latitude, longitude)
+        lat_rings = math.ceil(max_distance_meters / self.cell_meters)
+        # A degree of longitude shrinks with latitude, so search wider in that direction
+        lon_scale = max(math.cos(math.radians(latitude)), 1e-6)
+        lon_rings = math.ceil(max_distance_meters / (self.cell_meters * lon_scale))
+
+        best = None
+        best_distance = max_distance_meters
+        for i in range(row - lat_rings, row + lat_rings + 1):
+            for j in range(col - lon_rings, col + lon_rings + 1):
+                for building_id, b_lat, b_lon in self.cells.get((i, j), ()):
+                    distance = calculate_distance(latitude, longitude, b_lat, b_lon)
+                    if distance <= best_distance:
+                        best, best_distance = building_id, distance
+
+        return (best, best_distance) if best else None
+
+
+# Per-process index cache, like the geofence index: local building edits
+# invalidate it immediately; the TTL picks up edits made through other workers.
+_building_index: Optional[BuildingIndex] = None
+_building_index_built_at = 0.0
+_building_index_lock = threading.Lock()
+
+
+def invalidate_building_index():
+    """Drop the cached building index so the next lookup rebuilds it."""
+    global _building_index
+    with _building_index_lock:
+        _building_index = None
+
+
+def get_building_index(db: Session) -> BuildingIndex:
+    """Get the cached building index, rebuilding it if stale."""
+    global _building_index, _building_index_built_at
+    with _building_index_lock:
+        if (
+            _building_index is None
+            or time.monotonic() - _building_index_built_at > settings.BUILDING_INDEX_TTL_SECONDS
+        ):
+            _building_index = BuildingIndex.from_db(db)
+            _building_index_built_at = time.monotonic()
+        return _building_index
+
+
+def nearest_building_id(db: Session, latitude: float, longitude: float, max_distance_meters: float = 200) -> Optional[uuid.UUID]:
+    """ID of the nearest building within range of a point, from the cached index."""
+    match = get_building_index(db).nearest(float(latitude), float(longitude), max_distance_meters)
+    return match[0] if match else None
+
+
+def backfill_location_buildings(
+    db: Session,
+    max_distance_meters: float = 200,
+    chunk_size: int = 1000,
+    dry_run: bool = False,
+    progress: Optional[Callable[[int, int, int], None]] = None
+) -> dict:
+    """
+    Recompute building_id for every active location in one pass.
+
+    Locations are read in primary-key order in chunks of `chunk_size`, matched
+    against an in-memory BuildingIndex, and only changed rows are written
+    back, one executemany UPDATE and commit per chunk. Locations with no
+    building within range are unassigned. `progress` is called after each
+    chunk with (processed, total, changed). With `dry_run` nothing is written.
+    """
+    index = BuildingIndex.from_db(db, cell_meters=max_distance_meters)
+    total = db.query(func.count(Location.id)).filter(Location.is_active == True).scalar() or 0
+
+    locations = Location.__table__
+    # Keep updated_at as is: it means "last position update", not "row touched"
+    reassign = update(locations).where(
+        locations.c.id == bindparam("location_id")
+    ).values(
+        building_id=bindparam("new_building_id"),
+        updated_at=locations.c.updated_at
+    )
+
+    processed = 0
+    changed = 0
+    last_id = None
+    while True:
+        query = select(
+            Location.id, Location.latitude, Location.longitude, Location.building_id
+        ).where(Location.is_active == True).order_by(Location.id).limit(chunk_size)
+        if last_id is not None:
+            query = query.where(Location.id > last_id)
+
+        rows = db.execute(query).all()
+        if not rows:
+            break
+
+        updates = []
+        for row in rows:
+            match = index.nearest(float(row.latitude), float(row.longitude), max_distance_meters)
+            new_building_id = match[0] if match else None
+            if new_building_id != row.building_id:
+                updates.append({"location_id": row.id, "new_building_id": new_building_id})
+
+        if updates and not dry_run:
+            db.execute(reassign, updates)
+            db.commit()
+
+        processed += len(rows)
+        changed += len(updates)
+        last_id = rows[-1].id
+        if progress:
+            progress(processed, total, changed)
+
+    return {
+        "buildings": len(index),
+        "processed": processed,
+        "changed": changed,
+        "dry_run": dry_run
+    }
+
+
+def run_building_backfill(max_distance_meters: float = 200):
+    """Background-task entry point: backfill with a dedicated session."""
+    from app.core.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        summary = backfill_location_buildings(db, max_distance_meters=max_distance_meters)
+        logger.info(f"Building assignment backfill: {summary}")
+    except Exception as e:
+        logger.error(f"Building assignment backfill failed: {str(e)}", exc_info=True)
+        db.rollback()
+    finally:
+        db.close()
+
+
 def create_building(db: Session, building: BuildingCreate) -> Building:
     """Create a new building."""
     db_building = Building(
@@ -79,6 +256,8 @@ def create_building(db: Session, building: BuildingCreate) -> Building:
     db.add(db_building)
     db.commit()
     db.refresh(db_building)
+    invalidate_geofence_index()
+    invalidate_building_index()
     return db_building
 
 
@@ -104,6 +283,8 @@ def update_building(db: Session, building_id: uuid.UUID, building_update: Buildi
     
     db.commit()
     db.refresh(db_building)
+    invalidate_geofence_index()
+    invalidate_building_index()
     return db_building
 
 
@@ -115,6 +296,8 @@ def delete_building(db: Session, building_id: uuid.UUID) -> bool:
     
     db.delete(db_building)
     db.commit()
+    invalidate_geofence_index()
+    invalidate_building_index()
     return True
 
 
@@ -0,0 +1,185 @@
+"""Background email delivery over a reused SMTP connection"""
+
+from email.message import Message
+from typing import List, Optional, Tuple
+import heapq
+import itertools
+import logging
+import smtplib
+import threading
+import time
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+emails_total = metrics.counter(
+    "email_deliveries_total",
+    "Email delivery attempts by outcome",
+    ("result",)
+)
+queue_depth = metrics.gauge(
+    "email_queue_depth",
+    "Emails waiting in the send queue, including scheduled retries"
+)
+
+
+class SMTPConnection:
+    """
+    An authenticated SMTP connection shared by every sender in the process.
+
+    Opened on first use and kept open, so consecutive emails skip the
+    connect, STARTTLS and login round trips. Reopened when the server has
+    dropped it or it sat idle longer than SMTP_IDLE_SECONDS.
+    """
+
+    def __init__(self):
+        self._server: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
+        self._lock = threading.Lock()
+
+    def _open(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT, timeout=settings.SMTP_TIMEOUT_SECONDS)
+        if settings.SMTP_USE_TLS:
+            server.starttls()
+        if settings.SMTP_USER:
+            server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
+        return server
+
+    def _close(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._server = None
+
+    def send(self, message: Message):
+        """Send a message, reconnecting once if the connection went away."""
+        with self._lock:
+            if self._server is not None and time.monotonic() - self._last_used > settings.SMTP_IDLE_SECONDS:
+                self._close()
+
+            for attempt in range(2):
+                if self._server is None:
+                    self._server = self._open()
+                try:
+                    self._server.send_message(message)
+                    self._last_used = time.monotonic()
+                    return
+                except (smtplib.SMTPServerDisconnected, ConnectionError):
+                    self._server = None
+                    if attempt:
+                        raise
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+
+class EmailQueue:
+    """
+    In-process email send queue drained by one worker thread.
+
+    `put` returns immediately, so request handlers never wait on SMTP.
+    Failed sends are retried with exponential backoff up to
+    EMAIL_QUEUE_MAX_ATTEMPTS. The queue is not persistent: emails still
+    pending when the process stops are lost, so use it for messages that
+    can be requested again (OTP codes, welcome emails).
+    """
+
+    def __init__(self, connection: SMTPConnection):
+        self.connection = connection
+        # (due at, sequence, message, description, attempt)
+        self._pending: List[Tuple[float, int, Message, str, int]] = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start the worker thread."""
+        if self.running:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="email-queue", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Send what is due, then stop the worker. Scheduled retries are dropped."""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def put(self, message: Message, description: str) -> bool:
+        """
+        Queue a message for sending.
+
+        Returns:
+            bool: False if the worker is not running or the queue is full
+        """
+        if not self.running:
+            return False
+        with self._condition:
+            if len(self._pending) >= settings.EMAIL_QUEUE_MAX_SIZE:
+                logger.warning(f"Email queue full, dropping {description}")
+                emails_total.inc(result="dropped")
+                return False
+            self._push(time.monotonic(), message, description, 1)
+        return True
+
+    def _push(self, due_at: float, message: Message, description: str, attempt: int):
+        # Caller holds the condition
+        heapq.heappush(self._pending, (due_at, next(self._sequence), message, description, attempt))
+        queue_depth.set(len(self._pending))
+        self._condition.notify()
+
+    def _next(self) -> Optional[Tuple[float, int, Message, str, int]]:
+        """Wait for the next message that is due; None once stopping."""
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                if self._pending and self._pending[0][0] <= now:
+                    item = heapq.heappop(self._pending)
+                    queue_depth.set(len(self._pending))
+                    return item
+                if self._stopping:
+                    return None
+                self._condition.wait(self._pending[0][0] - now if self._pending else None)
+
+    def _run(self):
+        while True:
+            item = self._next()
+            if item is None:
+                break
+            _, _, message, description, attempt = item
+
+            try:
+                self.connection.send(message)
+                emails_total.inc(result="sent")
+                logger.info(f"Sent {description}")
+            except Exception as e:
+                if attempt < settings.EMAIL_QUEUE_MAX_ATTEMPTS:
+                    delay = settings.EMAIL_QUEUE_RETRY_SECONDS * 2 ** (attempt - 1)
+                    logger.warning(f"Failed to send {description} (attempt {attempt}), retrying in {delay}s: {str(e)}")
+                    emails_total.inc(result="retried")
+                    with self._condition:
+                        self._push(time.monotonic() + delay, message, description, attempt + 1)
+                else:
+                    logger.error(f"Giving up on {description} after {attempt} attempts: {str(e)}")
+                    emails_total.inc(result="failed")
+
+        self.connection.close()
+
+
+# Global SMTP connection and send queue
+smtp_connection = SMTPConnection()
+email_queue = EmailQueue(smtp_connection)
@@ -0,0 +1,68 @@
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert
+from typing import List
+from uuid import UUID
+
+from app.models.friendship import Friendship
+from app.models.user import User
+from app.schemas.friendship import FriendResponse
+
+
+class FriendshipService:
+    """Service for managing the friend graph used by location visibility"""
+
+    @staticmethod
+    def add_friend(db: Session, user_id: UUID, friend_id: UUID) -> bool:
+        """
+        Add a friend. Returns False if the target user does not exist.
+        Adding an existing friend is a no-op.
+        """
+        exists = db.query(User.id).filter(User.id == friend_id, User.is_active == True).first()
+        if not exists:
+            return False
+
+        db.execute(
+            insert(Friendship)
+            .values(user_id=user_id, friend_id=friend_id)
+            .on_conflict_do_nothing(index_elements=[Friendship.user_id, Friendship.friend_id])
+        )
+        db.commit()
+        return True
+
+    @staticmethod
+    def remove_friend(db: Session, user_id: UUID, friend_id: UUID) -> bool:
+        """Remove a friend. Returns False if they were not a friend."""
+        deleted = db.query(Friendship).filter(
+            Friendship.user_id == user_id,
+            Friendship.friend_id == friend_id
+        ).delete(synchronize_session=False)
+        db.commit()
+        return deleted > 0
+
+    @staticmethod
+    def get_friends(db: Session, user_id: UUID) -> List[FriendResponse]:
+        """Get the users this user has added as friends."""
+        rows = db.query(
+            User.id,
+            User.full_name,
+            User.year,
+            User.branch,
+            User.profile_picture,
+            Friendship.created_at
+        ).join(
+            Friendship, Friendship.friend_id == User.id
+        ).filter(
+            Friendship.user_id == user_id
+        ).order_by(User.full_name).all()
+
+        return [
+            FriendResponse(
+                user_id=row.id,
+                full_name=row.full_name,
+                year=row.year,
+                branch=row.branch,
+                profile_picture=row.profile_picture,
+                created_at=row.created_at
+            )
+            for row in rows
+        ]
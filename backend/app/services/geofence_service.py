@@ -0,0 +1,241 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+from collections import defaultdict
+from sqlalchemy.orm import Session
+from sqlalchemy import select
+from uuid import UUID
+import math
+import threading
+import time
+import logging
+
+from app.core.config import settings
+from app.models.building import Building
+from app.models.friendship import Friendship
+from app.models.location import VisibilityLevel
+from app.models.notification import Notification, NotificationType
+from app.services.notification_preference_service import NotificationPreferenceService
+from app.services.websocket_manager import manager
+
+logger = logging.getLogger(__name__)
+
+Point = Tuple[float, float]
+
+
+def point_in_polygon(latitude: float, longitude: float, polygon: List[List[float]]) -> bool:
+    """Ray-casting point-in-polygon test on [lat, lon] vertices."""
+    inside = False
+    j = len(polygon) - 1
+    for i in range(len(polygon)):
+        lat_i, lon_i = polygon[i]
+        lat_j, lon_j = polygon[j]
+        if (lat_i > latitude) != (lat_j > latitude):
+            crossing = lon_i + (latitude - lat_i) * (lon_j - lon_i) / (lat_j - lat_i)
+            if longitude < crossing:
+                inside = not inside
+        j = i
+    return inside
+
+
+@dataclass
+class Geofence:
+    building_id: UUID
+    building_name: str
+    polygon: List[List[float]]
+    min_lat: float
+    min_lon: float
+    max_lat: float
+    max_lon: float
+
+    def contains(self, latitude: float, longitude: float) -> bool:
+        # Bounding box first; the polygon test only runs for points inside it
+        if not (self.min_lat <= latitude <= self.max_lat and self.min_lon <= longitude <= self.max_lon):
+            return False
+        return point_in_polygon(latitude, longitude, self.polygon)
+
+
+class GeofenceIndex:
+    """
+    Grid index over geofence bounding boxes.
+
+    Each geofence is registered in every grid cell its bounding box overlaps,
+    so a lookup only tests the few geofences registered in the point's cell.
+    """
+
+    def __init__(self, geofences: List[Geofence], cell_degrees: float = 0.001):
+        self.geofences = geofences
+        self.cell_degrees = cell_degrees
+        self.cells: Dict[Tuple[int, int], List[Geofence]] = defaultdict(list)
+        for fence in geofences:
+            min_row, min_col = self._cell(fence.min_lat, fence.min_lon)
+            max_row, max_col = self._cell(fence.max_lat, fence.max_lon)
+            for row in range(min_row, max_row + 1):
+                for col in range(min_col, max_col + 1):
+                    self.cells[(row, col)].append(fence)
+
+    @classmethod
+    def from_db(cls, db: Session) -> "GeofenceIndex":
+        """Build an index from buildings that have a geofence."""
+        rows = db.execute(
+            select(Building.id, Building.name, Building.geofence).where(Building.geofence.isnot(None))
+        ).all()
+
+        geofences = []
+        for row in rows:
+            polygon = row.geofence
+            if not polygon or len(polygon) < 3:
+                continue
+            latitudes = [vertex[0] for vertex in polygon]
+            longitudes = [vertex[1] for vertex in polygon]
+            geofences.append(Geofence(
+                building_id=row.id,
+                building_name=row.name,
+                polygon=polygon,
+                min_lat=min(latitudes),
+                min_lon=min(longitudes),
+                max_lat=max(latitudes),
+                max_lon=max(longitudes)
+            ))
+        return cls(geofences)
+
+    def _cell(self, latitude: float, longitude: float) -> Tuple[int, int]:
+        return (math.floor(latitude / self.cell_degrees), math.floor(longitude / self.cell_degrees))
+
+    def containing(self, latitude: float, longitude: float) -> Dict[UUID, str]:
+        """Get {building_id: building_name} for every geofence containing the point."""
+        return {
+            fence.building_id: fence.building_name
+            for fence in self.cells.get(self._cell(latitude, longitude), ())
+            if fence.contains(latitude, longitude)
+        }
+
+
+@dataclass
+class GeofenceEvent:
+    user_id: UUID
+    building_id: UUID
+    building_name: str
+    event: str  # "enter" or "exit"
+    occurred_at: datetime
+
+    def to_message(self) -> dict:
+        return {
+            "type": f"geofence_{self.event}",
+            "user_id": str(self.user_id),
+            "building_id": str(self.building_id),
+            "building_name": self.building_name,
+            "timestamp": self.occurred_at.isoformat()
+        }
+
+
+def geofence_group(building_id: UUID) -> str:
+    """WebSocket group name for a building's geofence subscribers."""
+    return f"geofence:{building_id}"
+
+
+# Per-process index cache. Local building edits invalidate it immediately;
+# the TTL picks up edits made through other workers.
+_index: Optional[GeofenceIndex] = None
+_index_built_at = 0.0
+_index_lock = threading.Lock()
+
+
+def invalidate_geofence_index():
+    """Drop the cached index so the next lookup rebuilds it."""
+    global _index
+    with _index_lock:
+        _index = None
+
+
+def get_geofence_index(db: Session) -> GeofenceIndex:
+    """Get the cached geofence index, rebuilding it if stale."""
+    global _index, _index_built_at
+    with _index_lock:
+        if _index is None or time.monotonic() - _index_built_at > settings.GEOFENCE_INDEX_TTL_SECONDS:
+            _index = GeofenceIndex.from_db(db)
+            _index_built_at = time.monotonic()
+        return _index
+
+
+class GeofenceService:
+    """Service for building geofence enter/exit events"""
+
+    @staticmethod
+    def process_move(
+        db: Session,
+        user_id: UUID,
+        previous: Optional[Point],
+        current: Optional[Point]
+    ) -> List[GeofenceEvent]:
+        """
+        Compare geofence membership before and after a move.
+
+        `previous`/`current` are None when location sharing was or is off.
+        Adds an arrival notification for each geofence entered to the
+        session without committing, and returns the events so the caller
+        can publish them after its commit.
+        """
+        index = get_geofence_index(db)
+        if not index.geofences:
+            return []
+
+        before = index.containing(*previous) if previous else {}
+        after = index.containing(*current) if current else {}
+        if before.keys() == after.keys():
+            return []
+
+        now = datetime.utcnow()
+        events = [
+            GeofenceEvent(user_id, building_id, name, "exit", now)
+            for building_id, name in before.items() if building_id not in after
+        ] + [
+            GeofenceEvent(user_id, building_id, name, "enter", now)
+            for building_id, name in after.items() if building_id not in before
+        ]
+
+        # Arrival notifications are skipped for users who muted system notifications
+        notify = not NotificationPreferenceService.is_muted(db, user_id, NotificationType.SYSTEM)
+        for event in events:
+            if notify and event.event == "enter":
+                db.add(Notification(
+                    user_id=user_id,
+                    type=NotificationType.SYSTEM,
+                    title=f"Arrived at {event.building_name}",
+                    message=f"You entered {event.building_name}",
+                    link="/location",
+                    reference_id=event.building_id
+                ))
+
+        return events
+
+    @staticmethod
+    def publish_events(db: Session, events: List[GeofenceEvent], visibility: VisibilityLevel):
+        """
+        Push events to WebSocket subscribers of each building, honouring the
+        mover's location visibility: PUBLIC goes to every subscriber, FRIENDS
+        only to subscribers the mover has added as friends, PRIVATE to none.
+        """
+        if not events or visibility == VisibilityLevel.PRIVATE:
+            return
+
+        subscribed = [
+            event for event in events
+            if manager.get_group_connection_count(geofence_group(event.building_id))
+        ]
+        if not subscribed:
+            return
+
+        allowed: Optional[Set[str]] = None
+        if visibility == VisibilityLevel.FRIENDS:
+            friend_ids = db.execute(
+                select(Friendship.friend_id).where(Friendship.user_id == events[0].user_id)
+            ).scalars().all()
+            allowed = {str(friend_id) for friend_id in friend_ids}
+
+        for event in subscribed:
+            manager.broadcast_to_group_threadsafe(
+                geofence_group(event.building_id),
+                event.to_message(),
+                user_ids=allowed
+            )
@@ -5,7 +5,9 @@ from uuid import UUID
 from datetime import datetime
 
 from app.models.issue import Issue
+from app.models.notification import NotificationType
 from app.models.user import User
+from app.services.notification_service import NotificationService
 from app.schemas.issue import (
     IssueCreate,
     IssueUpdate,
@@ -14,6 +16,21 @@ from app.schemas.issue import (
 )
 
 
+def _queue_status_notification(db: Session, issue: Issue):
+    """Tell the reporter about a status change, in the caller's transaction."""
+    status = getattr(issue.status, "value", issue.status).replace("_", " ")
+    NotificationService.enqueue(
+        db,
+        [issue.reported_by],
+        NotificationType.ISSUE,
+        title=f"Issue {status}",
+        message=f"Issue '{issue.title}' is now {status}",
+        link=f"/issues/{issue.id}",
+        reference_id=issue.id,
+        email=True
+    )
+
+
 class IssueService:
     """Service for managing issues"""
 
@@ -180,10 +197,11 @@ class IssueService:
             issue.location = update_data.location
         
         # Only admin can change status
-        if is_admin and update_data.status is not None:
+        if is_admin and update_data.status is not None and update_data.status != issue.status:
             issue.status = update_data.status
             if update_data.status == "resolved" and issue.resolved_at is None:
                 issue.resolved_at = datetime.utcnow()
+            _queue_status_notification(db, issue)
 
         db.commit()
         db.refresh(issue)
@@ -201,9 +219,13 @@ class IssueService:
         if not issue:
             return None
 
+        if status_update.status == issue.status:
+            return issue
+
         issue.status = status_update.status
         if status_update.status == "resolved" and issue.resolved_at is None:
             issue.resolved_at = datetime.utcnow()
+        _queue_status_notification(db, issue)
 
         db.commit()
         db.refresh(issue)
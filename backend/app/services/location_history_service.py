@@ -0,0 +1,308 @@
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from sqlalchemy import text, func, select, union, literal
+from sqlalchemy.dialects.postgresql import insert
+from typing import List, Optional, Set, Union
+from uuid import UUID
+from datetime import datetime, date, timedelta, timezone
+import logging
+
+from app.core.config import settings
+from app.models.building import Building
+from app.models.location_history import LocationHistory, LocationHistoryRollup
+from app.schemas.location import LocationHistoryPoint, BuildingDwellTime
+
+logger = logging.getLogger(__name__)
+
+RAW_TABLE = LocationHistory.__tablename__
+ROLLUP_TABLE = LocationHistoryRollup.__tablename__
+
+# Days with a known raw partition in this process, so the update path only
+# issues partition DDL the first time it sees a new day.
+_known_raw_partitions: Set[date] = set()
+
+
+def _partition_name(parent: str, day: date) -> str:
+    return f"{parent}_p{day:%Y%m%d}"
+
+
+def _partition_day(parent: str, partition: str) -> Optional[date]:
+    """Parse the day out of a partition name, or None if it is not one of ours."""
+    prefix = f"{parent}_p"
+    if not partition.startswith(prefix):
+        return None
+    try:
+        return datetime.strptime(partition[len(prefix):], "%Y%m%d").date()
+    except ValueError:
+        return None
+
+
+def _bucket_seconds() -> int:
+    return settings.LOCATION_HISTORY_BUCKET_MINUTES * 60
+
+
+def _bucket(column):
+    """SQL expression truncating a timestamp to the start of its rollup bucket."""
+    seconds = _bucket_seconds()
+    return func.to_timestamp(func.floor(func.extract("epoch", column) / seconds) * seconds)
+
+
+class LocationHistoryService:
+    """
+    Service for the append-only location history store.
+
+    Raw samples land in daily partitions of `location_history`. Once a whole
+    day is older than the raw retention window, it is rolled up into
+    fixed-size buckets in `location_history_rollups` and the raw partition is
+    dropped. Rollup partitions are dropped after the rollup retention window.
+    Every point in time therefore lives in exactly one of the two tables.
+
+    LOCATION_HISTORY_BUCKET_MINUTES must divide a day evenly so buckets never
+    straddle a partition boundary.
+    """
+
+    @staticmethod
+    def ensure_partition(db: Union[Session, Connection], parent: str, day: date):
+        """Create the daily partition of `parent` covering `day` if missing."""
+        start = datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+        end = start + timedelta(days=1)
+        db.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {_partition_name(parent, day)} "
+            f"PARTITION OF {parent} "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        ))
+
+    @staticmethod
+    def list_partitions(db: Session, parent: str) -> List[date]:
+        """List the days covered by existing partitions of `parent`, oldest first."""
+        rows = db.execute(text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE parent.relname = :parent"
+        ), {"parent": parent}).scalars().all()
+
+        days = [_partition_day(parent, name) for name in rows]
+        return sorted(day for day in days if day is not None)
+
+    @staticmethod
+    def record_point(
+        db: Session,
+        user_id: UUID,
+        latitude: float,
+        longitude: float,
+        building_id: Optional[UUID] = None,
+        recorded_at: Optional[datetime] = None
+    ):
+        """
+        Append a sample to the history.
+
+        Does not commit; the caller's transaction covers both the current
+        location write and the history row.
+        """
+        recorded_at = recorded_at or datetime.now(timezone.utc)
+        day = recorded_at.astimezone(timezone.utc).date()
+
+        if day not in _known_raw_partitions:
+            # Created and committed on its own connection, so the day is only
+            # marked known once the partition exists, even if the caller's
+            # transaction later rolls back
+            with db.get_bind().begin() as connection:
+                LocationHistoryService.ensure_partition(connection, RAW_TABLE, day)
+            _known_raw_partitions.add(day)
+
+        db.execute(
+            insert(LocationHistory)
+            .values(
+                user_id=user_id,
+                recorded_at=recorded_at,
+                latitude=float(latitude),
+                longitude=float(longitude),
+                building_id=building_id
+            )
+            .on_conflict_do_nothing(index_elements=[LocationHistory.user_id, LocationHistory.recorded_at])
+        )
+
+    @staticmethod
+    def get_history(
+        db: Session,
+        user_id: UUID,
+        start: datetime,
+        end: datetime,
+        limit: int = 1000
+    ) -> List[LocationHistoryPoint]:
+        """
+        Get a user's history between start and end, oldest first.
+
+        Both tables are filtered on their partition key so only partitions
+        overlapping the range are scanned.
+        """
+        raw = select(
+            LocationHistory.recorded_at.label("recorded_at"),
+            LocationHistory.latitude,
+            LocationHistory.longitude,
+            LocationHistory.building_id,
+            literal(1).label("sample_count"),
+            literal("raw").label("resolution")
+        ).where(
+            LocationHistory.user_id == user_id,
+            LocationHistory.recorded_at >= start,
+            LocationHistory.recorded_at < end
+        )
+
+        rollup = select(
+            LocationHistoryRollup.bucket_start.label("recorded_at"),
+            LocationHistoryRollup.latitude,
+            LocationHistoryRollup.longitude,
+            LocationHistoryRollup.building_id,
+            LocationHistoryRollup.sample_count,
+            literal(f"{settings.LOCATION_HISTORY_BUCKET_MINUTES}m").label("resolution")
+        ).where(
+            LocationHistoryRollup.user_id == user_id,
+            LocationHistoryRollup.bucket_start >= start,
+            LocationHistoryRollup.bucket_start < end
+        )
+
+        combined = raw.union_all(rollup).subquery()
+        rows = db.execute(
+            select(combined).order_by(combined.c.recorded_at).limit(limit)
+        ).all()
+
+        return [
+            LocationHistoryPoint(
+                recorded_at=row.recorded_at,
+                latitude=row.latitude,
+                longitude=row.longitude,
+                building_id=row.building_id,
+                sample_count=row.sample_count,
+                resolution=row.resolution
+            )
+            for row in rows
+        ]
+
+    @staticmethod
+    def get_building_dwell_times(
+        db: Session,
+        user_id: UUID,
+        start: datetime,
+        end: datetime
+    ) -> List[BuildingDwellTime]:
+        """
+        Estimate time spent per building between start and end.
+
+        Each rollup bucket in which the user was seen at a building counts as
+        one bucket of dwell time; raw samples are bucketed the same way.
+        """
+        raw_buckets = select(
+            LocationHistory.building_id.label("building_id"),
+            _bucket(LocationHistory.recorded_at).label("bucket_start")
+        ).where(
+            LocationHistory.user_id == user_id,
+            LocationHistory.recorded_at >= start,
+            LocationHistory.recorded_at < end,
+            LocationHistory.building_id.isnot(None)
+        )
+
+        rollup_buckets = select(
+            LocationHistoryRollup.building_id.label("building_id"),
+            LocationHistoryRollup.bucket_start.label("bucket_start")
+        ).where(
+            LocationHistoryRollup.user_id == user_id,
+            LocationHistoryRollup.bucket_start >= start,
+            LocationHistoryRollup.bucket_start < end,
+            LocationHistoryRollup.building_id.isnot(None)
+        )
+
+        # UNION (not ALL) de-duplicates buckets seen several times
+        buckets = union(raw_buckets, rollup_buckets).subquery()
+        bucket_count = func.count().label("bucket_count")
+
+        rows = db.execute(
+            select(Building.id, Building.name, bucket_count)
+            .join(buckets, buckets.c.building_id == Building.id)
+            .group_by(Building.id, Building.name)
+            .order_by(bucket_count.desc())
+        ).all()
+
+        return [
+            BuildingDwellTime(
+                building_id=row.id,
+                building_name=row.name,
+                minutes=row.bucket_count * settings.LOCATION_HISTORY_BUCKET_MINUTES
+            )
+            for row in rows
+        ]
+
+    @staticmethod
+    def rollup_partition(db: Session, day: date) -> int:
+        """
+        Downsample one raw partition into rollup buckets and drop it.
+        Returns the number of rollup rows written.
+        """
+        partition = _partition_name(RAW_TABLE, day)
+        seconds = _bucket_seconds()
+
+        LocationHistoryService.ensure_partition(db, ROLLUP_TABLE, day)
+        result = db.execute(text(
+            f"INSERT INTO {ROLLUP_TABLE} "
+            f"(user_id, bucket_start, latitude, longitude, building_id, sample_count) "
+            f"SELECT user_id, "
+            f"to_timestamp(floor(extract(epoch FROM recorded_at) / :seconds) * :seconds) AS bucket, "
+            f"avg(latitude), avg(longitude), "
+            f"mode() WITHIN GROUP (ORDER BY building_id), "
+            f"count(*) "
+            f"FROM {partition} "
+            f"GROUP BY user_id, bucket "
+            f"ON CONFLICT (user_id, bucket_start) DO NOTHING"
+        ), {"seconds": seconds})
+        db.execute(text(f"DROP TABLE {partition}"))
+
+        # Rollup and drop commit together, so a crash never loses samples
+        db.commit()
+        _known_raw_partitions.discard(day)
+        return result.rowcount
+
+    @staticmethod
+    def run_maintenance(db: Session, now: Optional[datetime] = None) -> dict:
+        """
+        Partition maintenance for the history store:
+
+        - create raw partitions for today and the next two days
+        - roll up and drop raw partitions older than the raw retention window
+        - drop rollup partitions older than the rollup retention window
+        """
+        now = now or datetime.now(timezone.utc)
+        today = now.date()
+
+        for offset in range(3):
+            LocationHistoryService.ensure_partition(db, RAW_TABLE, today + timedelta(days=offset))
+        db.commit()
+
+        # A raw day is rolled up once its last sample is past the window
+        raw_cutoff = now - timedelta(hours=settings.LOCATION_HISTORY_RAW_RETENTION_HOURS)
+        rolled_up = 0
+        rollup_rows = 0
+        for day in LocationHistoryService.list_partitions(db, RAW_TABLE):
+            day_end = datetime(day.year, day.month, day.day, tzinfo=timezone.utc) + timedelta(days=1)
+            if day_end > raw_cutoff:
+                break
+            rollup_rows += LocationHistoryService.rollup_partition(db, day)
+            rolled_up += 1
+
+        rollup_cutoff = now - timedelta(days=settings.LOCATION_HISTORY_ROLLUP_RETENTION_DAYS)
+        dropped = 0
+        for day in LocationHistoryService.list_partitions(db, ROLLUP_TABLE):
+            day_end = datetime(day.year, day.month, day.day, tzinfo=timezone.utc) + timedelta(days=1)
+            if day_end > rollup_cutoff:
+                break
+            db.execute(text(f"DROP TABLE {_partition_name(ROLLUP_TABLE, day)}"))
+            dropped += 1
+        db.commit()
+
+        summary = {
+            "raw_partitions_rolled_up": rolled_up,
+            "rollup_rows_written": rollup_rows,
+            "rollup_partitions_dropped": dropped
+        }
+        logger.info(f"Location history maintenance: {summary}")
+        return summary
@@ -1,14 +1,17 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import select, and_, func
-from typing import List, Optional
+from sqlalchemy import select, and_, or_, exists, func
+from typing import List, Optional, Tuple
 from uuid import UUID
 from datetime import datetime
 from math import radians, cos, sin, asin, sqrt
 
 from app.models.location import Location, VisibilityLevel
+from app.models.friendship import Friendship
 from app.models.user import User
 from app.schemas.location import LocationCreate, LocationUpdate, NearbyUserResponse
-from app.services.building_service import auto_assign_building_to_location
+from app.services.building_service import nearest_building_id
+from app.services.location_history_service import LocationHistoryService
+from app.services.geofence_service import GeofenceService
 
 
 class LocationService:
@@ -35,7 +38,14 @@ class LocationService:
         return c * r
 
     @staticmethod
-    async def create_or_update_location(
+    def _active_point(location: Optional[Location]) -> Optional[Tuple[float, float]]:
+        """Coordinates of a location while it is shared, else None."""
+        if location is None or not location.is_active:
+            return None
+        return (float(location.latitude), float(location.longitude))
+
+    @staticmethod
+    def create_or_update_location(
         db: Session,
         user_id: UUID,
         location_data: LocationCreate
@@ -44,6 +54,8 @@ class LocationService:
         # Check if user already has a location
         existing_location = db.query(Location).filter(Location.user_id == user_id).first()
 
+        previous_point = LocationService._active_point(existing_location)
+
         if existing_location:
             # Update existing location
             existing_location.latitude = location_data.latitude
@@ -51,8 +63,22 @@ class LocationService:
             existing_location.address = location_data.address
             existing_location.visibility = location_data.visibility
             existing_location.is_active = True
+            existing_location.building_id = nearest_building_id(
+                db, location_data.latitude, location_data.longitude
+            )
             existing_location.updated_at = datetime.utcnow()
+            LocationHistoryService.record_point(
+                db,
+                user_id=user_id,
+                latitude=location_data.latitude,
+                longitude=location_data.longitude,
+                building_id=existing_location.building_id
+            )
+            events = GeofenceService.process_move(
+                db, user_id, previous_point, LocationService._active_point(existing_location)
+            )
             db.commit()
+            GeofenceService.publish_events(db, events, existing_location.visibility)
             db.refresh(existing_location)
             return existing_location
         else:
@@ -63,15 +89,27 @@ class LocationService:
                 longitude=location_data.longitude,
                 address=location_data.address,
                 visibility=location_data.visibility,
-                is_active=True
+                is_active=True,
+                building_id=nearest_building_id(db, location_data.latitude, location_data.longitude)
             )
             db.add(new_location)
+            LocationHistoryService.record_point(
+                db,
+                user_id=user_id,
+                latitude=location_data.latitude,
+                longitude=location_data.longitude,
+                building_id=new_location.building_id
+            )
+            events = GeofenceService.process_move(
+                db, user_id, None, LocationService._active_point(new_location)
+            )
             db.commit()
+            GeofenceService.publish_events(db, events, new_location.visibility)
             db.refresh(new_location)
             return new_location
 
     @staticmethod
-    async def update_location(
+    def update_location(
         db: Session,
         location_id: UUID,
         user_id: UUID,
@@ -88,6 +126,8 @@ class LocationService:
         if not location:
             return None
 
+        previous_point = LocationService._active_point(location)
+
         # Update fields if provided
         if location_data.latitude is not None:
             location.latitude = location_data.latitude
@@ -101,17 +141,35 @@ class LocationService:
             location.is_active = location_data.is_active
 
         location.updated_at = datetime.utcnow()
+
+        # Only actual moves of an active location go into the history
+        moved = location_data.latitude is not None or location_data.longitude is not None
+        if moved:
+            location.building_id = nearest_building_id(db, location.latitude, location.longitude)
+        if moved and location.is_active:
+            LocationHistoryService.record_point(
+                db,
+                user_id=user_id,
+                latitude=location.latitude,
+                longitude=location.longitude,
+                building_id=location.building_id
+            )
+
+        events = GeofenceService.process_move(
+            db, user_id, previous_point, LocationService._active_point(location)
+        )
         db.commit()
+        GeofenceService.publish_events(db, events, location.visibility)
         db.refresh(location)
         return location
 
     @staticmethod
-    async def get_my_location(db: Session, user_id: UUID) -> Optional[Location]:
+    def get_my_location(db: Session, user_id: UUID) -> Optional[Location]:
         """Get the current user's location"""
         return db.query(Location).filter(Location.user_id == user_id).first()
 
     @staticmethod
-    async def get_nearby_users(
+    def get_nearby_users(
         db: Session,
         user_id: UUID,
         max_distance_km: float = 5.0
@@ -128,65 +186,90 @@ class LocationService:
         if not my_location:
             return []
 
-        # Get all active locations except the current user's
-        locations_with_users = db.query(Location, User).join(
+        # Owner has added the viewer as a friend
+        is_friend = exists().where(
+            and_(
+                Friendship.user_id == Location.user_id,
+                Friendship.friend_id == user_id
+            )
+        )
+
+        # Get visible active locations except the current user's.
+        # Visibility is enforced here so private and friends-only rows
+        # never leave the database.
+        rows = db.query(
+            User.id,
+            User.full_name,
+            User.year,
+            User.branch,
+            Location.latitude,
+            Location.longitude,
+            Location.address,
+            Location.updated_at
+        ).join(
             User, Location.user_id == User.id
         ).filter(
             and_(
                 Location.user_id != user_id,
                 Location.is_active == True,
-                User.is_active == True
+                User.is_active == True,
+                or_(
+                    Location.visibility == VisibilityLevel.PUBLIC,
+                    and_(Location.visibility == VisibilityLevel.FRIENDS, is_friend)
+                )
             )
         ).all()
 
         nearby_users = []
-        for location, user in locations_with_users:
+        for row in rows:
             # Calculate distance
             distance = LocationService.calculate_distance(
                 my_location.latitude,
                 my_location.longitude,
-                location.latitude,
-                location.longitude
+                row.latitude,
+                row.longitude
             )
 
-            # Filter by distance and visibility
+            # Filter by distance
             if distance <= max_distance_km:
-                # Check visibility (for now, showing all. Can add friend logic later)
-                if location.visibility == VisibilityLevel.PUBLIC or location.visibility == VisibilityLevel.FRIENDS:
-                    nearby_users.append(
-                        NearbyUserResponse(
-                            user_id=user.id,
-                            full_name=user.full_name,
-                            year=user.year,
-                            branch=user.branch,
-                            latitude=location.latitude,
-                            longitude=location.longitude,
-                            address=location.address,
-                            distance_km=round(distance, 2),
-                            updated_at=location.updated_at
-                        )
+                nearby_users.append(
+                    NearbyUserResponse(
+                        user_id=row.id,
+                        full_name=row.full_name,
+                        year=row.year,
+                        branch=row.branch,
+                        latitude=row.latitude,
+                        longitude=row.longitude,
+                        address=row.address,
+                        distance_km=round(distance, 2),
+                        updated_at=row.updated_at
                     )
+                )
 
         # Sort by distance
         nearby_users.sort(key=lambda x: x.distance_km)
         return nearby_users
 
     @staticmethod
-    async def delete_location(db: Session, user_id: UUID) -> bool:
+    def delete_location(db: Session, user_id: UUID) -> bool:
         """Delete user's location (or set inactive)"""
         location = db.query(Location).filter(Location.user_id == user_id).first()
 
         if not location:
             return False
 
+        previous_point = LocationService._active_point(location)
+
         # Set inactive instead of deleting
         location.is_active = False
         location.updated_at = datetime.utcnow()
+        events = GeofenceService.process_move(db, user_id, previous_point, None)
         db.commit()
+        GeofenceService.publish_events(db, events, location.visibility)
         return True
 
     @staticmethod
-    async def toggle_location_sharing(
+    def toggle_location_sharing(
         db: Session,
         user_id: UUID,
         is_active: bool
@@ -197,8 +280,14 @@ class LocationService:
         if not location:
             return None
 
+        previous_point = LocationService._active_point(location)
+
         location.is_active = is_active
         location.updated_at = datetime.utcnow()
+        events = GeofenceService.process_move(
+            db, user_id, previous_point, LocationService._active_point(location)
+        )
         db.commit()
+        GeofenceService.publish_events(db, events, location.visibility)
         db.refresh(location)
         return location
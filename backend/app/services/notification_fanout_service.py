@@ -0,0 +1,222 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import select, update, insert, func, literal, or_, and_
+from typing import List, Optional
+from uuid import UUID
+from datetime import datetime, timedelta
+import logging
+
+from app.core.config import settings
+from app.models.notification import Notification, NotificationFanoutJob, FanoutJobStatus
+from app.models.user import User
+from app.schemas.notification import FanoutJobCreate
+from app.services.notification_push import notification_manager, notification_event
+from app.services.notification_preference_service import not_muted
+
+logger = logging.getLogger(__name__)
+
+
+def audience_filter(audience: dict, notification_type=None) -> List:
+    """
+    SQL conditions on users for an audience spec ({} means everyone). With
+    `notification_type`, users who muted that type are left out.
+    """
+    conditions = [User.is_active == True]
+    if audience.get("year") is not None:
+        conditions.append(User.year == audience["year"])
+    if audience.get("branch"):
+        conditions.append(User.branch == audience["branch"])
+    if audience.get("hostel"):
+        conditions.append(User.hostel == audience["hostel"])
+    if notification_type is not None:
+        conditions.append(not_muted(User.id, notification_type))
+    return conditions
+
+
+class NotificationFanoutService:
+    """
+    Fan-out-on-write for audience notifications.
+
+    Recipients are resolved in SQL and notifications are written with
+    INSERT ... SELECT in keyset-ordered chunks, one commit per chunk, so no
+    ORM objects are built per recipient and the request that created the job
+    returns immediately.
+    """
+
+    @staticmethod
+    def create_job(db: Session, job_data: FanoutJobCreate, created_by: Optional[UUID] = None) -> NotificationFanoutJob:
+        """Record a pending fan-out job. Run it with `run_job`."""
+        job = NotificationFanoutJob(
+            created_by=created_by,
+            audience=job_data.audience.dict(exclude_none=True),
+            type=job_data.type,
+            title=job_data.title,
+            message=job_data.message,
+            link=job_data.link,
+            reference_id=job_data.reference_id
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        return job
+
+    @staticmethod
+    def get_job(db: Session, job_id: UUID) -> Optional[NotificationFanoutJob]:
+        """Get a fan-out job by ID."""
+        return db.query(NotificationFanoutJob).filter(NotificationFanoutJob.id == job_id).first()
+
+    @staticmethod
+    def _claim(db: Session, job_id: UUID) -> bool:
+        """
+        Atomically mark a job running. Fails if another worker is running it,
+        unless that worker has gone quiet for longer than the stale window.
+        """
+        stale_before = datetime.utcnow() - timedelta(seconds=settings.NOTIFICATION_FANOUT_STALE_SECONDS)
+        claimed = db.execute(
+            update(NotificationFanoutJob)
+            .where(
+                NotificationFanoutJob.id == job_id,
+                or_(
+                    NotificationFanoutJob.status == FanoutJobStatus.PENDING.value,
+                    and_(
+                        NotificationFanoutJob.status == FanoutJobStatus.RUNNING.value,
+                        NotificationFanoutJob.updated_at < stale_before
+                    )
+                )
+            )
+            .values(status=FanoutJobStatus.RUNNING.value, updated_at=datetime.utcnow())
+        ).rowcount
+        db.commit()
+        return claimed == 1
+
+    @staticmethod
+    def write_chunk(db: Session, job: NotificationFanoutJob, chunk_size: int) -> list:
+        """
+        Insert notifications for the next chunk of recipients after the job's
+        cursor. Returns (id, user_id) rows for the notifications written
+        (empty when done).
+        """
+        # Muted users are filtered before the chunk limit, so the cursor still
+        # advances past them
+        conditions = audience_filter(job.audience, job.type)
+        if job.last_user_id is not None:
+            conditions.append(User.id > job.last_user_id)
+
+        recipients = select(User.id).where(*conditions).order_by(User.id).limit(chunk_size).cte("recipients")
+
+        # Every row of a job shares the job's timestamp
+        statement = insert(Notification).from_select(
+            [
+                Notification.id,
+                Notification.user_id,
+                Notification.type,
+                Notification.title,
+                Notification.message,
+                Notification.link,
+                Notification.reference_id,
+                Notification.is_read,
+                Notification.created_at,
+            ],
+            select(
+                func.gen_random_uuid(),
+                recipients.c.id,
+                literal(job.type, type_=Notification.type.type),
+                literal(job.title),
+                literal(job.message),
+                literal(job.link, type_=Notification.link.type),
+                literal(job.reference_id, type_=Notification.reference_id.type),
+                literal(False),
+                literal(job.created_at, type_=Notification.created_at.type),
+            ).select_from(recipients)
+        ).returning(Notification.id, Notification.user_id)
+
+        return db.execute(statement).all()
+
+    @staticmethod
+    def _publish(job: NotificationFanoutJob, written: list):
+        """Push the chunk's notifications to recipients with an open stream."""
+        connected = notification_manager.connected_users(row.user_id for row in written)
+        for row in written:
+            if str(row.user_id) not in connected:
+                continue
+            notification_manager.publish_to_user(row.user_id, notification_event("notification_created", 1, {
+                "id": row.id,
+                "user_id": row.user_id,
+                "type": job.type,
+                "title": job.title,
+                "message": job.message,
+                "link": job.link,
+                "reference_id": job.reference_id,
+                "is_read": False,
+                "created_at": job.created_at
+            }))
+
+    @staticmethod
+    def run_job(db: Session, job_id: UUID, chunk_size: Optional[int] = None) -> Optional[NotificationFanoutJob]:
+        """
+        Run (or resume) a fan-out job to completion.
+        Returns the job, or None if another worker owns it.
+        """
+        chunk_size = chunk_size or settings.NOTIFICATION_FANOUT_CHUNK_SIZE
+        if not NotificationFanoutService._claim(db, job_id):
+            return None
+
+        job = NotificationFanoutService.get_job(db, job_id)
+        try:
+            if job.total_recipients is None:
+                job.total_recipients = db.execute(
+                    select(func.count(User.id)).where(*audience_filter(job.audience, job.type))
+                ).scalar()
+                db.commit()
+
+            while True:
+                written = NotificationFanoutService.write_chunk(db, job, chunk_size)
+                if not written:
+                    break
+                # The cursor moves in the same transaction as the chunk
+                job.last_user_id = max(row.user_id for row in written)
+                job.processed += len(written)
+                db.commit()
+                NotificationFanoutService._publish(job, written)
+
+            job.status = FanoutJobStatus.COMPLETED.value
+            job.finished_at = datetime.utcnow()
+            db.commit()
+            logger.info(f"Fan-out job {job.id} completed: {job.processed} notifications")
+        except Exception as e:
+            db.rollback()
+            job.status = FanoutJobStatus.FAILED.value
+            job.error = str(e)
+            job.finished_at = datetime.utcnow()
+            db.commit()
+            logger.error(f"Fan-out job {job_id} failed: {str(e)}", exc_info=True)
+
+        return job
+
+    @staticmethod
+    def run_job_in_background(job_id: UUID):
+        """Background-task entry point: run a job with a dedicated session."""
+        from app.core.database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            NotificationFanoutService.run_job(db, job_id)
+        finally:
+            db.close()
+
+    @staticmethod
+    def resume_stale_jobs(db: Session):
+        """
+        Periodic job: pick up fan-outs that never started or whose worker
+        died (e.g. the API restarted mid-job) and finish them.
+        """
+        stale_before = datetime.utcnow() - timedelta(seconds=settings.NOTIFICATION_FANOUT_STALE_SECONDS)
+        job_ids = db.execute(
+            select(NotificationFanoutJob.id).where(
+                NotificationFanoutJob.status.in_([FanoutJobStatus.PENDING.value, FanoutJobStatus.RUNNING.value]),
+                NotificationFanoutJob.updated_at < stale_before
+            ).order_by(NotificationFanoutJob.created_at)
+        ).scalars().all()
+        db.commit()
+
+        for job_id in job_ids:
+            NotificationFanoutService.run_job(db, job_id)
@@ -0,0 +1,165 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import select, insert
+from typing import List, Optional
+from uuid import UUID, uuid4
+from datetime import datetime, timedelta
+import logging
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.models.notification import Notification, NotificationType, NotificationOutbox, OutboxKind
+from app.models.user import User
+from app.services.email_service import EmailService
+from app.services.notification_service import publish_created
+from app.services.notification_preference_service import NotificationPreferenceService
+
+logger = logging.getLogger(__name__)
+
+dispatched_total = metrics.counter(
+    "notification_outbox_dispatched_total",
+    "Outbox entries processed by the dispatcher",
+    ("kind", "result")
+)
+
+
+class NotificationOutboxService:
+    """
+    Drains the notification outbox.
+
+    Each batch is claimed with FOR UPDATE SKIP LOCKED, so several workers can
+    dispatch at once without handling an entry twice. Notification entries of
+    a batch become one multi-row INSERT committed together with marking the
+    entries processed; pushes happen after that commit. Email entries are
+    retried with exponential backoff until NOTIFICATION_OUTBOX_MAX_ATTEMPTS.
+    """
+
+    @staticmethod
+    def _claim(db: Session, kind: OutboxKind, batch_size: int) -> List[NotificationOutbox]:
+        return db.execute(
+            select(NotificationOutbox)
+            .where(
+                NotificationOutbox.kind == kind.value,
+                NotificationOutbox.processed_at.is_(None),
+                NotificationOutbox.available_at <= datetime.utcnow()
+            )
+            .order_by(NotificationOutbox.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        ).scalars().all()
+
+    @staticmethod
+    def dispatch_notifications(db: Session, batch_size: int) -> int:
+        """Write one batch of queued notifications. Returns entries processed."""
+        entries = NotificationOutboxService._claim(db, OutboxKind.NOTIFICATION, batch_size)
+        if not entries:
+            db.commit()
+            return 0
+
+        now = datetime.utcnow()
+        rows = []
+        for entry in entries:
+            payload = entry.payload
+            notification_type = NotificationType(payload["type"])
+            reference_id = UUID(payload["reference_id"]) if payload.get("reference_id") else None
+            # Users who muted the type get neither the row nor the email
+            user_ids = NotificationPreferenceService.filter_recipients(db, payload["user_ids"], notification_type)
+            for user_id in user_ids:
+                rows.append({
+                    "id": uuid4(),
+                    "user_id": UUID(user_id),
+                    "type": notification_type,
+                    "title": payload["title"],
+                    "message": payload["message"],
+                    "link": payload.get("link"),
+                    "reference_id": reference_id,
+                    "is_read": False,
+                    "created_at": entry.created_at
+                })
+                if payload.get("email") and settings.NOTIFICATION_EMAILS_ENABLED:
+                    db.add(NotificationOutbox(
+                        kind=OutboxKind.EMAIL.value,
+                        payload={
+                            "user_id": user_id,
+                            "title": payload["title"],
+                            "message": payload["message"],
+                            "link": payload.get("link")
+                        }
+                    ))
+            entry.processed_at = now
+
+        if rows:
+            db.execute(insert(Notification), rows)
+        db.commit()
+
+        publish_created(rows)
+        dispatched_total.inc(len(entries), kind=OutboxKind.NOTIFICATION.value, result="sent")
+        return len(entries)
+
+    @staticmethod
+    def dispatch_emails(db: Session, batch_size: int) -> int:
+        """Send one batch of queued emails. Returns entries attempted."""
+        entries = NotificationOutboxService._claim(db, OutboxKind.EMAIL, batch_size)
+        if not entries:
+            db.commit()
+            return 0
+
+        user_ids = {UUID(entry.payload["user_id"]) for entry in entries}
+        emails = dict(db.execute(select(User.id, User.email).where(User.id.in_(user_ids))).all())
+
+        now = datetime.utcnow()
+        for entry in entries:
+            payload = entry.payload
+            email = emails.get(UUID(payload["user_id"]))
+            entry.attempts += 1
+
+            if email and EmailService.send_notification_email(
+                email, payload["title"], payload["message"], payload.get("link")
+            ):
+                entry.processed_at = now
+                dispatched_total.inc(kind=OutboxKind.EMAIL.value, result="sent")
+            elif not email or entry.attempts >= settings.NOTIFICATION_OUTBOX_MAX_ATTEMPTS:
+                # Give up; the entry stays for inspection until retention
+                entry.processed_at = now
+                entry.last_error = "unknown user" if not email else "send failed"
+                dispatched_total.inc(kind=OutboxKind.EMAIL.value, result="dropped")
+            else:
+                entry.last_error = "send failed"
+                entry.available_at = now + timedelta(seconds=settings.NOTIFICATION_OUTBOX_RETRY_SECONDS * 2 ** (entry.attempts - 1))
+                dispatched_total.inc(kind=OutboxKind.EMAIL.value, result="retried")
+
+        db.commit()
+        return len(entries)
+
+    @staticmethod
+    def dispatch(db: Session, batch_size: Optional[int] = None) -> int:
+        """
+        Drain pending notification entries, then one batch of emails.
+        Returns the number of entries processed.
+        """
+        batch_size = batch_size or settings.NOTIFICATION_OUTBOX_BATCH_SIZE
+        total = 0
+        while True:
+            processed = NotificationOutboxService.dispatch_notifications(db, batch_size)
+            total += processed
+            if processed < batch_size:
+                break
+
+        # Emails hold their claim across SMTP round trips; keep batches small
+        total += NotificationOutboxService.dispatch_emails(db, min(batch_size, 50))
+        return total
+
+    @staticmethod
+    def dispatch_in_background():
+        """
+        Background-task entry point, scheduled by handlers that queued
+        notifications so they appear without waiting for the next poll.
+        """
+        from app.core.database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            NotificationOutboxService.dispatch_notifications(db, settings.NOTIFICATION_OUTBOX_BATCH_SIZE)
+        except Exception as e:
+            logger.error(f"Outbox dispatch failed: {str(e)}", exc_info=True)
+        finally:
+            db.close()
@@ -0,0 +1,159 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import select, case, exists, or_, literal, any_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from typing import FrozenSet, Iterable, List, NamedTuple, Optional
+from uuid import UUID
+from datetime import datetime
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.notification import NotificationType, NotificationPreference, NOTIFICATION_TYPE_BITS
+from app.schemas.notification import NotificationPreferences
+
+
+class Mutes(NamedTuple):
+    """A user's preferences as cached: type bitmask and muted group IDs."""
+    types: int = 0
+    groups: FrozenSet[UUID] = frozenset()
+
+    def mutes(self, notification_type: NotificationType, group_id: Optional[UUID] = None) -> bool:
+        if self.types & NOTIFICATION_TYPE_BITS[notification_type]:
+            return True
+        return group_id is not None and group_id in self.groups
+
+
+NO_MUTES = Mutes()
+
+# Per-process cache. Local updates invalidate it immediately; the TTL picks
+# up updates made through other workers.
+_cache = TTLCache(settings.NOTIFICATION_PREFERENCES_CACHE_TTL_SECONDS, max_size=50000)
+
+
+def _type_bit(notification_type):
+    """The mute bit of a type, or a CASE over a type column."""
+    if isinstance(notification_type, NotificationType):
+        return literal(NOTIFICATION_TYPE_BITS[notification_type])
+    # Bind the WHEN keys with the column's enum type so they are sent as
+    # the stored enum label, not the Python value
+    return case(
+        {literal(member, type_=notification_type.type): bit for member, bit in NOTIFICATION_TYPE_BITS.items()},
+        value=notification_type,
+        else_=0
+    )
+
+
+def not_muted(user_id, notification_type, group_id: Optional[UUID] = None):
+    """
+    SQL condition: `user_id` has not muted `notification_type` (a type or a
+    type column) nor `group_id`. Used inside INSERT ... SELECT statements
+    so muted recipients are never written.
+    """
+    Preference = NotificationPreference
+    muted = Preference.muted_types.op("&")(_type_bit(notification_type)) != 0
+    if group_id is not None:
+        muted = or_(muted, literal(group_id, type_=Preference.user_id.type) == any_(Preference.muted_group_ids))
+    return ~exists().where(Preference.user_id == user_id, muted)
+
+
+class NotificationPreferenceService:
+
+    @staticmethod
+    def _to_mutes(preference: Optional[NotificationPreference]) -> Mutes:
+        if preference is None:
+            return NO_MUTES
+        return Mutes(preference.muted_types, frozenset(preference.muted_group_ids or ()))
+
+    @staticmethod
+    def get_mutes(db: Session, user_id: UUID) -> Mutes:
+        """A user's mutes, from the cache when possible."""
+        return _cache.get_or_load(
+            UUID(str(user_id)),
+            lambda: NotificationPreferenceService._to_mutes(db.get(NotificationPreference, user_id))
+        )
+
+    @staticmethod
+    def is_muted(
+        db: Session,
+        user_id: UUID,
+        notification_type: NotificationType,
+        group_id: Optional[UUID] = None
+    ) -> bool:
+        """Check whether a user has muted a type or chat group."""
+        return NotificationPreferenceService.get_mutes(db, user_id).mutes(notification_type, group_id)
+
+    @staticmethod
+    def filter_recipients(
+        db: Session,
+        user_ids: Iterable,
+        notification_type: NotificationType,
+        group_id: Optional[UUID] = None
+    ) -> List:
+        """
+        Drop users who muted the type or group, keeping input order and types.
+        Cache misses are loaded together with one query.
+        """
+        user_ids = list(user_ids)
+        keys = [UUID(str(user_id)) for user_id in user_ids]
+        mutes = {}
+        missing = []
+        for key in keys:
+            cached = _cache.get(key)
+            if cached is None:
+                missing.append(key)
+            else:
+                mutes[key] = cached
+
+        if missing:
+            loaded = {
+                preference.user_id: preference
+                for preference in db.execute(
+                    select(NotificationPreference).where(NotificationPreference.user_id.in_(missing))
+                ).scalars()
+            }
+            for key in missing:
+                mutes[key] = NotificationPreferenceService._to_mutes(loaded.get(key))
+                _cache.set(key, mutes[key])
+
+        return [
+            user_id for user_id, key in zip(user_ids, keys)
+            if not mutes[key].mutes(notification_type, group_id)
+        ]
+
+    @staticmethod
+    def get_preferences(db: Session, user_id: UUID) -> NotificationPreferences:
+        """Get a user's preferences."""
+        mutes = NotificationPreferenceService.get_mutes(db, user_id)
+        return NotificationPreferences(
+            muted_types=[
+                notification_type for notification_type, bit in NOTIFICATION_TYPE_BITS.items()
+                if mutes.types & bit
+            ],
+            muted_group_ids=sorted(mutes.groups, key=str)
+        )
+
+    @staticmethod
+    def update_preferences(db: Session, user_id: UUID, preferences: NotificationPreferences) -> NotificationPreferences:
+        """Replace a user's preferences."""
+        muted_types = 0
+        for notification_type in preferences.muted_types:
+            muted_types |= NOTIFICATION_TYPE_BITS[notification_type]
+        muted_group_ids = list(dict.fromkeys(preferences.muted_group_ids))
+
+        statement = pg_insert(NotificationPreference).values(
+            user_id=user_id,
+            muted_types=muted_types,
+            muted_group_ids=muted_group_ids,
+            updated_at=datetime.utcnow()
+        )
+        db.execute(statement.on_conflict_do_update(
+            index_elements=[NotificationPreference.user_id],
+            set_={
+                "muted_types": statement.excluded.muted_types,
+                "muted_group_ids": statement.excluded.muted_group_ids,
+                "updated_at": statement.excluded.updated_at
+            }
+        ))
+        db.commit()
+
+        _cache.invalidate(UUID(str(user_id)))
+        return NotificationPreferenceService.get_preferences(db, user_id)
@@ -0,0 +1,161 @@
+from fastapi import WebSocket
+from typing import Callable, Dict, Iterable, List, Optional, Set
+from dataclasses import dataclass
+import asyncio
+import logging
+
+from app.schemas.notification import NotificationResponse
+
+logger = logging.getLogger(__name__)
+
+
+def notification_event(event_type: str, unread_delta: int, notification=None, **extra) -> dict:
+    """
+    A notification stream event. `unread_delta` is how the event changes the
+    recipient's unread count, so clients can keep a badge without polling.
+    `notification` may be an ORM object, a result row or a dict.
+    """
+    message = {"type": event_type, "unread_delta": unread_delta, **extra}
+    if notification is not None:
+        message["notification"] = NotificationResponse.model_validate(
+            notification, from_attributes=True
+        ).model_dump(mode="json")
+    return message
+
+
+@dataclass(frozen=True)
+class Subscriber:
+    """Audience attributes of a connected user, captured at connect time."""
+    user_id: str
+    year: Optional[int] = None
+    branch: Optional[str] = None
+    hostel: Optional[str] = None
+
+    def in_audience(self, year: Optional[int], branch: Optional[str], hostel: Optional[str]) -> bool:
+        return (
+            (year is None or year == self.year)
+            and (branch is None or branch == self.branch)
+            and (hostel is None or hostel == self.hostel)
+        )
+
+
+class NotificationConnectionManager:
+    """
+    Per-user notification streams.
+
+    A user may hold several connections (tabs, devices); every event for the
+    user goes to all of them. Publishing is safe from worker threads, so
+    services can push right after their commit.
+
+    A new connection receives events from the moment it is registered, but
+    they are held back until `start` has sent its first message, so the
+    snapshot a client starts from is never followed by a gap.
+    """
+
+    def __init__(self):
+        # Maps user_id -> set of WebSocket connections
+        self.user_connections: Dict[str, Set[WebSocket]] = {}
+        # Maps WebSocket -> subscriber for audience matching and cleanup
+        self.subscribers: Dict[WebSocket, Subscriber] = {}
+        # Events held for connections that have not been started yet
+        self.pending: Dict[WebSocket, List[dict]] = {}
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def connect(self, websocket: WebSocket, subscriber: Subscriber):
+        """Accept a connection and register it for the user; events are held until `start`."""
+        await websocket.accept()
+        self.loop = asyncio.get_running_loop()
+        self.pending[websocket] = []
+        self.user_connections.setdefault(subscriber.user_id, set()).add(websocket)
+        self.subscribers[websocket] = subscriber
+        logger.info(f"User {subscriber.user_id} connected to notifications")
+
+    async def start(self, websocket: WebSocket, first_message: dict):
+        """Send a connection's first message, then the events held since `connect`."""
+        await websocket.send_json(first_message)
+        held = self.pending.get(websocket, [])
+        while held:
+            await websocket.send_json(held.pop(0))
+        self.pending.pop(websocket, None)
+
+    def disconnect(self, websocket: WebSocket):
+        """Remove a connection."""
+        self.pending.pop(websocket, None)
+        subscriber = self.subscribers.pop(websocket, None)
+        if subscriber is None:
+            return
+
+        connections = self.user_connections.get(subscriber.user_id)
+        if connections is not None:
+            connections.discard(websocket)
+            if not connections:
+                del self.user_connections[subscriber.user_id]
+
+    def is_connected(self, user_id) -> bool:
+        return str(user_id) in self.user_connections
+
+    def connected_users(self, user_ids: Iterable) -> Set[str]:
+        """The subset of `user_ids` with at least one open connection."""
+        return {str(user_id) for user_id in user_ids if str(user_id) in self.user_connections}
+
+    async def _send(self, connections: Iterable[WebSocket], message: dict):
+        dead_connections = set()
+        for connection in list(connections):
+            held = self.pending.get(connection)
+            if held is not None:
+                held.append(message)
+                continue
+            try:
+                await connection.send_json(message)
+            except Exception as e:
+                logger.error(f"Error sending notification event: {str(e)}")
+                dead_connections.add(connection)
+
+        for dead_connection in dead_connections:
+            self.disconnect(dead_connection)
+
+    async def send_to_user(self, user_id: str, message: dict):
+        await self._send(self.user_connections.get(user_id, ()), message)
+
+    async def send_to_audience(
+        self,
+        build_message: Callable[[str], Optional[dict]],
+        year: Optional[int],
+        branch: Optional[str],
+        hostel: Optional[str]
+    ):
+        for user_id, connections in list(self.user_connections.items()):
+            subscriber = next((self.subscribers[c] for c in connections if c in self.subscribers), None)
+            if subscriber and subscriber.in_audience(year, branch, hostel):
+                message = build_message(user_id)
+                if message is not None:
+                    await self._send(connections, message)
+
+    def _schedule(self, coroutine):
+        asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def publish_to_user(self, user_id, message: dict):
+        """Push an event to a user's connections from any thread."""
+        if self.loop is None or not self.is_connected(user_id):
+            return
+        self._schedule(self.send_to_user(str(user_id), message))
+
+    def publish_to_audience(
+        self,
+        build_message: Callable[[str], Optional[dict]],
+        year: Optional[int] = None,
+        branch: Optional[str] = None,
+        hostel: Optional[str] = None
+    ):
+        """
+        Push an event to every connected user in an audience from any thread.
+        `build_message` receives each recipient's user ID and may return
+        None to skip that recipient.
+        """
+        if self.loop is None or not self.user_connections:
+            return
+        self._schedule(self.send_to_audience(build_message, year, branch, hostel))
+
+
+# Global notification stream instance
+notification_manager = NotificationConnectionManager()
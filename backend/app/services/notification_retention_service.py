@@ -0,0 +1,208 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import select, delete, func, tuple_
+from typing import Optional
+from uuid import UUID
+from datetime import datetime, timedelta
+import logging
+import time
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.models.notification import (
+    Notification,
+    NotificationCounter,
+    NotificationOutbox,
+    BroadcastNotification,
+    BroadcastNotificationReceipt,
+)
+
+logger = logging.getLogger(__name__)
+
+deleted_total = metrics.counter(
+    "notification_retention_deleted_total",
+    "Notifications deleted by the retention job",
+    ("reason",)
+)
+runs_total = metrics.counter(
+    "notification_retention_runs_total",
+    "Completed notification retention runs"
+)
+last_run_seconds = metrics.gauge(
+    "notification_retention_last_run_duration_seconds",
+    "Duration of the last notification retention run"
+)
+last_run_timestamp = metrics.gauge(
+    "notification_retention_last_run_timestamp_seconds",
+    "Unix time the last notification retention run finished"
+)
+
+
+class NotificationRetentionService:
+    """
+    Prunes the notification tables.
+
+    Deletes go in small batches, each its own transaction, so no statement
+    holds row locks for long or builds a huge trigger transition table.
+    Rows locked by a concurrent request are skipped and picked up next run.
+    """
+
+    @staticmethod
+    def _delete_batch(db: Session, ids_query) -> int:
+        ids = ids_query.with_for_update(skip_locked=True).subquery()
+        deleted = db.execute(
+            delete(Notification).where(Notification.id.in_(select(ids.c.id)))
+        ).rowcount
+        db.commit()
+        return deleted
+
+    @staticmethod
+    def delete_expired_read(db: Session, cutoff: datetime, batch_size: int) -> int:
+        """Delete read notifications created before `cutoff`."""
+        total = 0
+        while True:
+            deleted = NotificationRetentionService._delete_batch(
+                db,
+                select(Notification.id).where(
+                    Notification.is_read == True,
+                    Notification.created_at < cutoff
+                ).limit(batch_size)
+            )
+            total += deleted
+            deleted_total.inc(deleted, reason="read_expired")
+            if deleted < batch_size:
+                return total
+            time.sleep(settings.NOTIFICATION_RETENTION_BATCH_PAUSE_SECONDS)
+
+    @staticmethod
+    def enforce_user_cap(db: Session, user_id: UUID, cap: int, batch_size: int) -> int:
+        """Delete a user's notifications beyond the newest `cap`."""
+        total = 0
+        while True:
+            deleted = NotificationRetentionService._delete_batch(
+                db,
+                select(Notification.id)
+                .where(Notification.user_id == user_id)
+                .order_by(Notification.created_at.desc(), Notification.id.desc())
+                .offset(cap)
+                .limit(batch_size)
+            )
+            total += deleted
+            deleted_total.inc(deleted, reason="user_cap")
+            if deleted < batch_size:
+                return total
+            time.sleep(settings.NOTIFICATION_RETENTION_BATCH_PAUSE_SECONDS)
+
+    @staticmethod
+    def delete_expired_broadcasts(db: Session, cutoff: datetime, batch_size: int) -> int:
+        """
+        Delete broadcasts created before `cutoff` and their receipts.
+
+        Receipts go first, in batches, so deleting a broadcast does not
+        cascade to one receipt per recipient in a single statement.
+        """
+        Receipt = BroadcastNotificationReceipt
+        while True:
+            keys = select(Receipt.user_id, Receipt.broadcast_id).join(
+                BroadcastNotification, BroadcastNotification.id == Receipt.broadcast_id
+            ).where(
+                BroadcastNotification.created_at < cutoff
+            ).limit(batch_size).with_for_update(of=Receipt, skip_locked=True).subquery()
+            deleted = db.execute(
+                delete(Receipt).where(
+                    tuple_(Receipt.user_id, Receipt.broadcast_id).in_(select(keys.c.user_id, keys.c.broadcast_id))
+                )
+            ).rowcount
+            db.commit()
+            if deleted < batch_size:
+                break
+            time.sleep(settings.NOTIFICATION_RETENTION_BATCH_PAUSE_SECONDS)
+
+        total = 0
+        while True:
+            ids = select(BroadcastNotification.id).where(
+                BroadcastNotification.created_at < cutoff
+            ).limit(batch_size).with_for_update(skip_locked=True).subquery()
+            deleted = db.execute(
+                delete(BroadcastNotification).where(BroadcastNotification.id.in_(select(ids.c.id)))
+            ).rowcount
+            db.commit()
+            total += deleted
+            deleted_total.inc(deleted, reason="broadcast_expired")
+            if deleted < batch_size:
+                return total
+            time.sleep(settings.NOTIFICATION_RETENTION_BATCH_PAUSE_SECONDS)
+
+    @staticmethod
+    def delete_processed_outbox(db: Session, cutoff: datetime, batch_size: int) -> int:
+        """Delete outbox entries processed before `cutoff`."""
+        total = 0
+        while True:
+            ids = select(NotificationOutbox.id).where(
+                NotificationOutbox.processed_at < cutoff
+            ).limit(batch_size).subquery()
+            deleted = db.execute(
+                delete(NotificationOutbox).where(NotificationOutbox.id.in_(select(ids.c.id)))
+            ).rowcount
+            db.commit()
+            total += deleted
+            if deleted < batch_size:
+                return total
+
+    @staticmethod
+    def run_retention(db: Session, now: Optional[datetime] = None) -> dict:
+        """
+        Apply the retention policy:
+
+        - delete read notifications older than NOTIFICATION_READ_RETENTION_DAYS
+        - trim users above NOTIFICATION_MAX_PER_USER, oldest first
+        - delete broadcasts older than NOTIFICATION_BROADCAST_RETENTION_DAYS,
+          with their receipts
+        - delete outbox entries processed more than NOTIFICATION_OUTBOX_RETENTION_DAYS ago
+
+        A setting of 0 disables that rule.
+        """
+        started = time.monotonic()
+        now = now or datetime.utcnow()
+        batch_size = settings.NOTIFICATION_RETENTION_BATCH_SIZE
+
+        expired = 0
+        if settings.NOTIFICATION_READ_RETENTION_DAYS:
+            cutoff = now - timedelta(days=settings.NOTIFICATION_READ_RETENTION_DAYS)
+            expired = NotificationRetentionService.delete_expired_read(db, cutoff, batch_size)
+
+        capped = 0
+        cap = settings.NOTIFICATION_MAX_PER_USER
+        if cap:
+            # The trigger-maintained counters find heavy users without a scan
+            over_cap = db.execute(
+                select(NotificationCounter.user_id)
+                .group_by(NotificationCounter.user_id)
+                .having(func.sum(NotificationCounter.total) > cap)
+            ).scalars().all()
+            db.commit()
+            for user_id in over_cap:
+                capped += NotificationRetentionService.enforce_user_cap(db, user_id, cap, batch_size)
+
+        broadcasts = 0
+        if settings.NOTIFICATION_BROADCAST_RETENTION_DAYS:
+            broadcast_cutoff = now - timedelta(days=settings.NOTIFICATION_BROADCAST_RETENTION_DAYS)
+            broadcasts = NotificationRetentionService.delete_expired_broadcasts(db, broadcast_cutoff, batch_size)
+
+        outbox = 0
+        if settings.NOTIFICATION_OUTBOX_RETENTION_DAYS:
+            outbox_cutoff = now - timedelta(days=settings.NOTIFICATION_OUTBOX_RETENTION_DAYS)
+            outbox = NotificationRetentionService.delete_processed_outbox(db, outbox_cutoff, batch_size)
+
+        duration = time.monotonic() - started
+        runs_total.inc()
+        last_run_seconds.set(duration)
+        last_run_timestamp.set(time.time())
+
+        summary = {
+            "read_expired_deleted": expired,
+            "user_cap_deleted": capped,
+            "broadcast_expired_deleted": broadcasts,
+            "outbox_deleted": outbox
+        }
+        logger.info(f"Notification retention: {summary} in {duration:.1f}s")
+        return summary
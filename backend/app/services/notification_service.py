@@ -1,24 +1,241 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import select, func, and_
-from typing import List, Optional
-from uuid import UUID
-from datetime import datetime
+from sqlalchemy import select, insert, update, delete, func, and_, or_, literal, literal_column, tuple_, text, bindparam
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from typing import List, Optional, Tuple
+from uuid import UUID, uuid4
+from datetime import datetime, timedelta
 
-from app.models.notification import Notification, NotificationType
-from app.schemas.notification import NotificationCreate, NotificationUpdate
+from app.models.notification import (
+    Notification,
+    NotificationType,
+    NotificationCounter,
+    BroadcastNotification,
+    BroadcastNotificationReceipt,
+    NotificationOutbox,
+    OutboxKind,
+)
+from app.core.config import settings
+from app.models.user import User
+from app.models.chat import ChatGroup, ChatMember
+from app.schemas.notification import NotificationCreate, NotificationUpdate, BroadcastCreate
+from app.services.notification_push import notification_manager, notification_event
+from app.services.notification_preference_service import NotificationPreferenceService, not_muted
+
+
+def _publish(user_id, event_type: str, unread_delta: int, notification=None, **extra):
+    """Push an event to the user's notification stream if they are connected."""
+    if notification_manager.is_connected(user_id):
+        notification_manager.publish_to_user(user_id, notification_event(event_type, unread_delta, notification, **extra))
+
+
+def publish_created(rows: List[dict]):
+    """Push `notification_created` for bulk-inserted rows whose recipient is connected."""
+    for row in rows:
+        _publish(row["user_id"], "notification_created", 1, row)
+
+
+# Unread rows that may collapse; must match the partial unique index on
+# notifications (user_id, collapse_key)
+_COLLAPSIBLE = and_(Notification.is_read == False, Notification.collapse_key.isnot(None))
+
+MESSAGE_DIGEST_KEY = "digest:messages"
+
+
+def _chat_collapse_key(group_id: UUID) -> str:
+    return f"chat:{group_id}"
+
+
+def _publish_collapsed(rows):
+    """Push events for rows returned by a collapsing upsert."""
+    for row in rows:
+        if row.inserted:
+            _publish(row.user_id, "notification_created", 1, row)
+        else:
+            _publish(row.user_id, "notification_updated", 0, row)
+
+
+def _visible_broadcasts(user_id: UUID):
+    """
+    Broadcasts addressed to a user and not dismissed or muted by them,
+    joined to their receipt (if any). Columns line up with
+    `_personal_notifications`.
+    
+    Only broadcasts inside NOTIFICATION_BROADCAST_RETENTION_DAYS are
+    visible, so every query over them (stats included) is a bounded range
+    of the created_at index, even before retention has deleted older ones.
+    """
+    Receipt = BroadcastNotificationReceipt
+    conditions = [
+        Receipt.deleted_at.is_(None),
+        not_muted(literal(user_id, type_=Notification.user_id.type), BroadcastNotification.type)
+    ]
+    if settings.NOTIFICATION_BROADCAST_RETENTION_DAYS:
+        conditions.append(
+            BroadcastNotification.created_at
+            >= datetime.utcnow() - timedelta(days=settings.NOTIFICATION_BROADCAST_RETENTION_DAYS)
+        )
+    return select(
+        BroadcastNotification.id.label("id"),
+        literal(user_id, type_=Notification.user_id.type).label("user_id"),
+        BroadcastNotification.type.label("type"),
+        BroadcastNotification.title.label("title"),
+        BroadcastNotification.message.label("message"),
+        BroadcastNotification.link.label("link"),
+        BroadcastNotification.reference_id.label("reference_id"),
+        Receipt.read_at.isnot(None).label("is_read"),
+        BroadcastNotification.created_at.label("created_at"),
+        Receipt.read_at.label("read_at"),
+        literal(1).label("collapsed_count"),
+        literal(True).label("is_broadcast")
+    ).select_from(BroadcastNotification).join(
+        User,
+        and_(
+            User.id == user_id,
+            or_(BroadcastNotification.audience_year.is_(None), BroadcastNotification.audience_year == User.year),
+            or_(BroadcastNotification.audience_branch.is_(None), BroadcastNotification.audience_branch == User.branch),
+            or_(BroadcastNotification.audience_hostel.is_(None), BroadcastNotification.audience_hostel == User.hostel)
+        )
+    ).outerjoin(
+        Receipt,
+        and_(Receipt.user_id == user_id, Receipt.broadcast_id == BroadcastNotification.id)
+    ).where(*conditions)
+
+
+def _selection(model, ids=None, before=None, notification_type=None, reference_id=None) -> list:
+    """
+    Conditions selecting rows of `model` (Notification or
+    BroadcastNotification) for a bulk action; see NotificationSelection.
+    """
+    conditions = []
+    if ids is not None:
+        conditions.append(model.id.in_(ids))
+    if before is not None:
+        conditions.append(tuple_(model.created_at, model.id) < before)
+    if notification_type is not None:
+        conditions.append(model.type == notification_type)
+    if reference_id is not None:
+        conditions.append(model.reference_id == reference_id)
+    return conditions
+
+
+def _personal_notifications(user_id: UUID):
+    """A user's own notification rows, shaped like `_visible_broadcasts`."""
+    return select(
+        Notification.id.label("id"),
+        Notification.user_id.label("user_id"),
+        Notification.type.label("type"),
+        Notification.title.label("title"),
+        Notification.message.label("message"),
+        Notification.link.label("link"),
+        Notification.reference_id.label("reference_id"),
+        Notification.is_read.label("is_read"),
+        Notification.created_at.label("created_at"),
+        Notification.read_at.label("read_at"),
+        Notification.collapsed_count.label("collapsed_count"),
+        literal(False).label("is_broadcast")
+    ).where(Notification.user_id == user_id)
 
 
 class NotificationService:
     
     @staticmethod
-    def create_notification(db: Session, notification_data: NotificationCreate) -> Notification:
-        """Create a new notification."""
+    def create_notification(db: Session, notification_data: NotificationCreate) -> Optional[Notification]:
+        """Create a new notification. Returns None if the user muted its type."""
+        if NotificationPreferenceService.is_muted(db, notification_data.user_id, notification_data.type):
+            return None
+        
         notification = Notification(**notification_data.dict())
         db.add(notification)
         db.commit()
         db.refresh(notification)
+        _publish(notification.user_id, "notification_created", 1, notification)
         return notification
     
+    @staticmethod
+    def create_broadcast(
+        db: Session,
+        broadcast_data: BroadcastCreate,
+        created_by: Optional[UUID] = None
+    ) -> BroadcastNotification:
+        """
+        Create a notification shown to every user in an audience.
+        
+        Stored as a single row regardless of audience size; recipients see it
+        through `get_user_notifications`.
+        """
+        broadcast = BroadcastNotification(
+            type=broadcast_data.type,
+            title=broadcast_data.title,
+            message=broadcast_data.message,
+            link=broadcast_data.link,
+            reference_id=broadcast_data.reference_id,
+            audience_year=broadcast_data.audience.year,
+            audience_branch=broadcast_data.audience.branch,
+            audience_hostel=broadcast_data.audience.hostel,
+            created_by=created_by
+        )
+        db.add(broadcast)
+        db.commit()
+        db.refresh(broadcast)
+        
+        item = {
+            "id": broadcast.id,
+            "type": broadcast.type,
+            "title": broadcast.title,
+            "message": broadcast.message,
+            "link": broadcast.link,
+            "reference_id": broadcast.reference_id,
+            "is_read": False,
+            "created_at": broadcast.created_at,
+            "is_broadcast": True
+        }
+        connected = list(notification_manager.user_connections)
+        muted = set(connected) - set(
+            NotificationPreferenceService.filter_recipients(db, connected, broadcast.type)
+        )
+        notification_manager.publish_to_audience(
+            lambda user_id: None if user_id in muted else notification_event(
+                "notification_created", 1, {**item, "user_id": user_id}
+            ),
+            year=broadcast.audience_year,
+            branch=broadcast.audience_branch,
+            hostel=broadcast.audience_hostel
+        )
+        return broadcast
+    
+    @staticmethod
+    def enqueue(
+        db: Session,
+        user_ids: List[UUID],
+        notification_type: NotificationType,
+        title: str,
+        message: str,
+        link: Optional[str] = None,
+        reference_id: Optional[UUID] = None,
+        email: bool = False
+    ) -> NotificationOutbox:
+        """
+        Queue notifications in the caller's transaction without committing.
+        
+        The outbox dispatcher writes the notification rows, pushes them to
+        connected clients and (with `email`) sends emails once the caller's
+        transaction has committed; a rollback discards them with it.
+        """
+        entry = NotificationOutbox(
+            kind=OutboxKind.NOTIFICATION.value,
+            payload={
+                "user_ids": [str(user_id) for user_id in user_ids],
+                "type": notification_type.value,
+                "title": title,
+                "message": message,
+                "link": link,
+                "reference_id": str(reference_id) if reference_id else None,
+                "email": email
+            }
+        )
+        db.add(entry)
+        return entry
+    
     @staticmethod
     def get_user_notifications(
         db: Session,
@@ -26,86 +243,286 @@ class NotificationService:
         skip: int = 0,
         limit: int = 50,
         unread_only: bool = False,
-        notification_type: Optional[NotificationType] = None
-    ) -> List[Notification]:
-        """Get notifications for a user with filters."""
-        query = db.query(Notification).filter(Notification.user_id == user_id)
+        notification_type: Optional[NotificationType] = None,
+        before: Optional[Tuple[datetime, UUID]] = None
+    ) -> list:
+        """
+        Get a user's personal and broadcast notifications, newest first.
+        
+        Both sources are merged in one query ordered by (created_at, id).
+        Pass the (created_at, id) of the last item seen as `before` to page
+        by keyset instead of offset.
+        """
+        personal = _personal_notifications(user_id)
+        broadcasts = _visible_broadcasts(user_id)
         
         if unread_only:
-            query = query.filter(Notification.is_read == False)
+            personal = personal.where(Notification.is_read == False)
+            broadcasts = broadcasts.where(BroadcastNotificationReceipt.read_at.is_(None))
         
         if notification_type:
-            query = query.filter(Notification.type == notification_type)
+            personal = personal.where(Notification.type == notification_type)
+            broadcasts = broadcasts.where(BroadcastNotification.type == notification_type)
+        
+        if before:
+            personal = personal.where(tuple_(Notification.created_at, Notification.id) < before)
+            broadcasts = broadcasts.where(tuple_(BroadcastNotification.created_at, BroadcastNotification.id) < before)
+        
+        # Each branch is limited first so neither side is fully scanned
+        window = skip + limit
+        personal = personal.order_by(Notification.created_at.desc(), Notification.id.desc()).limit(window)
+        broadcasts = broadcasts.order_by(
+            BroadcastNotification.created_at.desc(), BroadcastNotification.id.desc()
+        ).limit(window)
         
-        return query.order_by(Notification.created_at.desc()).offset(skip).limit(limit).all()
+        merged = personal.union_all(broadcasts).subquery()
+        return db.execute(
+            select(merged)
+            .order_by(merged.c.created_at.desc(), merged.c.id.desc())
+            .offset(skip)
+            .limit(limit)
+        ).all()
     
     @staticmethod
-    def mark_as_read(db: Session, notification_id: UUID, user_id: UUID) -> Optional[Notification]:
-        """Mark a notification as read."""
+    def _get_broadcast_item(db: Session, broadcast_id: UUID, user_id: UUID):
+        """A single visible broadcast as the user sees it, or None."""
+        return db.execute(
+            _visible_broadcasts(user_id).where(BroadcastNotification.id == broadcast_id)
+        ).first()
+    
+    @staticmethod
+    def mark_as_read(db: Session, notification_id: UUID, user_id: UUID):
+        """Mark a personal or broadcast notification as read."""
         notification = db.query(Notification).filter(
             Notification.id == notification_id,
             Notification.user_id == user_id
         ).first()
         
-        if notification and not notification.is_read:
-            notification.is_read = True
-            notification.read_at = datetime.utcnow()
-            db.commit()
-            db.refresh(notification)
+        if notification:
+            if not notification.is_read:
+                notification.is_read = True
+                notification.read_at = datetime.utcnow()
+                db.commit()
+                db.refresh(notification)
+                _publish(user_id, "notification_read", -1, notification)
+            return notification
         
-        return notification
+        broadcast = NotificationService._get_broadcast_item(db, notification_id, user_id)
+        if not broadcast:
+            return None
+        if broadcast.is_read:
+            return broadcast
+        
+        Receipt = BroadcastNotificationReceipt
+        db.execute(
+            pg_insert(Receipt)
+            .values(user_id=user_id, broadcast_id=notification_id, read_at=datetime.utcnow())
+            .on_conflict_do_update(
+                index_elements=[Receipt.user_id, Receipt.broadcast_id],
+                set_={"read_at": func.coalesce(Receipt.read_at, datetime.utcnow())}
+            )
+        )
+        db.commit()
+        broadcast = NotificationService._get_broadcast_item(db, notification_id, user_id)
+        _publish(user_id, "notification_read", -1, broadcast)
+        return broadcast
     
     @staticmethod
     def mark_all_as_read(db: Session, user_id: UUID) -> int:
-        """Mark all notifications as read for a user."""
+        """Mark all personal and broadcast notifications as read for a user."""
+        now = datetime.utcnow()
         result = db.query(Notification).filter(
             Notification.user_id == user_id,
             Notification.is_read == False
         ).update({
             "is_read": True,
-            "read_at": datetime.utcnow()
+            "read_at": now
         })
+        
+        # One receipt per unread broadcast, written in a single statement
+        Receipt = BroadcastNotificationReceipt
+        unread = _visible_broadcasts(user_id).where(Receipt.read_at.is_(None)).subquery()
+        statement = pg_insert(Receipt).from_select(
+            ["user_id", "broadcast_id", "read_at"],
+            select(unread.c.user_id, unread.c.id, literal(now, type_=Receipt.read_at.type))
+        )
+        broadcasts_read = db.execute(
+            statement.on_conflict_do_update(
+                index_elements=[Receipt.user_id, Receipt.broadcast_id],
+                set_={"read_at": statement.excluded.read_at}
+            )
+        ).rowcount
+        
+        db.commit()
+        
+        count = result + broadcasts_read
+        if count:
+            _publish(user_id, "notifications_read_all", -count)
+        return count
+    
+    @staticmethod
+    def bulk_mark_as_read(
+        db: Session,
+        user_id: UUID,
+        ids: Optional[List[UUID]] = None,
+        before: Optional[Tuple[datetime, UUID]] = None,
+        notification_type: Optional[NotificationType] = None,
+        reference_id: Optional[UUID] = None
+    ) -> int:
+        """
+        Mark the selected personal and broadcast notifications as read with
+        one UPDATE and one receipt upsert. Returns the number newly read.
+        """
+        now = datetime.utcnow()
+        read_ids = db.execute(
+            update(Notification)
+            .where(
+                Notification.user_id == user_id,
+                Notification.is_read == False,
+                *_selection(Notification, ids, before, notification_type, reference_id)
+            )
+            .values(is_read=True, read_at=now)
+            .returning(Notification.id)
+        ).scalars().all()
+        
+        Receipt = BroadcastNotificationReceipt
+        unread = _visible_broadcasts(user_id).where(
+            Receipt.read_at.is_(None),
+            *_selection(BroadcastNotification, ids, before, notification_type, reference_id)
+        ).subquery()
+        statement = pg_insert(Receipt).from_select(
+            ["user_id", "broadcast_id", "read_at"],
+            select(unread.c.user_id, unread.c.id, literal(now, type_=Receipt.read_at.type))
+        )
+        read_ids += db.execute(
+            statement.on_conflict_do_update(
+                index_elements=[Receipt.user_id, Receipt.broadcast_id],
+                set_={"read_at": statement.excluded.read_at}
+            ).returning(Receipt.broadcast_id)
+        ).scalars().all()
+        
         db.commit()
-        return result
+        
+        if read_ids:
+            _publish(user_id, "notifications_read", -len(read_ids), ids=[str(read_id) for read_id in read_ids])
+        return len(read_ids)
+    
+    @staticmethod
+    def bulk_delete(
+        db: Session,
+        user_id: UUID,
+        ids: Optional[List[UUID]] = None,
+        before: Optional[Tuple[datetime, UUID]] = None,
+        notification_type: Optional[NotificationType] = None,
+        reference_id: Optional[UUID] = None
+    ) -> int:
+        """
+        Delete the selected personal notifications and dismiss the selected
+        broadcasts with one DELETE and one receipt upsert. Returns the number
+        removed from the user's feed.
+        """
+        deleted = db.execute(
+            delete(Notification)
+            .where(
+                Notification.user_id == user_id,
+                *_selection(Notification, ids, before, notification_type, reference_id)
+            )
+            .returning(Notification.id, Notification.is_read)
+        ).all()
+        
+        Receipt = BroadcastNotificationReceipt
+        now = datetime.utcnow()
+        visible = _visible_broadcasts(user_id).where(
+            *_selection(BroadcastNotification, ids, before, notification_type, reference_id)
+        ).subquery()
+        statement = pg_insert(Receipt).from_select(
+            ["user_id", "broadcast_id", "deleted_at"],
+            select(visible.c.user_id, visible.c.id, literal(now, type_=Receipt.deleted_at.type))
+        )
+        dismissed = db.execute(
+            statement.on_conflict_do_update(
+                index_elements=[Receipt.user_id, Receipt.broadcast_id],
+                set_={"deleted_at": statement.excluded.deleted_at}
+            ).returning(Receipt.broadcast_id, Receipt.read_at)
+        ).all()
+        
+        db.commit()
+        
+        removed_ids = [row.id for row in deleted] + [row.broadcast_id for row in dismissed]
+        if removed_ids:
+            unread = sum(1 for row in deleted if not row.is_read) + sum(1 for row in dismissed if row.read_at is None)
+            _publish(user_id, "notifications_deleted", -unread, ids=[str(removed_id) for removed_id in removed_ids])
+        return len(removed_ids)
     
     @staticmethod
     def delete_notification(db: Session, notification_id: UUID, user_id: UUID) -> bool:
-        """Delete a notification."""
-        notification = db.query(Notification).filter(
-            Notification.id == notification_id,
-            Notification.user_id == user_id
+        """Delete a personal notification, or dismiss a broadcast for this user."""
+        deleted = db.execute(
+            delete(Notification)
+            .where(Notification.id == notification_id, Notification.user_id == user_id)
+            .returning(Notification.is_read)
         ).first()
         
-        if notification:
-            db.delete(notification)
+        if deleted:
             db.commit()
+            _publish(user_id, "notification_deleted", 0 if deleted.is_read else -1, id=str(notification_id))
             return True
-        return False
+        
+        broadcast = NotificationService._get_broadcast_item(db, notification_id, user_id)
+        if not broadcast:
+            return False
+        
+        Receipt = BroadcastNotificationReceipt
+        db.execute(
+            pg_insert(Receipt)
+            .values(user_id=user_id, broadcast_id=notification_id, deleted_at=datetime.utcnow())
+            .on_conflict_do_update(
+                index_elements=[Receipt.user_id, Receipt.broadcast_id],
+                set_={"deleted_at": datetime.utcnow()}
+            )
+        )
+        db.commit()
+        _publish(user_id, "notification_deleted", 0 if broadcast.is_read else -1, id=str(notification_id))
+        return True
     
     @staticmethod
     def get_notification_stats(db: Session, user_id: UUID) -> dict:
-        """Get notification statistics for a user."""
-        total = db.query(func.count(Notification.id)).filter(
-            Notification.user_id == user_id
-        ).scalar()
-        
-        unread = db.query(func.count(Notification.id)).filter(
-            and_(Notification.user_id == user_id, Notification.is_read == False)
-        ).scalar()
-        
-        by_type = {}
-        for notification_type in NotificationType:
-            count = db.query(func.count(Notification.id)).filter(
-                and_(
-                    Notification.user_id == user_id,
-                    Notification.type == notification_type
-                )
-            ).scalar()
-            by_type[notification_type.value] = count
+        """
+        Get notification statistics for a user.
+        
+        Personal notifications come from the trigger-maintained counters (one
+        primary-key range scan); broadcasts are counted with one grouped query
+        over the user's visible broadcasts, which only covers the broadcast
+        retention window (see `_visible_broadcasts`).
+        """
+        counters = db.query(NotificationCounter).filter(
+            NotificationCounter.user_id == user_id
+        ).all()
+        
+        by_type = {notification_type.value: 0 for notification_type in NotificationType}
+        total = 0
+        unread = 0
+        for counter in counters:
+            by_type[counter.type.value] = counter.total
+            total += counter.total
+            unread += counter.unread
+        
+        visible = _visible_broadcasts(user_id).subquery()
+        broadcast_counts = db.execute(
+            select(
+                visible.c.type,
+                func.count().label("total"),
+                func.count().filter(visible.c.is_read == False).label("unread")
+            ).group_by(visible.c.type)
+        ).all()
+        for row in broadcast_counts:
+            by_type[row.type.value] += row.total
+            total += row.total
+            unread += row.unread
         
         return {
-            "total": total or 0,
-            "unread": unread or 0,
+            "total": total,
+            "unread": unread,
             "by_type": by_type
         }
     
@@ -116,23 +533,105 @@ class NotificationService:
         announcement_id: UUID,
         title: str,
         message: str
-    ):
-        """Create notifications for multiple users about an announcement."""
-        notifications = []
-        for user_id in user_ids:
-            notification = Notification(
-                user_id=user_id,
-                type=NotificationType.ANNOUNCEMENT,
-                title=f"New Announcement: {title}",
-                message=message,
-                link=f"/announcements/{announcement_id}",
-                reference_id=announcement_id
-            )
-            notifications.append(notification)
+    ) -> int:
+        """
+        Create notifications for a list of users about an announcement.
         
-        db.add_all(notifications)
+        Written as one multi-row INSERT without building ORM objects. For
+        audiences (all, year, branch, hostel) use NotificationFanoutService,
+        which resolves recipients in SQL and runs in the background.
+        Users who muted announcements are skipped. Returns the number of
+        notifications created.
+        """
+        user_ids = NotificationPreferenceService.filter_recipients(db, user_ids, NotificationType.ANNOUNCEMENT)
+        if not user_ids:
+            return 0
+        
+        created_at = datetime.utcnow()
+        rows = [
+            {
+                "id": uuid4(),
+                "user_id": user_id,
+                "type": NotificationType.ANNOUNCEMENT,
+                "title": f"New Announcement: {title}",
+                "message": message,
+                "link": f"/announcements/{announcement_id}",
+                "reference_id": announcement_id,
+                "is_read": False,
+                "created_at": created_at
+            }
+            for user_id in user_ids
+        ]
+        db.execute(insert(Notification), rows)
         db.commit()
-        return notifications
+        publish_created(rows)
+        return len(user_ids)
+    
+    @staticmethod
+    def _upsert_message_notifications(db: Session, recipients, group_id: UUID, group_name: str, sender_name: str):
+        """
+        Insert a message notification per recipient, or fold it into the
+        recipient's unread notification for the same chat by bumping its
+        count, latest sender and timestamp. Recipients who muted messages or
+        this chat are skipped in the same statement. Returns the affected rows.
+        """
+        now = datetime.utcnow()
+        collapse_key = _chat_collapse_key(group_id)
+        statement = pg_insert(Notification).from_select(
+            [
+                Notification.id,
+                Notification.user_id,
+                Notification.type,
+                Notification.title,
+                Notification.message,
+                Notification.link,
+                Notification.reference_id,
+                Notification.is_read,
+                Notification.created_at,
+                Notification.collapse_key,
+                Notification.collapsed_count,
+            ],
+            select(
+                func.gen_random_uuid(),
+                recipients.c.user_id,
+                literal(NotificationType.MESSAGE, type_=Notification.type.type),
+                literal(f"New message in {group_name}"),
+                literal(f"{sender_name} sent a message"),
+                literal(f"/chat/{group_id}"),
+                literal(group_id, type_=Notification.reference_id.type),
+                literal(False),
+                literal(now, type_=Notification.created_at.type),
+                literal(collapse_key),
+                literal(1),
+            ).select_from(recipients).where(
+                not_muted(recipients.c.user_id, NotificationType.MESSAGE, group_id)
+            )
+        )
+        collapsed_count = Notification.collapsed_count + 1
+        statement = statement.on_conflict_do_update(
+            index_elements=[Notification.user_id, Notification.collapse_key],
+            index_where=_COLLAPSIBLE,
+            set_={
+                "collapsed_count": collapsed_count,
+                "title": f"New messages in {group_name}",
+                "message": func.concat(collapsed_count, f" new messages, latest from {sender_name}"),
+                "created_at": statement.excluded.created_at
+            }
+        ).returning(
+            Notification.id,
+            Notification.user_id,
+            Notification.type,
+            Notification.title,
+            Notification.message,
+            Notification.link,
+            Notification.reference_id,
+            Notification.is_read,
+            Notification.created_at,
+            Notification.collapsed_count,
+            # xmax is 0 only for freshly inserted rows
+            (literal_column("xmax") == 0).label("inserted")
+        )
+        return db.execute(statement).all()
     
     @staticmethod
     def create_message_notification(
@@ -141,20 +640,121 @@ class NotificationService:
         sender_name: str,
         group_name: str,
         group_id: UUID
-    ) -> Notification:
-        """Create notification for a new message."""
-        notification = Notification(
-            user_id=user_id,
-            type=NotificationType.MESSAGE,
-            title=f"New message in {group_name}",
-            message=f"{sender_name} sent a message",
-            link=f"/chat/{group_id}",
-            reference_id=group_id
+    ) -> Optional[Notification]:
+        """
+        Create notification for a new message.
+        
+        Collapses into the user's unread notification for the same chat if
+        there is one, so a burst of messages leaves a single row. Returns
+        None if the user muted messages or the chat.
+        """
+        recipients = select(literal(user_id, type_=Notification.user_id.type).label("user_id")).subquery()
+        rows = NotificationService._upsert_message_notifications(db, recipients, group_id, group_name, sender_name)
+        db.commit()
+        if not rows:
+            return None
+        _publish_collapsed(rows)
+        return db.get(Notification, rows[0].id, populate_existing=True)
+    
+    @staticmethod
+    def create_group_message_notifications(
+        db: Session,
+        group_id: UUID,
+        group_name: str,
+        sender_id: UUID,
+        sender_name: str,
+        exclude_user_ids: Optional[List[UUID]] = None
+    ) -> int:
+        """
+        Notify every member of a chat group except the sender (and anyone in
+        `exclude_user_ids`, e.g. members watching the chat live) in one
+        collapsing upsert. Returns the number of notifications touched.
+        """
+        conditions = [ChatMember.group_id == group_id, ChatMember.user_id != sender_id]
+        if exclude_user_ids:
+            conditions.append(ChatMember.user_id.notin_(exclude_user_ids))
+        recipients = select(ChatMember.user_id).where(*conditions).subquery()
+        
+        rows = NotificationService._upsert_message_notifications(db, recipients, group_id, group_name, sender_name)
+        db.commit()
+        _publish_collapsed(rows)
+        return len(rows)
+    
+    @staticmethod
+    def notify_group_message_in_background(
+        group_id: UUID,
+        sender_id: UUID,
+        sender_name: str,
+        exclude_user_ids: Optional[List[UUID]] = None
+    ):
+        """Background-task entry point for `create_group_message_notifications`."""
+        from app.core.database import SessionLocal
+        
+        db = SessionLocal()
+        try:
+            group_name = db.execute(select(ChatGroup.name).where(ChatGroup.id == group_id)).scalar()
+            if group_name is None:
+                return
+            NotificationService.create_group_message_notifications(
+                db, group_id, group_name, sender_id, sender_name, exclude_user_ids
+            )
+        finally:
+            db.close()
+    
+    @staticmethod
+    def run_message_digest(db: Session, now: Optional[datetime] = None) -> int:
+        """
+        Periodic job: roll each user's stale unread chat notifications into a
+        single "New messages" digest. Only users with at least two stale chat
+        notifications are touched. Later runs fold into an unread digest, so
+        its message only carries the message count: which chats an earlier
+        run digested is not kept. Returns the number of digests written.
+        """
+        now = now or datetime.utcnow()
+        cutoff = now - timedelta(minutes=settings.NOTIFICATION_DIGEST_AFTER_MINUTES)
+        
+        stale = (
+            "type = :type AND is_read = false AND created_at < :cutoff "
+            "AND (collapse_key IS NULL OR collapse_key LIKE 'chat:%')"
         )
-        db.add(notification)
+        statement = text(f"""
+            WITH stale_users AS (
+                SELECT user_id FROM notifications
+                WHERE {stale}
+                GROUP BY user_id
+                HAVING count(*) > 1
+            ), digested AS (
+                DELETE FROM notifications
+                WHERE user_id IN (SELECT user_id FROM stale_users) AND {stale}
+                RETURNING user_id, collapsed_count
+            )
+            INSERT INTO notifications
+                (id, user_id, type, title, message, link, is_read, created_at, collapse_key, collapsed_count)
+            SELECT gen_random_uuid(), user_id, :type, 'New messages',
+                   sum(collapsed_count) || ' new messages',
+                   '/chat', false, :now, :digest_key, sum(collapsed_count)
+            FROM digested
+            GROUP BY user_id
+            ON CONFLICT (user_id, collapse_key) WHERE is_read = false AND collapse_key IS NOT NULL
+            DO UPDATE SET
+                collapsed_count = notifications.collapsed_count + EXCLUDED.collapsed_count,
+                message = (notifications.collapsed_count + EXCLUDED.collapsed_count) || ' new messages',
+                created_at = EXCLUDED.created_at
+            RETURNING user_id
+        """).bindparams(
+            bindparam("type", NotificationType.MESSAGE, type_=Notification.type.type),
+            bindparam("cutoff", cutoff),
+            bindparam("now", now),
+            bindparam("digest_key", MESSAGE_DIGEST_KEY)
+        )
+        
+        user_ids = db.execute(statement).scalars().all()
         db.commit()
-        db.refresh(notification)
-        return notification
+        
+        # Several rows became one; connected clients refetch the list
+        for user_id in user_ids:
+            _publish(user_id, "notifications_resync", 0)
+        return len(user_ids)
     
     @staticmethod
     def create_issue_notification(
@@ -163,8 +763,11 @@ class NotificationService:
         issue_id: UUID,
         issue_title: str,
         action: str
-    ) -> Notification:
-        """Create notification for issue updates."""
+    ) -> Optional[Notification]:
+        """Create notification for issue updates. Returns None if the user muted issues."""
+        if NotificationPreferenceService.is_muted(db, user_id, NotificationType.ISSUE):
+            return None
+        
         notification = Notification(
             user_id=user_id,
             type=NotificationType.ISSUE,
@@ -176,6 +779,7 @@ class NotificationService:
         db.add(notification)
         db.commit()
         db.refresh(notification)
+        _publish(user_id, "notification_created", 1, notification)
         return notification
     
     @staticmethod
@@ -185,20 +789,31 @@ class NotificationService:
         team_id: UUID,
         team_name: str,
         message: str
-    ):
-        """Create notifications for team members."""
-        notifications = []
-        for user_id in user_ids:
-            notification = Notification(
-                user_id=user_id,
-                type=NotificationType.TEAM,
-                title=f"Team Update: {team_name}",
-                message=message,
-                link=f"/teams/{team_id}",
-                reference_id=team_id
-            )
-            notifications.append(notification)
+    ) -> int:
+        """
+        Create notifications for team members, skipping those who muted
+        team notifications. Returns the number of notifications created.
+        """
+        user_ids = NotificationPreferenceService.filter_recipients(db, user_ids, NotificationType.TEAM)
+        if not user_ids:
+            return 0
         
-        db.add_all(notifications)
+        created_at = datetime.utcnow()
+        rows = [
+            {
+                "id": uuid4(),
+                "user_id": user_id,
+                "type": NotificationType.TEAM,
+                "title": f"Team Update: {team_name}",
+                "message": message,
+                "link": f"/teams/{team_id}",
+                "reference_id": team_id,
+                "is_read": False,
+                "created_at": created_at
+            }
+            for user_id in user_ids
+        ]
+        db.execute(insert(Notification), rows)
         db.commit()
-        return notifications
+        publish_created(rows)
+        return len(user_ids)
@@ -0,0 +1,159 @@
+from sqlalchemy import select, update, delete
+from sqlalchemy.orm import Session
+from fastapi import HTTPException, status
+from datetime import datetime, timedelta
+from typing import Optional
+from uuid import UUID
+import hashlib
+import logging
+import secrets
+import uuid
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.security import create_access_token, revoke_session
+from app.models.refresh_token import RefreshToken
+from app.models.user import User
+from app.schemas.auth import Token, UserResponse
+
+logger = logging.getLogger(__name__)
+
+refreshes_total = metrics.counter(
+    "auth_refreshes_total",
+    "Refresh token exchanges by outcome",
+    ("result",)
+)
+
+
+def _hash(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _invalid_refresh_token() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid or expired refresh token"
+    )
+
+
+class RefreshTokenService:
+    """
+    Rotating refresh tokens (see RefreshToken).
+
+    Clients exchange a refresh token for a new access and refresh token
+    instead of going through OTP again, so an expired access token costs
+    one indexed lookup rather than an email round trip.
+    """
+
+    @staticmethod
+    def issue_tokens(db: Session, user: User, family_id: Optional[UUID] = None) -> Token:
+        """
+        Create a refresh token for `user` (starting a new session unless
+        `family_id` is given), commit it and return it with an access token.
+        """
+        family_id = family_id or uuid.uuid4()
+        refresh_token = secrets.token_urlsafe(32)
+        db.add(RefreshToken(
+            token_hash=_hash(refresh_token),
+            user_id=user.id,
+            family_id=family_id,
+            expires_at=datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+        ))
+        db.commit()
+
+        access_token = create_access_token(data={"sub": str(user.id), "email": user.email, "sid": str(family_id)})
+        return Token(
+            access_token=access_token,
+            refresh_token=refresh_token,
+            user=UserResponse.from_orm(user)
+        )
+
+    @staticmethod
+    def rotate(db: Session, refresh_token: str) -> Token:
+        """
+        Exchange a refresh token for new tokens in the same session.
+
+        The old token is marked used in the same statement that checks it,
+        so of two concurrent exchanges only one succeeds. Reusing a token
+        that was already exchanged revokes its whole session.
+        """
+        token_hash = _hash(refresh_token)
+        now = datetime.utcnow()
+        row = db.execute(
+            update(RefreshToken)
+            .where(
+                RefreshToken.token_hash == token_hash,
+                RefreshToken.used_at.is_(None),
+                RefreshToken.revoked_at.is_(None),
+                RefreshToken.expires_at > now
+            )
+            .values(used_at=now)
+            .returning(RefreshToken.user_id, RefreshToken.family_id)
+        ).first()
+
+        if row is None:
+            reused = db.execute(
+                select(RefreshToken.family_id).where(
+                    RefreshToken.token_hash == token_hash,
+                    RefreshToken.used_at.isnot(None),
+                    RefreshToken.revoked_at.is_(None)
+                )
+            ).scalar()
+            if reused is not None:
+                logger.warning(f"Refresh token reused, revoking session {reused}")
+                RefreshTokenService.revoke_family(db, reused)
+                refreshes_total.inc(result="reused")
+            else:
+                db.rollback()
+                refreshes_total.inc(result="invalid")
+            raise _invalid_refresh_token()
+
+        user = db.query(User).filter(User.id == row.user_id).first()
+        if user is None or not user.is_active:
+            db.rollback()
+            refreshes_total.inc(result="invalid")
+            raise _invalid_refresh_token()
+
+        refreshes_total.inc(result="rotated")
+        return RefreshTokenService.issue_tokens(db, user, family_id=row.family_id)
+
+    @staticmethod
+    def revoke_family(db: Session, family_id: UUID):
+        """Revoke every refresh token of a session and reject its access tokens."""
+        db.execute(
+            update(RefreshToken)
+            .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+            .values(revoked_at=datetime.utcnow())
+        )
+        db.commit()
+        revoke_session(family_id)
+
+    @staticmethod
+    def revoke(db: Session, refresh_token: str):
+        """Log out the session a refresh token belongs to. Unknown tokens are ignored."""
+        family_id = db.execute(
+            select(RefreshToken.family_id).where(RefreshToken.token_hash == _hash(refresh_token))
+        ).scalar()
+        if family_id is not None:
+            RefreshTokenService.revoke_family(db, family_id)
+
+    @staticmethod
+    def sweep_expired(db: Session) -> int:
+        """Delete expired refresh tokens in batches, each its own transaction."""
+        batch_size = settings.REFRESH_TOKEN_SWEEP_BATCH_SIZE
+        total = 0
+        while True:
+            ids = select(RefreshToken.id).where(
+                RefreshToken.expires_at < datetime.utcnow()
+            ).limit(batch_size).subquery()
+            deleted = db.execute(
+                delete(RefreshToken).where(RefreshToken.id.in_(select(ids.c.id)))
+            ).rowcount
+            db.commit()
+            total += deleted
+            if deleted < batch_size:
+                break
+
+        if total:
+            logger.info(f"Deleted {total} expired refresh tokens")
+        return total
@@ -5,7 +5,9 @@ from uuid import UUID
 from datetime import datetime
 
 from app.models.team import Team, TeamMember, JoinRequest
+from app.models.notification import NotificationType
 from app.models.user import User
+from app.services.notification_service import NotificationService
 from app.schemas.team import (
     TeamCreate,
     TeamUpdate,
@@ -367,6 +369,18 @@ class TeamService:
         else:
             join_request.status = "rejected"
 
+        # Committed with the membership change
+        NotificationService.enqueue(
+            db,
+            [join_request.user_id],
+            NotificationType.TEAM,
+            title=f"Team Update: {team.name}",
+            message=f"Your request to join {team.name} was {join_request.status}",
+            link=f"/teams/{team.id}",
+            reference_id=team.id,
+            email=approve
+        )
+
         db.commit()
         return True
 
@@ -1,6 +1,7 @@
 from fastapi import WebSocket, WebSocketDisconnect
-from typing import Dict, List, Set
+from typing import Dict, List, Optional, Set
 from uuid import UUID
+import asyncio
 import json
 import logging
 
@@ -17,10 +18,13 @@ class ConnectionManager:
         self.connection_users: Dict[WebSocket, str] = {}
         # Maps WebSocket -> group_id for cleanup
         self.connection_groups: Dict[WebSocket, str] = {}
+        # Event loop serving the connections, for broadcasts from worker threads
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
     
-    async def connect(self, websocket: WebSocket, group_id: str, user_id: str):
+    async def connect(self, websocket: WebSocket, group_id: str, user_id: str, announce: bool = True):
         """Accept WebSocket connection and add to group"""
         await websocket.accept()
+        self.loop = asyncio.get_running_loop()
         
         # Initialize group if doesn't exist
         if group_id not in self.active_connections:
@@ -33,6 +37,9 @@ class ConnectionManager:
         
         logger.info(f"User {user_id} connected to group {group_id}")
         
+        if not announce:
+            return
+        
         # Notify others in group
         await self.broadcast_to_group(
             group_id,
@@ -73,16 +80,28 @@ class ConnectionManager:
         except Exception as e:
             logger.error(f"Error sending personal message: {str(e)}")
     
-    async def broadcast_to_group(self, group_id: str, message: dict, exclude: WebSocket = None):
-        """Broadcast message to all connections in a group"""
+    async def broadcast_to_group(
+        self,
+        group_id: str,
+        message: dict,
+        exclude: WebSocket = None,
+        user_ids: Optional[Set[str]] = None
+    ):
+        """
+        Broadcast message to all connections in a group.
+        If user_ids is given, only those users' connections receive it.
+        """
         if group_id not in self.active_connections:
             return
         
         dead_connections = set()
         
-        for connection in self.active_connections[group_id]:
+        # Copy: sends yield to the loop, which may connect or disconnect others
+        for connection in list(self.active_connections[group_id]):
             if exclude and connection == exclude:
                 continue
+            if user_ids is not None and self.connection_users.get(connection) not in user_ids:
+                continue
             
             try:
                 await connection.send_json(message)
@@ -94,6 +113,20 @@ class ConnectionManager:
         for dead_connection in dead_connections:
             self.disconnect(dead_connection)
     
+    def broadcast_to_group_threadsafe(self, group_id: str, message: dict, user_ids: Optional[Set[str]] = None):
+        """
+        Schedule a group broadcast from synchronous code running outside the
+        event loop (e.g. threadpool route handlers). Does nothing if the group
+        has no connections.
+        """
+        if self.loop is None or group_id not in self.active_connections:
+            return
+        
+        asyncio.run_coroutine_threadsafe(
+            self.broadcast_to_group(group_id, message, user_ids=user_ids),
+            self.loop
+        )
+    
     async def send_typing_indicator(self, group_id: str, user_id: str, is_typing: bool, websocket: WebSocket):
         """Broadcast typing indicator to group"""
         await self.broadcast_to_group(
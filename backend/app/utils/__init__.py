@@ -2,6 +2,7 @@
 
 from .dependencies import get_db, get_current_user, get_current_admin_user
 from .responses import success_response, error_response, paginated_response
+from .pagination import encode_cursor, decode_cursor
 
 __all__ = [
     "get_db",
@@ -10,4 +11,6 @@ __all__ = [
     "success_response",
     "error_response",
     "paginated_response",
+    "encode_cursor",
+    "decode_cursor",
 ]
@@ -1,6 +1,5 @@
 """Common dependency functions for FastAPI routes"""
 
-from typing import Generator
 from fastapi import Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
@@ -9,13 +8,9 @@ from app.core.security import get_current_user as core_get_current_user
 from app.models.user import User
 
 
-def get_db() -> Generator:
-    """
-    Database session dependency.
-    
-    Yields a database session and ensures it's closed after use.
-    """
-    yield from core_get_db()
+# The same callable as app.core.database.get_db, so routes and
+# get_current_user share one session per request whichever they import
+get_db = core_get_db
 
 
 async def get_current_user(current_user: User = Depends(core_get_current_user)) -> User:
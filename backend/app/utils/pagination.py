@@ -0,0 +1,39 @@
+"""Opaque keyset cursors for paginated endpoints"""
+
+from datetime import datetime
+from typing import Optional, Tuple
+from uuid import UUID
+import base64
+
+
+def encode_cursor(created_at: datetime, item_id: UUID) -> str:
+    """
+    Encode the sort key of the last item on a page as an opaque cursor.
+    
+    Args:
+        created_at: Timestamp of the last item
+        item_id: ID of the last item (tie-breaker)
+        
+    Returns:
+        URL-safe cursor string
+    """
+    raw = f"{created_at.isoformat()}|{item_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Optional[Tuple[datetime, UUID]]:
+    """
+    Decode a cursor produced by `encode_cursor`.
+    
+    Args:
+        cursor: Cursor string from a previous response
+        
+    Returns:
+        (created_at, id) tuple, or None if the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, item_id = base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), UUID(item_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
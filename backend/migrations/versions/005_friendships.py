@@ -0,0 +1,37 @@
+"""Add friendships table for friends-only location visibility
+
+Revision ID: 005_friendships
+Revises: 004_announcement_schedule
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '005_friendships'
+down_revision = '004_announcement_schedule'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Create friendships table (directed: user_id has added friend_id)
+    op.create_table('friendships',
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('friend_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.text('now()')),
+        sa.PrimaryKeyConstraint('user_id', 'friend_id'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['friend_id'], ['users.id'], ondelete='CASCADE'),
+        sa.CheckConstraint('user_id <> friend_id', name='ck_friendships_not_self')
+    )
+    
+    # Reverse lookups ("who has added me")
+    op.create_index('ix_friendships_friend_id_user_id', 'friendships', ['friend_id', 'user_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_friendships_friend_id_user_id', table_name='friendships')
+    op.drop_table('friendships')
@@ -0,0 +1,59 @@
+"""Add partitioned location history and rollup tables
+
+Revision ID: 006_location_history
+Revises: 005_friendships
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+from datetime import datetime, timedelta, timezone
+
+# revision identifiers, used by Alembic.
+revision = '006_location_history'
+down_revision = '005_friendships'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Raw samples, range-partitioned by day
+    op.execute("""
+        CREATE TABLE location_history (
+            user_id UUID NOT NULL,
+            recorded_at TIMESTAMP WITH TIME ZONE NOT NULL,
+            latitude DOUBLE PRECISION NOT NULL,
+            longitude DOUBLE PRECISION NOT NULL,
+            building_id UUID,
+            PRIMARY KEY (user_id, recorded_at)
+        ) PARTITION BY RANGE (recorded_at)
+    """)
+    
+    # Downsampled buckets, range-partitioned by day
+    op.execute("""
+        CREATE TABLE location_history_rollups (
+            user_id UUID NOT NULL,
+            bucket_start TIMESTAMP WITH TIME ZONE NOT NULL,
+            latitude DOUBLE PRECISION NOT NULL,
+            longitude DOUBLE PRECISION NOT NULL,
+            building_id UUID,
+            sample_count INTEGER NOT NULL,
+            PRIMARY KEY (user_id, bucket_start)
+        ) PARTITION BY RANGE (bucket_start)
+    """)
+    
+    # Initial raw partitions; the maintenance job keeps creating them ahead
+    today = datetime.now(timezone.utc).date()
+    for offset in range(3):
+        day = today + timedelta(days=offset)
+        start = datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+        end = start + timedelta(days=1)
+        op.execute(
+            f"CREATE TABLE location_history_p{day:%Y%m%d} PARTITION OF location_history "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+
+
+def downgrade() -> None:
+    # Dropping the parents drops every partition
+    op.execute("DROP TABLE location_history_rollups")
+    op.execute("DROP TABLE location_history")
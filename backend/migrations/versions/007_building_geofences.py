@@ -0,0 +1,25 @@
+"""Add geofence polygons to buildings
+
+Revision ID: 007_building_geofences
+Revises: 006_location_history
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '007_building_geofences'
+down_revision = '006_location_history'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Polygon as [[lat, lon], ...]; indexed in memory by the API
+    op.add_column('buildings', sa.Column('geofence', postgresql.JSONB(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('buildings', 'geofence')
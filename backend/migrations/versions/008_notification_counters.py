@@ -0,0 +1,110 @@
+"""Add trigger-maintained notification counters
+
+Revision ID: 008_notification_counters
+Revises: 007_building_geofences
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '008_notification_counters'
+down_revision = '007_building_geofences'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Create notification_counters table (reuses the notificationtype enum)
+    op.create_table('notification_counters',
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('type', postgresql.ENUM(name='notificationtype', create_type=False), nullable=False),
+        sa.Column('total', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('unread', sa.Integer(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('user_id', 'type'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE')
+    )
+    
+    # Statement-level triggers: one grouped upsert per statement, so bulk
+    # inserts, bulk mark-read and batched deletes stay cheap. Rows are
+    # upserted in key order to keep concurrent statements from deadlocking.
+    op.execute("""
+        CREATE FUNCTION notification_counters_apply() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO notification_counters (user_id, type, total, unread)
+                SELECT user_id, type, count(*), count(*) FILTER (WHERE NOT is_read)
+                FROM new_rows
+                GROUP BY user_id, type
+                ORDER BY user_id, type
+                ON CONFLICT (user_id, type) DO UPDATE
+                SET total = notification_counters.total + EXCLUDED.total,
+                    unread = notification_counters.unread + EXCLUDED.unread;
+            ELSIF TG_OP = 'DELETE' THEN
+                UPDATE notification_counters c
+                SET total = c.total - d.total,
+                    unread = c.unread - d.unread
+                FROM (
+                    SELECT user_id, type, count(*) AS total, count(*) FILTER (WHERE NOT is_read) AS unread
+                    FROM old_rows
+                    GROUP BY user_id, type
+                    ORDER BY user_id, type
+                ) d
+                WHERE c.user_id = d.user_id AND c.type = d.type;
+            ELSE
+                INSERT INTO notification_counters (user_id, type, total, unread)
+                SELECT user_id, type, sum(total), sum(unread)
+                FROM (
+                    SELECT user_id, type, 1 AS total, CASE WHEN is_read THEN 0 ELSE 1 END AS unread
+                    FROM new_rows
+                    UNION ALL
+                    SELECT user_id, type, -1, CASE WHEN is_read THEN 0 ELSE -1 END
+                    FROM old_rows
+                ) delta
+                GROUP BY user_id, type
+                HAVING sum(total) <> 0 OR sum(unread) <> 0
+                ORDER BY user_id, type
+                ON CONFLICT (user_id, type) DO UPDATE
+                SET total = notification_counters.total + EXCLUDED.total,
+                    unread = notification_counters.unread + EXCLUDED.unread;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER notifications_counters_insert
+        AFTER INSERT ON notifications
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION notification_counters_apply()
+    """)
+    op.execute("""
+        CREATE TRIGGER notifications_counters_update
+        AFTER UPDATE ON notifications
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION notification_counters_apply()
+    """)
+    op.execute("""
+        CREATE TRIGGER notifications_counters_delete
+        AFTER DELETE ON notifications
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION notification_counters_apply()
+    """)
+    
+    # Backfill from existing notifications
+    op.execute("""
+        INSERT INTO notification_counters (user_id, type, total, unread)
+        SELECT user_id, type, count(*), count(*) FILTER (WHERE NOT is_read)
+        FROM notifications
+        GROUP BY user_id, type
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER notifications_counters_delete ON notifications")
+    op.execute("DROP TRIGGER notifications_counters_update ON notifications")
+    op.execute("DROP TRIGGER notifications_counters_insert ON notifications")
+    op.execute("DROP FUNCTION notification_counters_apply()")
+    op.drop_table('notification_counters')
@@ -0,0 +1,45 @@
+"""Add notification fan-out jobs
+
+Revision ID: 009_notification_fanout_jobs
+Revises: 008_notification_counters
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '009_notification_fanout_jobs'
+down_revision = '008_notification_counters'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('notification_fanout_jobs',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('created_by', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False, server_default='pending'),
+        sa.Column('audience', postgresql.JSONB(), nullable=False, server_default='{}'),
+        sa.Column('type', postgresql.ENUM(name='notificationtype', create_type=False), nullable=False),
+        sa.Column('title', sa.String(length=200), nullable=False),
+        sa.Column('message', sa.Text(), nullable=False),
+        sa.Column('link', sa.String(length=500), nullable=True),
+        sa.Column('reference_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('total_recipients', sa.Integer(), nullable=True),
+        sa.Column('processed', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_user_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.text('now()')),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.text('now()')),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.ForeignKeyConstraint(['created_by'], ['users.id'], ondelete='SET NULL')
+    )
+    op.create_index(op.f('ix_notification_fanout_jobs_status'), 'notification_fanout_jobs', ['status'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_notification_fanout_jobs_status'), table_name='notification_fanout_jobs')
+    op.drop_table('notification_fanout_jobs')
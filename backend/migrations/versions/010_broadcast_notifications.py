@@ -0,0 +1,56 @@
+"""Add broadcast notifications and per-user receipts
+
+Revision ID: 010_broadcast_notifications
+Revises: 009_notification_fanout_jobs
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '010_broadcast_notifications'
+down_revision = '009_notification_fanout_jobs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Create broadcast_notifications table (reuses the notificationtype enum)
+    op.create_table('broadcast_notifications',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('type', postgresql.ENUM(name='notificationtype', create_type=False), nullable=False),
+        sa.Column('title', sa.String(length=200), nullable=False),
+        sa.Column('message', sa.Text(), nullable=False),
+        sa.Column('link', sa.String(length=500), nullable=True),
+        sa.Column('reference_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('audience_year', sa.Integer(), nullable=True),
+        sa.Column('audience_branch', sa.String(length=100), nullable=True),
+        sa.Column('audience_hostel', sa.String(length=100), nullable=True),
+        sa.Column('created_by', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.text('now()')),
+        sa.PrimaryKeyConstraint('id'),
+        sa.ForeignKeyConstraint(['created_by'], ['users.id'], ondelete='SET NULL')
+    )
+    op.create_index(op.f('ix_broadcast_notifications_created_at'), 'broadcast_notifications', ['created_at'], unique=False)
+    
+    # Create broadcast_notification_receipts table; rows exist only for
+    # broadcasts a user has read or dismissed
+    op.create_table('broadcast_notification_receipts',
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('broadcast_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('read_at', sa.DateTime(), nullable=True),
+        sa.Column('deleted_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('user_id', 'broadcast_id'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['broadcast_id'], ['broadcast_notifications.id'], ondelete='CASCADE')
+    )
+    op.create_index('ix_broadcast_notification_receipts_broadcast_id', 'broadcast_notification_receipts', ['broadcast_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_broadcast_notification_receipts_broadcast_id', table_name='broadcast_notification_receipts')
+    op.drop_table('broadcast_notification_receipts')
+    op.drop_index(op.f('ix_broadcast_notifications_created_at'), table_name='broadcast_notifications')
+    op.drop_table('broadcast_notifications')
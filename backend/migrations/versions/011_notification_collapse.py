@@ -0,0 +1,36 @@
+"""Add collapse keys to notifications
+
+Revision ID: 011_notification_collapse
+Revises: 010_broadcast_notifications
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '011_notification_collapse'
+down_revision = '010_broadcast_notifications'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('notifications', sa.Column('collapse_key', sa.String(length=200), nullable=True))
+    op.add_column('notifications', sa.Column('collapsed_count', sa.Integer(), nullable=False, server_default='1'))
+    
+    # One unread notification per user per collapse key; arbiter index for
+    # the collapsing upsert (ON CONFLICT ... WHERE must match this predicate)
+    op.create_index(
+        'uq_notifications_user_id_collapse_key_unread',
+        'notifications',
+        ['user_id', 'collapse_key'],
+        unique=True,
+        postgresql_where=sa.text('is_read = false AND collapse_key IS NOT NULL')
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_notifications_user_id_collapse_key_unread', table_name='notifications')
+    op.drop_column('notifications', 'collapsed_count')
+    op.drop_column('notifications', 'collapse_key')
@@ -0,0 +1,53 @@
+"""Add composite feed indexes for notifications
+
+Revision ID: 012_notification_feed_indexes
+Revises: 011_notification_collapse
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '012_notification_feed_indexes'
+down_revision = '011_notification_collapse'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Built concurrently so writes to notifications are not blocked
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_notifications_user_id_created_at_id',
+            'notifications',
+            ['user_id', sa.text('created_at DESC'), sa.text('id DESC')],
+            postgresql_concurrently=True
+        )
+        op.create_index(
+            'ix_notifications_user_id_unread',
+            'notifications',
+            ['user_id'],
+            postgresql_where=sa.text('is_read = false'),
+            postgresql_concurrently=True
+        )
+        op.create_index(
+            'ix_broadcast_notifications_created_at_id',
+            'broadcast_notifications',
+            [sa.text('created_at DESC'), sa.text('id DESC')],
+            postgresql_concurrently=True
+        )
+        
+        # Covered by the composite indexes above
+        op.drop_index('ix_notifications_user_id', table_name='notifications', postgresql_concurrently=True)
+        op.drop_index('ix_notifications_is_read', table_name='notifications', postgresql_concurrently=True)
+        op.drop_index('ix_broadcast_notifications_created_at', table_name='broadcast_notifications', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    op.create_index('ix_broadcast_notifications_created_at', 'broadcast_notifications', ['created_at'], unique=False)
+    op.create_index('ix_notifications_is_read', 'notifications', ['is_read'], unique=False)
+    op.create_index('ix_notifications_user_id', 'notifications', ['user_id'], unique=False)
+    op.drop_index('ix_broadcast_notifications_created_at_id', table_name='broadcast_notifications')
+    op.drop_index('ix_notifications_user_id_unread', table_name='notifications')
+    op.drop_index('ix_notifications_user_id_created_at_id', table_name='notifications')
@@ -0,0 +1,42 @@
+"""Index OTP requests for verification and expiry sweeps
+
+Revision ID: 015_otp_request_indexes
+Revises: 014_notification_preferences
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '015_otp_request_indexes'
+down_revision = '014_notification_preferences'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Built concurrently so OTP requests are not blocked
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_otp_requests_email_otp_code_unverified',
+            'otp_requests',
+            ['email', 'otp_code', 'expires_at'],
+            postgresql_where=sa.text('is_verified = false'),
+            postgresql_concurrently=True
+        )
+        op.create_index(
+            'ix_otp_requests_expires_at',
+            'otp_requests',
+            ['expires_at'],
+            postgresql_concurrently=True
+        )
+        
+        # Covered by the composite index above
+        op.drop_index('ix_otp_requests_email', table_name='otp_requests', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    op.create_index('ix_otp_requests_email', 'otp_requests', ['email'], unique=False)
+    op.drop_index('ix_otp_requests_expires_at', table_name='otp_requests')
+    op.drop_index('ix_otp_requests_email_otp_code_unverified', table_name='otp_requests')
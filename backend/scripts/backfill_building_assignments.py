@@ -0,0 +1,58 @@
+"""Reassign buildings to all active locations
+
+Recomputes locations.building_id for every active location against the
+current buildings table. Run it after editing buildings or reseeding them.
+
+Run with: python -m scripts.backfill_building_assignments [--dry-run]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.database import SessionLocal
+from app.services.building_service import backfill_location_buildings
+
+
+def print_progress(processed: int, total: int, changed: int):
+    percent = (processed / total * 100) if total else 100.0
+    print(f"  {processed}/{total} locations ({percent:.0f}%), {changed} changed")
+
+
+def backfill(max_distance: float, chunk_size: int, dry_run: bool):
+    """Run the backfill and print a summary."""
+    db = SessionLocal()
+    
+    try:
+        summary = backfill_location_buildings(
+            db,
+            max_distance_meters=max_distance,
+            chunk_size=chunk_size,
+            dry_run=dry_run,
+            progress=print_progress
+        )
+        verb = "Would change" if dry_run else "Changed"
+        print(f"{verb} {summary['changed']} of {summary['processed']} locations "
+              f"using {summary['buildings']} buildings.")
+    except Exception as e:
+        print(f"Error backfilling building assignments: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reassign buildings to all active locations")
+    parser.add_argument("--max-distance", type=float, default=200, help="Maximum distance to a building in meters")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Locations per read/update batch")
+    parser.add_argument("--dry-run", action="store_true", help="Report changes without writing them")
+    args = parser.parse_args()
+    
+    if args.max_distance <= 0 or args.chunk_size <= 0:
+        parser.error("--max-distance and --chunk-size must be positive")
+    
+    print("Backfilling building assignments..." + (" (dry run)" if args.dry_run else ""))
+    backfill(args.max_distance, args.chunk_size, args.dry_run)
@@ -0,0 +1,63 @@
+"""Benchmark authentication overhead on a trivial authenticated endpoint
+
+Mints an access token for an existing user and measures requests/sec on
+GET /api/auth/me, which does nothing beyond authenticating. Run it once
+against a server started with AUTH_USER_CACHE_TTL_SECONDS=0 (a users query
+per request) and once with the cache enabled, then compare; the server's
+/metrics shows auth_user_cache_lookups_total hits and misses.
+
+Run with: python -m scripts.bench_auth --email student@plaksha.edu.in [--concurrency 50,200]
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.database import SessionLocal
+from app.core.security import create_access_token
+from app.models.user import User
+from scripts.bench_http import run_level
+
+
+def mint_token(email: str) -> str:
+    """An access token for the user with `email`."""
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.email == email).first()
+        if user is None:
+            raise SystemExit(f"No user with email {email}")
+        return create_access_token({"sub": str(user.id)})
+    finally:
+        db.close()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Authenticated endpoint throughput benchmark")
+    parser.add_argument("--email", required=True, help="Existing user to authenticate as")
+    parser.add_argument("--base-url", default="http://localhost:8000", help="API base URL")
+    parser.add_argument("--path", default="/api/auth/me", help="Authenticated endpoint to hit")
+    parser.add_argument("--concurrency", default="50", help="Comma-separated list of concurrent client counts")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to run each level")
+    args = parser.parse_args(argv)
+
+    token = mint_token(args.email)
+    url = args.base_url.rstrip("/") + args.path
+    levels = [int(level) for level in args.concurrency.split(",") if level.strip()]
+
+    print(f"GET {url} as {args.email} for {args.duration:.0f}s per level")
+    print(f"{'clients':>8} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for level in levels:
+        result = asyncio.run(run_level(url, "GET", token, level, args.duration))
+        print(
+            f"{result['concurrency']:>8} {result['requests']:>9} {result['errors']:>7} "
+            f"{result['rps']:>9.1f} {result['p50_ms']:>8.1f} {result['p99_ms']:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
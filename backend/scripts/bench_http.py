@@ -0,0 +1,164 @@
+"""Concurrent HTTP throughput benchmark for the API
+
+Fires requests at a single endpoint from N concurrent keep-alive clients and
+reports throughput and latency percentiles. Uses only the standard library so
+it can run anywhere the backend runs.
+
+Run with:
+    python -m scripts.bench_http --path /api/locations/nearby --token <JWT> --concurrency 50
+    python -m scripts.bench_http --path /api/locations/me --token <JWT> --concurrency 50,200,1000
+
+Run it against the server before and after a change with the same arguments
+to compare concurrent-request throughput.
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from typing import List, Optional
+from urllib.parse import urlsplit
+
+
+async def _read_response(reader: asyncio.StreamReader) -> int:
+    """Read one HTTP/1.1 response and return its status code."""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("Connection closed by server")
+    status_code = int(status_line.split()[1])
+
+    content_length = 0
+    chunked = False
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        name = name.strip().lower()
+        if name == "content-length":
+            content_length = int(value.strip())
+        elif name == "transfer-encoding" and "chunked" in value.lower():
+            chunked = True
+
+    if chunked:
+        while True:
+            size = int((await reader.readline()).strip(), 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif content_length:
+        await reader.readexactly(content_length)
+
+    return status_code
+
+
+async def _client(
+    host: str,
+    port: int,
+    request: bytes,
+    deadline: float,
+    latencies: List[float],
+    errors: List[int],
+):
+    """Send requests over one keep-alive connection until the deadline."""
+    reader: Optional[asyncio.StreamReader] = None
+    writer: Optional[asyncio.StreamWriter] = None
+
+    while time.perf_counter() < deadline:
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            started = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            status_code = await _read_response(reader)
+            latencies.append(time.perf_counter() - started)
+            if status_code >= 400:
+                errors.append(status_code)
+        except (ConnectionError, OSError, asyncio.IncompleteReadError):
+            errors.append(0)
+            if writer is not None:
+                writer.close()
+            reader, writer = None, None
+            await asyncio.sleep(0.05)
+
+    if writer is not None:
+        writer.close()
+
+
+async def run_level(url: str, method: str, token: Optional[str], concurrency: int, duration: float) -> dict:
+    """Run one benchmark level and return its summary."""
+    parts = urlsplit(url)
+    host = parts.hostname or "localhost"
+    port = parts.port or 80
+    path = parts.path or "/"
+    if parts.query:
+        path = f"{path}?{parts.query}"
+
+    headers = [
+        f"{method} {path} HTTP/1.1",
+        f"Host: {host}:{port}",
+        "Connection: keep-alive",
+        "Content-Length: 0",
+    ]
+    if token:
+        headers.append(f"Authorization: Bearer {token}")
+    request = ("\r\n".join(headers) + "\r\n\r\n").encode("latin-1")
+
+    latencies: List[float] = []
+    errors: List[int] = []
+    started = time.perf_counter()
+    deadline = started + duration
+
+    await asyncio.gather(*[
+        _client(host, port, request, deadline, latencies, errors)
+        for _ in range(concurrency)
+    ])
+
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+
+    def percentile(p: float) -> float:
+        if not latencies:
+            return 0.0
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "mean_ms": statistics.fmean(latencies) * 1000 if latencies else 0.0,
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Concurrent HTTP throughput benchmark")
+    parser.add_argument("--base-url", default="http://localhost:8000", help="API base URL")
+    parser.add_argument("--path", required=True, help="Endpoint path, e.g. /api/locations/nearby")
+    parser.add_argument("--method", default="GET", help="HTTP method")
+    parser.add_argument("--token", default=None, help="JWT access token for authenticated endpoints")
+    parser.add_argument("--concurrency", default="50", help="Comma-separated list of concurrent client counts")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to run each level")
+    args = parser.parse_args(argv)
+
+    url = args.base_url.rstrip("/") + args.path
+    levels = [int(level) for level in args.concurrency.split(",") if level.strip()]
+
+    print(f"{args.method} {url} for {args.duration:.0f}s per level")
+    print(f"{'clients':>8} {'requests':>9} {'errors':>7} {'req/s':>9} {'mean ms':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for level in levels:
+        result = asyncio.run(run_level(url, args.method.upper(), args.token, level, args.duration))
+        print(
+            f"{result['concurrency']:>8} {result['requests']:>9} {result['errors']:>7} "
+            f"{result['rps']:>9.1f} {result['mean_ms']:>9.1f} {result['p50_ms']:>8.1f} "
+            f"{result['p95_ms']:>8.1f} {result['p99_ms']:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+"""Micro-benchmark per-request token verification cost
+
+Times, in-process and without a server, what authenticating a request costs
+before any database work: verifying a token with python-jose, and the same
+lookup through decode_access_token's verified-token cache. Run it with
+JWT_ALGORITHM=HS256 and with an asymmetric key pair (RS256/ES256, see
+.env.example) to compare algorithms.
+
+Run with: python -m scripts.bench_jwt [--tokens 1000] [--iterations 20000]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List, Optional
+from uuid import uuid4
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from jose import jwt
+
+from app.core.config import settings
+from app.core import security
+
+
+def time_calls(func: Callable[[str], object], tokens: List[str], iterations: int) -> List[float]:
+    """Per-call durations in microseconds, cycling through `tokens`."""
+    durations = []
+    for index in range(iterations):
+        token = tokens[index % len(tokens)]
+        started = time.perf_counter()
+        func(token)
+        durations.append((time.perf_counter() - started) * 1e6)
+    return durations
+
+
+def report(label: str, durations: List[float]):
+    durations.sort()
+    p99 = durations[int(len(durations) * 0.99) - 1]
+    print(f"{label:<28} {statistics.mean(durations):>9.1f} {durations[len(durations) // 2]:>9.1f} {p99:>9.1f}")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Token verification micro-benchmark")
+    parser.add_argument("--tokens", type=int, default=1000, help="Distinct tokens, i.e. concurrent clients")
+    parser.add_argument("--iterations", type=int, default=20000, help="Verifications per measurement")
+    args = parser.parse_args(argv)
+
+    tokens = [
+        security.create_access_token({"sub": str(uuid4()), "sid": str(uuid4())})
+        for _ in range(args.tokens)
+    ]
+
+    def uncached(token: str):
+        return jwt.decode(token, security._verification_key, algorithms=[settings.JWT_ALGORITHM])
+
+    print(f"{settings.JWT_ALGORITHM}, {args.tokens} tokens, {args.iterations} verifications")
+    print(f"{'':<28} {'mean us':>9} {'p50 us':>9} {'p99 us':>9}")
+    report("jose decode (no cache)", time_calls(uncached, tokens, args.iterations))
+
+    if settings.JWT_DECODE_CACHE_TTL_SECONDS:
+        # Warm the cache, as a client's second request would find it
+        for token in tokens:
+            security.decode_access_token(token)
+        report("decode_access_token (cached)", time_calls(security.decode_access_token, tokens, args.iterations))
+    else:
+        print("JWT_DECODE_CACHE_TTL_SECONDS=0, skipping the cached measurement")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+"""Benchmark the notification feed for a user with a large history
+
+Seeds a benchmark user with N notifications (100k by default), then times
+fetching one page at increasing depths with OFFSET pagination and with
+keyset (cursor) pagination, and prints the query plan of the deepest keyset
+page. Before timing, a broadcast is created and read back through the feed,
+stats and mark-read paths, so queries over broadcasts are checked against
+the real schema. The benchmark user, its notifications and the broadcast
+are removed afterwards unless --keep is given.
+
+Run with: python -m scripts.bench_notifications [--count 100000] [--keep]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import text, bindparam
+
+from app.core.database import SessionLocal
+from app.models.notification import Notification, NotificationType, BroadcastNotification
+from app.models.user import User
+from app.schemas.notification import BroadcastCreate
+from app.services.notification_service import NotificationService
+
+BENCH_EMAIL = "bench-notifications@plaksha.edu.in"
+
+
+def seed(db, count: int) -> User:
+    """Create the benchmark user and `count` notifications, one per second back in time."""
+    user = db.query(User).filter(User.email == BENCH_EMAIL).first()
+    if user:
+        db.delete(user)
+        db.commit()
+
+    user = User(email=BENCH_EMAIL, hashed_password="!", full_name="Notification Benchmark")
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+
+    # One server-side statement; a fifth of the rows are unread
+    db.execute(text(
+        "INSERT INTO notifications (id, user_id, type, title, message, is_read, created_at, collapsed_count) "
+        "SELECT gen_random_uuid(), :user_id, :type, 'Benchmark', 'Notification ' || n, n % 5 <> 0, "
+        ":now - n * interval '1 second', 1 "
+        "FROM generate_series(1, :count) AS n"
+    ).bindparams(
+        bindparam("type", NotificationType.SYSTEM, type_=Notification.type.type)
+    ), {"user_id": user.id, "now": datetime.utcnow(), "count": count})
+    db.commit()
+    db.execute(text("ANALYZE notifications"))
+    db.commit()
+    return user
+
+
+def check_broadcasts(db, user_id):
+    """
+    Create a broadcast of every type and exercise the queries that read
+    broadcasts. They compare enum columns with bound values, which only a
+    real PostgreSQL enum column checks.
+    """
+    for notification_type in NotificationType:
+        NotificationService.create_broadcast(db, BroadcastCreate(
+            type=notification_type, title="Benchmark", message="Broadcast"
+        ), created_by=user_id)
+
+    feed = NotificationService.get_user_notifications(db, user_id, limit=len(NotificationType))
+    assert all(item.is_broadcast for item in feed), "broadcasts missing from the feed"
+    stats = NotificationService.get_notification_stats(db, user_id)
+    assert all(stats["by_type"][notification_type.value] for notification_type in NotificationType), stats
+    assert NotificationService.mark_all_as_read(db, user_id) >= len(NotificationType)
+
+
+def time_page(db, user_id, repeats: int, **kwargs) -> float:
+    """Median milliseconds to fetch one page."""
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        NotificationService.get_user_notifications(db, user_id, **kwargs)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def cursor_at(db, user_id, depth: int):
+    """The (created_at, id) keyset cursor of the item just before `depth`."""
+    row = db.query(Notification.created_at, Notification.id).filter(
+        Notification.user_id == user_id
+    ).order_by(Notification.created_at.desc(), Notification.id.desc()).offset(depth - 1).first()
+    return (row.created_at, row.id)
+
+
+def run(count: int, page_size: int, depths: List[int], repeats: int, keep: bool):
+    db = SessionLocal()
+
+    try:
+        print(f"Seeding {count} notifications...")
+        started = time.perf_counter()
+        user = seed(db, count)
+        print(f"  done in {time.perf_counter() - started:.1f}s")
+
+        print("Checking broadcast queries...")
+        check_broadcasts(db, user.id)
+        print("  ok")
+
+        print(f"\n{'depth':>8} {'offset ms':>10} {'keyset ms':>10}")
+        deepest = None
+        for depth in depths:
+            if depth >= count:
+                continue
+            offset_ms = time_page(db, user.id, repeats, skip=depth, limit=page_size)
+            before = cursor_at(db, user.id, depth) if depth else None
+            keyset_ms = time_page(db, user.id, repeats, before=before, limit=page_size)
+            deepest = before
+            print(f"{depth:>8} {offset_ms:>10.2f} {keyset_ms:>10.2f}")
+
+        if deepest:
+            plan = db.execute(text(
+                "EXPLAIN (ANALYZE, BUFFERS) "
+                "SELECT id FROM notifications WHERE user_id = :user_id "
+                "AND (created_at, id) < (:created_at, :id) "
+                "ORDER BY created_at DESC, id DESC LIMIT :limit"
+            ), {"user_id": user.id, "created_at": deepest[0], "id": deepest[1], "limit": page_size}).scalars().all()
+            print("\nDeepest keyset page (personal notifications):")
+            for line in plan:
+                print(f"  {line}")
+    finally:
+        if not keep:
+            db.rollback()
+            bench_user_ids = db.query(User.id).filter(User.email == BENCH_EMAIL)
+            db.query(BroadcastNotification).filter(
+                BroadcastNotification.created_by.in_(bench_user_ids.scalar_subquery())
+            ).delete(synchronize_session=False)
+            db.query(User).filter(User.email == BENCH_EMAIL).delete()
+            db.commit()
+        db.close()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Notification feed pagination benchmark")
+    parser.add_argument("--count", type=int, default=100000, help="Notifications to seed")
+    parser.add_argument("--page-size", type=int, default=50, help="Items per page")
+    parser.add_argument("--depths", default="0,1000,10000,50000,99000", help="Comma-separated page depths")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed runs per measurement")
+    parser.add_argument("--keep", action="store_true", help="Keep the benchmark user and data")
+    args = parser.parse_args(argv)
+
+    depths = [int(depth) for depth in args.depths.split(",") if depth.strip()]
+    run(args.count, args.page_size, depths, args.repeats, args.keep)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,39 @@
+"""Run location history partition maintenance once
+
+Creates upcoming partitions, rolls up and drops raw partitions past the raw
+retention window, and drops rollup partitions past the rollup retention
+window. The API runs this periodically when BACKGROUND_JOBS_ENABLED is set;
+use this script from cron when background jobs are disabled.
+
+Run with: python -m scripts.location_history_maintenance
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.database import SessionLocal
+from app.services.location_history_service import LocationHistoryService
+
+
+def run_maintenance():
+    """Run one maintenance pass."""
+    db = SessionLocal()
+    
+    try:
+        summary = LocationHistoryService.run_maintenance(db)
+        for key, value in summary.items():
+            print(f"  {key}: {value}")
+    except Exception as e:
+        print(f"Error running location history maintenance: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    print("Running location history maintenance...")
+    run_maintenance()
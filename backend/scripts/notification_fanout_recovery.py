@@ -0,0 +1,37 @@
+"""Finish interrupted notification fan-outs once
+
+Picks up fan-out jobs that never started or whose worker died (e.g. the API
+restarted mid-job) and runs them to completion. The API does this every
+minute when BACKGROUND_JOBS_ENABLED is set; use this script from cron when
+background jobs are disabled.
+
+Run with: python -m scripts.notification_fanout_recovery
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.database import SessionLocal
+from app.services.notification_fanout_service import NotificationFanoutService
+
+
+def recover():
+    """Run one recovery pass."""
+    db = SessionLocal()
+
+    try:
+        NotificationFanoutService.resume_stale_jobs(db)
+    except Exception as e:
+        print(f"Error resuming notification fan-outs: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    print("Resuming stale notification fan-outs...")
+    recover()
@@ -0,0 +1,46 @@
+"""Drain the notification outbox once
+
+Writes every pending notification entry and sends every email entry that
+is due. The API polls the outbox every NOTIFICATION_OUTBOX_POLL_SECONDS when
+BACKGROUND_JOBS_ENABLED is set; request handlers only write notifications,
+so use this script from cron (e.g. every minute) when background jobs are
+disabled, or queued emails are never sent.
+
+Run with: python -m scripts.notification_outbox_dispatch
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.database import SessionLocal
+from app.services.notification_outbox_service import NotificationOutboxService
+
+EMAIL_BATCH_SIZE = 50
+
+
+def dispatch():
+    """Run one dispatch pass."""
+    db = SessionLocal()
+
+    try:
+        processed = NotificationOutboxService.dispatch(db)
+        while True:
+            sent = NotificationOutboxService.dispatch_emails(db, EMAIL_BATCH_SIZE)
+            processed += sent
+            if sent < EMAIL_BATCH_SIZE:
+                break
+        print(f"  processed: {processed}")
+    except Exception as e:
+        print(f"Error dispatching notification outbox: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    print("Dispatching notification outbox...")
+    dispatch()
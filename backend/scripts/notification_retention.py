@@ -0,0 +1,40 @@
+"""Run the notification retention policy once
+
+Deletes read notifications past NOTIFICATION_READ_RETENTION_DAYS, trims
+users above NOTIFICATION_MAX_PER_USER and deletes broadcasts past
+NOTIFICATION_BROADCAST_RETENTION_DAYS, in small batches. The API runs this
+periodically when BACKGROUND_JOBS_ENABLED is set; use this script from cron
+when background jobs are disabled.
+
+Run with: python -m scripts.notification_retention
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.database import SessionLocal
+from app.services.notification_retention_service import NotificationRetentionService
+
+
+def run_retention():
+    """Run one retention pass."""
+    db = SessionLocal()
+    
+    try:
+        summary = NotificationRetentionService.run_retention(db)
+        for key, value in summary.items():
+            print(f"  {key}: {value}")
+    except Exception as e:
+        print(f"Error running notification retention: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    print("Running notification retention...")
+    run_retention()
@@ -0,0 +1,36 @@
+"""Delete expired OTP requests once
+
+The API runs this periodically when BACKGROUND_JOBS_ENABLED is set; use
+this script from cron when background jobs are disabled.
+
+Run with: python -m scripts.otp_sweep
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.database import SessionLocal
+from app.services.auth_service import AuthService
+
+
+def sweep():
+    """Run one sweep."""
+    db = SessionLocal()
+    
+    try:
+        deleted = AuthService.sweep_expired_otps(db)
+        print(f"  deleted: {deleted}")
+    except Exception as e:
+        print(f"Error sweeping OTP requests: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    print("Sweeping expired OTP requests...")
+    sweep()
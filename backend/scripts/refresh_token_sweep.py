@@ -0,0 +1,36 @@
+"""Delete expired refresh tokens once
+
+The API runs this periodically when BACKGROUND_JOBS_ENABLED is set; use
+this script from cron when background jobs are disabled.
+
+Run with: python -m scripts.refresh_token_sweep
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.database import SessionLocal
+from app.services.refresh_token_service import RefreshTokenService
+
+
+def sweep():
+    """Run one sweep."""
+    db = SessionLocal()
+    
+    try:
+        deleted = RefreshTokenService.sweep_expired(db)
+        print(f"  deleted: {deleted}")
+    except Exception as e:
+        print(f"Error sweeping refresh tokens: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    print("Sweeping expired refresh tokens...")
+    sweep()
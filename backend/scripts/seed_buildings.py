@@ -13,6 +13,7 @@ sys.path.append(str(Path(__file__).parent.parent))
 from sqlalchemy.orm import Session
 from app.core.database import SessionLocal
 from app.models.building import Building, BuildingType
+from app.services.building_service import backfill_location_buildings
 import uuid
 
 
@@ -199,6 +200,10 @@ def seed_buildings():
             count = db.query(Building).filter(Building.building_type == building_type).count()
             print(f"  {building_type.value}: {count}")
         
+        # Assign the new buildings to locations shared before seeding
+        summary = backfill_location_buildings(db)
+        print(f"Assigned buildings for {summary['changed']} of {summary['processed']} active locations")
+        
     except Exception as e:
         print(f"Error seeding buildings: {e}")
         db.rollback()